@@ -7,6 +7,56 @@ from utils.state_utils import (
 )
 from config import setup_streamlit
 from utils.components import confirm_dialog
+from utils.constants import LEETCODE_CATEGORY_MAP
+
+STATUS_EMOJI = {
+    "started": "🆕",
+    "reviewing": "📝",
+    "solving": "💭",
+    "formatting": "🔧",
+    "debugging": "🐛",
+    "completed": "✅",
+}
+HISTORY_PAGE_SIZE = 20
+
+
+def show_history_filters():
+    """Status and category filters, resetting pagination when they change"""
+    col1, col2 = st.columns(2)
+    with col1:
+        status = st.selectbox(
+            "Status", options=["All"] + list(STATUS_EMOJI), key="history_status"
+        )
+    with col2:
+        category = st.selectbox(
+            "Category",
+            options=["All"] + list(LEETCODE_CATEGORY_MAP),
+            key="history_category",
+        )
+
+    filters = (status, category)
+    if st.session_state.get("history_filters") != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_cursors = [None]
+
+    return (
+        None if status == "All" else status,
+        None if category == "All" else category,
+    )
+
+
+def show_question_details(question_id: str):
+    """Load and render the full question and solution of one history row"""
+    question = st.session_state.db.get_question(question_id)
+    if not question:
+        st.warning("This question no longer exists")
+        return
+    if question.get("generated_question"):
+        st.markdown("**Question:**")
+        st.markdown(question["generated_question"])
+    if question.get("solution"):
+        st.markdown("**Solution:**")
+        st.code(question["solution"], language="python")
 
 
 def show_history():
@@ -14,38 +64,36 @@ def show_history():
     if "db" not in st.session_state:
         return
 
-    questions = st.session_state.db.get_all_questions()
+    st.markdown("### Previous Questions")
+    status, category = show_history_filters()
+
+    # Cursors of the pages visited so far, the last one is the current page
+    cursors = st.session_state.setdefault("history_cursors", [None])
+    questions, next_cursor = st.session_state.db.list_questions(
+        limit=HISTORY_PAGE_SIZE,
+        cursor=cursors[-1],
+        status=status,
+        category=category,
+    )
     if not questions:
         st.info("No questions generated yet")
         return
 
-    st.markdown("### Previous Questions")
-
-    # Sort questions by last_updated, most recent first
-    questions.sort(key=lambda x: x.get("last_updated", ""), reverse=True)
-
     for q in questions:
-        # Create a unique key for each expander
-        expander_key = f"expander_{q.get('id', '')}"
-        status_emoji = {
-            "started": "🆕",
-            "reviewing": "📝",
-            "solving": "💭",
-            "formatting": "🔧",
-            "debugging": "🐛",
-            "completed": "✅",
-        }.get(q.get("status", ""), "❓")
+        status_emoji = STATUS_EMOJI.get(q.get("status", ""), "❓")
+        categories = ", ".join(q.get("selected_categories") or [])
 
         with st.expander(
             f"{status_emoji} Question from {str(q.get('created_at', ''))[:10]} - {q.get('status', 'unknown')}"
+            + (f" ({categories})" if categories else "")
         ):
-            st.markdown("**Categories:** " + ", ".join(q.get("categories", [])))
-            if q.get("generated_question"):
-                st.markdown("**Question:**")
-                st.markdown(q["generated_question"])
-            if q.get("solution"):
-                st.markdown("**Solution:**")
-                st.code(q["solution"], language="python")
+            st.markdown("**Categories:** " + (categories or "-"))
+            if q.get("selected_theme"):
+                st.markdown(f"**Theme:** {q['selected_theme']}")
+
+            # Full bodies are only fetched and sent to the browser on demand
+            if st.toggle("Show question and solution", key=f"details_{q['id']}"):
+                show_question_details(q["id"])
 
             col1, col2 = st.columns([3, 1])
             with col1:
@@ -93,6 +141,19 @@ def show_history():
                             if status in status_to_page:
                                 st.switch_page(status_to_page[status])
 
+    # Pagination controls
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("← Newer", key="history_newer"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    with col3:
+        if next_cursor and st.button("Older →", key="history_older"):
+            cursors.append(next_cursor)
+            st.rerun()
+
 
 def main():
     # Set up Streamlit configuration
@@ -2,19 +2,21 @@ import streamlit as st
 import uuid
 from utils.openai_utils import (
     init_openai,
-    generate_question,
+    stream_generate_question,
     validate_unit_tests,
-    refine_problem,
+    stream_refine_problem,
 )
 from utils.state_utils import (
     initialize_session_state,
     set_state_value,
     save_progress,
+    flush_progress,
     clear_session_state,
 )
 from utils.constants import LEETCODE_CATEGORY_MAP
 from utils.progress_utils import sidebar_progress
-from utils.components import card
+from utils.components import card, render_stream
+from utils.dedup import check_duplicate, dedup_attempts
 
 
 def render_generate_page():
@@ -79,40 +81,66 @@ def render_generate_page():
                 category_values = [
                     LEETCODE_CATEGORY_MAP[category] for category in categories
                 ]
-                # Pass theme to generate_question
-                initial_result = generate_question(
-                    client, category_values, selected_theme
-                )
-
-                if initial_result and initial_result["status"] == "success":
-                    # Show initial result in expander
-                    with st.expander("View Initial Generated Question"):
-                        st.markdown(initial_result["generated_text"])
+                # Regenerate near-duplicates of stored questions before any
+                # tokens are spent solving them. The refined text is compared,
+                # as that is what the stored questions hold.
+                result = None
+                dedup = None
+                max_attempts = dedup_attempts()
+                for attempt in range(1, max_attempts + 1):
+                    # Pass theme to generate_question
+                    initial_result = render_stream(
+                        stream_generate_question(
+                            client, category_values, selected_theme
+                        )
+                    )
+                    if not initial_result or initial_result["status"] != "success":
+                        result = None
+                        break
 
                     # Refine the generated problem
                     with st.spinner("Refining question..."):
-                        refined_result = refine_problem(
-                            client, initial_result["generated_text"]
+                        refined_result = render_stream(
+                            stream_refine_problem(
+                                client, initial_result["generated_text"]
+                            )
+                        )
+                    if refined_result and refined_result["status"] == "success":
+                        result = refined_result
+                    else:
+                        st.warning("Failed to refine question. Using initial version.")
+                        result = initial_result  # Fallback to initial version
+
+                    dedup = check_duplicate(result["generated_text"], attempt=attempt)
+                    if dedup["decision"] != "duplicate":
+                        break
+                    if attempt < max_attempts:
+                        st.info(
+                            f"This question is {dedup['score']:.0%} similar to "
+                            f"question {dedup['similar_to']}, generating another one..."
                         )
 
-                        if refined_result and refined_result["status"] == "success":
-                            set_state_value("current_question_id", str(uuid.uuid4()))
-                            set_state_value(
-                                "generated_text", refined_result["generated_text"]
-                            )
-                            set_state_value("selected_categories", categories)
-                            save_progress()
-                        else:
-                            st.warning(
-                                "Failed to refine question. Using initial version."
-                            )
-                            result = initial_result  # Fallback to initial version
-                            set_state_value("current_question_id", str(uuid.uuid4()))
-                            set_state_value("generated_text", result["generated_text"])
-                            set_state_value("selected_categories", categories)
-                            save_progress()
-                else:
+                if result is None:
                     st.warning("Failed to generate question. Please try again.")
+                else:
+                    # Show initial result in expander
+                    with st.expander("View Initial Generated Question"):
+                        st.markdown(initial_result["generated_text"])
+
+                    # Duplicates are stored too, with the decision
+                    set_state_value("current_question_id", str(uuid.uuid4()))
+                    set_state_value("generated_text", result["generated_text"])
+                    set_state_value("selected_categories", categories)
+                    set_state_value("dedup", dedup)
+                    save_progress()
+
+                    if dedup["decision"] == "duplicate":
+                        st.error(
+                            f"All {max_attempts} generated questions were "
+                            f"near-duplicates of existing ones (similarity of at "
+                            f"least {dedup['threshold']:.0%}). Try other categories "
+                            "or another theme."
+                        )
 
     # Show generated question and controls
     generated_text = st.session_state.get("generated_text")
@@ -160,7 +188,8 @@ def render_generate_page():
                     )
                 set_state_value("generate_completed", True)
                 save_progress()
-                st.switch_page("pages/2_solve.py")
+                if flush_progress():
+                    st.switch_page("pages/2_solve.py")
 
 
 if __name__ == "__main__":
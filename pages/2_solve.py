@@ -1,8 +1,17 @@
 import streamlit as st
-from utils.openai_utils import init_openai, solve_problem, validate_unit_tests
-from utils.state_utils import initialize_session_state, set_state_value, save_progress
+from utils.openai_utils import (
+    init_openai,
+    stream_solve_problem,
+    validate_unit_tests,
+)
+from utils.state_utils import (
+    initialize_session_state,
+    set_state_value,
+    save_progress,
+    flush_progress,
+)
 from utils.progress_utils import sidebar_progress
-from utils.components import card
+from utils.components import card, render_stream
 
 
 def render_solve_page():
@@ -39,7 +48,9 @@ def render_solve_page():
 
     if st.button("Generate Solution"):
         with st.spinner("Generating solution..."):
-            result = solve_problem(client, str(st.session_state.generated_question))
+            result = render_stream(
+                stream_solve_problem(client, str(st.session_state.generated_question))
+            )
             if result and result["status"] == "success":
                 set_state_value("solution_text", result["generated_text"])
                 set_state_value("validate_clicked", False)
@@ -88,7 +99,8 @@ def render_solve_page():
                 set_state_value("solve_completed", True)  # Mark solve step as completed
                 set_state_value("validate_clicked", False)
                 save_progress()
-                st.switch_page("pages/3_format.py")
+                if flush_progress():
+                    st.switch_page("pages/3_format.py")
 
 
 if __name__ == "__main__":
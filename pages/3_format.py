@@ -1,7 +1,12 @@
 import streamlit as st
 from utils.openai_utils import init_openai, format_solution
 from utils.file_utils import save_challenge_file
-from utils.state_utils import initialize_session_state, save_progress, set_state_value
+from utils.state_utils import (
+    initialize_session_state,
+    save_progress,
+    flush_progress,
+    set_state_value,
+)
 from utils.progress_utils import sidebar_progress
 from utils.text_utils import clean_code_block
 from utils.components import card
@@ -66,7 +71,8 @@ def render_format_page():
                     set_state_value("format_completed", True)
                     save_progress()
                     st.success(f"Solution saved to {filepath}")
-                    st.switch_page("pages/4_debug.py")
+                    if flush_progress():
+                        st.switch_page("pages/4_debug.py")
                 except Exception as e:
                     st.error(f"Error saving file: {str(e)}")
             else:
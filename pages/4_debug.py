@@ -1,12 +1,18 @@
 import streamlit as st
-from utils.openai_utils import init_openai, debug_solution, format_solution
+from utils.openai_utils import (
+    init_openai,
+    stream_debug_solution,
+    format_solution,
+)
 from utils.state_utils import (
     initialize_session_state,
     get_state_value,
     set_state_value,
     save_progress,
+    flush_progress,
 )
 from utils.progress_utils import sidebar_progress
+from utils.components import render_stream
 from utils.solution_tester import SolutionTester
 from utils.text_utils import clean_code_block
 from pathlib import Path
@@ -15,7 +21,7 @@ from utils.prompts import DEBUG_SOLUTION_PROMPT
 import re
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from utils.solution_tester import TestResult
+from utils.solution_tester import TestOutcome, TestResult
 
 
 def render_debug_page():
@@ -88,12 +94,21 @@ def render_debug_page():
     saved_solution = edited_solution
 
     # Add debug controls
+    estimate_complexity = st.checkbox(
+        "Estimate time and space complexity",
+        help="Time the solution on synthesized inputs of growing size up to the "
+        "stated constraints and fit the results to Big-O classes.",
+    )
     if st.button("Run Tests"):
         with st.spinner("Running tests..."):
             try:
-                # Initialize and run the solution tester directly with the challenge file
-                tester = SolutionTester.from_challenge_file(challenge_path)
-                results = tester.run_all_tests()
+                # Run the tests in worker processes so a slow solution can't
+                # stall the Streamlit server
+                profile = None
+                with SolutionTester.from_challenge_file(challenge_path) as tester:
+                    results = tester.run_all_tests(parallel=True)
+                    if estimate_complexity:
+                        profile = tester.profile_complexity()
 
                 # Display results
                 st.subheader("Test Results")
@@ -108,12 +123,39 @@ def render_debug_page():
                 with col3:
                     st.metric("Failed", len(results) - total_passed)
 
+                if profile:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.metric("Estimated Time Complexity", profile.time_complexity)
+                    with col2:
+                        st.metric(
+                            "Estimated Space Complexity", profile.space_complexity
+                        )
+                    with st.expander("Complexity Profile Details"):
+                        st.text(profile.message)
+                        st.table(
+                            [
+                                {
+                                    "n": sample.size,
+                                    "seconds": f"{sample.seconds:.4f}",
+                                    "peak memory (KB)": (
+                                        f"{sample.peak_memory_bytes / 1024:.1f}"
+                                        if sample.peak_memory_bytes is not None
+                                        else "-"
+                                    ),
+                                }
+                                for sample in profile.samples
+                            ]
+                        )
+
                 # Show detailed results
                 for i, result in enumerate(results, 1):
-                    with st.expander(
-                        f"Test Case {i}: {'✅ PASSED' if result.passed else '❌ FAILED'}"
-                    ):
+                    status = "✅ PASSED" if result.passed else "❌ FAILED"
+                    if result.outcome not in (TestOutcome.PASSED, TestOutcome.FAILED):
+                        status += f" ({result.outcome.value.replace('_', ' ')})"
+                    with st.expander(f"Test Case {i}: {status}"):
                         st.text(f"Execution Time: {result.execution_time:.4f} seconds")
+                        st.text(f"CPU Time: {result.cpu_time:.4f} seconds")
                         st.text("Test Details:")
                         st.code(result.message)
 
@@ -126,6 +168,42 @@ def render_debug_page():
             except Exception as e:
                 st.error(f"Error running tests: {str(e)}")
 
+    if st.button("Run Stress Tests"):
+        with st.spinner("Running the solution at the maximum input constraints..."):
+            try:
+                with SolutionTester.from_challenge_file(challenge_path) as tester:
+                    stress_results = tester.run_stress_tests()
+
+                st.subheader("Stress Test Results")
+                for result in stress_results:
+                    status = "✅ PASSED" if result.passed else "❌ FAILED"
+                    with st.expander(f"{result.shape.title()} inputs: {status}"):
+                        sizes = ", ".join(
+                            f"len({name}) = {size:,}"
+                            for name, size in result.input_sizes.items()
+                        )
+                        st.text(f"Input Sizes: {sizes}")
+                        st.text(
+                            f"Execution Time: {result.execution_time:.4f} seconds "
+                            f"(limit {result.time_limit_sec} seconds)"
+                        )
+                        if result.throughput is not None:
+                            st.text(f"Throughput: {result.throughput:,.0f} elements/s")
+                        if result.peak_memory_mb is not None:
+                            st.text(f"Peak Memory: {result.peak_memory_mb:.1f} MB")
+                        st.text(result.message)
+
+                if all(result.passed for result in stress_results):
+                    st.success("The solution handles the maximum constraints.")
+                else:
+                    st.warning(
+                        "The solution is too slow or uses too much memory at the "
+                        "maximum constraints."
+                    )
+
+            except Exception as e:
+                st.error(f"Error running stress tests: {str(e)}")
+
     # Add AI Debug Assistant button
     if st.button("Get AI Debug Help"):
         with st.spinner("Analyzing solution with AI..."):
@@ -150,8 +228,10 @@ def render_debug_page():
                     )
 
                 # Get AI debugging suggestions
-                debug_response = debug_solution(
-                    client, saved_solution, failed_tests, model="o3-mini"
+                debug_response = render_stream(
+                    stream_debug_solution(
+                        client, saved_solution, failed_tests, model="o3-mini"
+                    )
                 )
 
                 # Store debug response in session state
@@ -215,7 +295,8 @@ def render_debug_page():
     if st.button("Proceed to Review"):
         set_state_value("debug_completed", True)  # Mark debug step as completed
         save_progress()
-        st.switch_page("pages/5_review.py")
+        if flush_progress():
+            st.switch_page("pages/5_review.py")
 
 
 if __name__ == "__main__":
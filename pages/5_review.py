@@ -5,10 +5,8 @@ from utils.state_utils import (
     get_state_value,
     set_state_value,
     save_progress,
+    flush_progress,
 )
-import requests
-from bs4 import BeautifulSoup
-from utils.constants import LEETCODE_CATEGORY_MAP
 from pathlib import Path
 import os
 from utils.progress_utils import sidebar_progress
@@ -18,54 +16,12 @@ from utils.leetcode_utils import (
 )
 from tavily import TavilyClient
 from utils.components import card
+from utils.file_utils import save_final_challenge
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def search_leetcode_similarity(question_text, category=None):
-    """
-    Search for similar problems on LeetCode with optional category filter
-
-    Args:
-        question_text (str): The question text to search for
-        category (str, optional): The category to filter by (e.g., 'ARRAY', 'DYNAMIC_PROGRAMMING')
-    """
-    try:
-        print(f"Searching for similar problems for category: {category}")
-        # Map our category to LeetCode's category format if category is provided
-        leetcode_category = LEETCODE_CATEGORY_MAP.get(category, "") if category else ""
-        if leetcode_category:
-            # Include category in search URL
-            search_url = (
-                f"https://leetcode.com/problemset/all/"
-                f"?search={question_text[:100]}"
-                f"&topicSlugs={leetcode_category.lower()}"
-            )
-        else:
-            search_url = (
-                f"https://leetcode.com/problemset/all/?search={question_text[:100]}"
-            )
-
-        response = requests.get(search_url)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Extract problem titles and links
-        similar_problems = []
-        problem_elements = soup.find_all("div", {"class": "title-cell"})
-
-        for element in problem_elements[:5]:  # Get top 5 similar problems
-            if element.find("a"):
-                title = element.find("a").text.strip()
-                link = f"https://leetcode.com{element.find('a')['href']}"
-                similar_problems.append((title, link))
-
-        return similar_problems
-    except Exception as e:
-        st.error(f"Error searching LeetCode: {str(e)}")
-        return []
-
-
 def get_solution_review(solution_text):
     """Get AI review of the solution"""
     client = init_openai()
@@ -81,19 +37,6 @@ def get_solution_review(solution_text):
         return None
 
 
-def save_final_challenge(challenge_text: str, question_id: str):
-    """Save the final challenge to the final_challenges directory"""
-    # Create final_challenges directory if it doesn't exist
-    final_dir = Path("final_challenges")
-    final_dir.mkdir(exist_ok=True)
-
-    # Save the challenge file with the question ID as the filename
-    challenge_path = final_dir / f"challenge_{question_id}.py"
-    with open(challenge_path, "w") as f:
-        f.write(challenge_text)
-    return challenge_path
-
-
 def render_review_page():
     st.title("Review Solution")
     st.markdown(
@@ -275,6 +218,8 @@ def render_review_page():
                     set_state_value("status", "completed")
                     set_state_value("review_completed", True)
                     save_progress()
+                    if not flush_progress():
+                        return
 
                     st.success(
                         f"Challenge completed! Final version saved to: {final_path}"
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Union
 
@@ -50,6 +50,13 @@ class UnitTest:
     output: Any  # Access with test_case.output
 
 
+@dataclass
+class StressTest:
+    shape: str = "random"  # random, sorted, reversed or uniform
+    time_limit_sec: float = 2.0  # Budget for one run at the maximum constraints
+    sizes: Dict[str, int] = field(default_factory=dict)  # Overrides per input
+
+
 @dataclass
 class Metadata:
     statement: str
@@ -59,3 +66,4 @@ class Metadata:
     output: Output
     unit_tests: List[UnitTest]
     approx_time_spent_min: int
+    stress_tests: List[StressTest] = field(default_factory=list)
@@ -0,0 +1,67 @@
+import argparse
+from pathlib import Path
+import sys
+import time
+from dotenv import load_dotenv
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utils.db_utils import create_db
+from utils.similarity_index import SimilarityIndex
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Rebuild the local near-duplicate index from every stored question "
+            "and final challenge, e.g. after importing questions, or look up "
+            "the questions most similar to a text."
+        )
+    )
+    parser.add_argument(
+        "--index",
+        default="data/similarity_index.sqlite3",
+        help="Index file (default: data/similarity_index.sqlite3)",
+    )
+    parser.add_argument(
+        "--query",
+        help="Instead of rebuilding, print the questions most similar to this "
+        "text, or to the contents of the file it names",
+    )
+    parser.add_argument(
+        "-k", type=int, default=5, help="Number of questions --query prints"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    load_dotenv()
+    args = parse_args(argv)
+    index = SimilarityIndex(args.index)
+
+    if args.query:
+        text = args.query
+        if Path(text).is_file():
+            text = Path(text).read_text()
+        start = time.perf_counter()
+        results = index.query(text, k=args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Searched {len(index)} documents in {elapsed:.1f}ms:")
+        for result in results:
+            print(f"- {result.score:.2f} {result.question_id} ({result.source})")
+        return
+
+    db = create_db()
+    start = time.time()
+    try:
+        count = index.rebuild(db)
+    finally:
+        if hasattr(db, "close"):
+            db.close()
+    print(f"Indexed {count} documents in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
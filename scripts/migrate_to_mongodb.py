@@ -1,14 +1,22 @@
+import argparse
+import itertools
 import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
 import os
 import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 
 # Add the project root directory to Python path
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from utils.mongo_utils import MongoDB
+from utils.compression import unpack_fields
+from utils.db_utils import iter_json_questions, journal_path
+from utils.mongo_utils import MongoDB, close_mongo_clients
 
 
 def check_environment():
@@ -26,51 +34,400 @@ def check_environment():
         )
 
 
-def migrate_json_to_mongodb():
-    """Migrate data from local JSON file to MongoDB Atlas"""
-    # Load environment variables
-    load_dotenv()
+class Checkpoint:
+    """
+    Progress of a migration, saved after every batch so it can be resumed.
 
-    try:
-        # Verify MongoDB Atlas configuration
-        check_environment()
+    A checkpoint only applies to the same direction, source and target; any
+    other checkpoint file is ignored. Upserts are idempotent, so redoing the
+    batches after the checkpoint is safe.
+    """
+
+    def __init__(self, path: Optional[Path], key: Dict):
+        self.path = path
+        self.key = key
+        self.state: Dict = {}
+        if path and path.exists():
+            saved = json.loads(path.read_text())
+            if saved.get("key") == key:
+                self.state = saved.get("state", {})
+            else:
+                print(f"Ignoring checkpoint {path} of a different migration")
 
-        # Read existing JSON data
-        json_path = Path("data/questions.json")
-        if not json_path.exists():
-            print("No JSON data found to migrate")
+    def save(self, **state):
+        self.state.update(state)
+        if not self.path:
             return
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps({"key": self.key, "state": self.state}))
+        os.replace(tmp_path, self.path)
 
-        # Initialize MongoDB Atlas connection
-        print("Connecting to MongoDB Atlas...")
-        mongo_db = MongoDB()
+    def clear(self):
+        if self.path:
+            self.path.unlink(missing_ok=True)
 
-        with open(json_path, "r") as f:
-            json_data = json.load(f)
 
-        # Migrate each question
-        total_questions = len(json_data.get("questions", []))
-        if total_questions == 0:
-            print("No questions found in JSON file")
-            return
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def journal_changes(snapshot_path: Path) -> Dict[str, Dict]:
+    """
+    Fold the change log of a journaled JsonDB into one change per question,
+    so the migration only ever writes whole records. The log is compacted
+    once it outgrows the snapshot, so this stays small.
 
-        print(f"Starting migration of {total_questions} questions to MongoDB Atlas...")
-        migrated = 0
+    Returns:
+        Dict of question id to {"record": the record it was last replaced
+        with or None, "fields": fields set after that, "exists": whether the
+        log created it, "snapshot_fields": fields set before that, which only
+        apply if the question is in the snapshot}
+    """
+    changes: Dict[str, Dict] = {}
+    log_path = journal_path(snapshot_path)
+    if not log_path.exists():
+        return changes
 
-        for question in json_data.get("questions", []):
+    def change(question_id: str) -> Dict:
+        return changes.setdefault(
+            question_id,
+            {"record": None, "fields": {}, "exists": False, "snapshot_fields": {}},
+        )
+
+    with open(log_path, "r") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # Cut short by a crash
             try:
-                mongo_db.save_question(question)
-                migrated += 1
-                print(
-                    f"Migrated question {question.get('id')} ({migrated}/{total_questions})"
+                entry = json.loads(line)
+                if entry.get("op") == "upsert":
+                    record = unpack_fields(entry["record"])
+                    changes[record["id"]] = {
+                        "record": record,
+                        "fields": {},
+                        "exists": True,
+                        "snapshot_fields": {},
+                    }
+                elif entry.get("op") == "update":
+                    question = change(entry["id"])
+                    question["fields"].update(unpack_fields(entry["fields"]))
+                    question["exists"] = True
+                elif entry.get("op") == "status":
+                    # Like JsonDB, status changes of unknown questions are dropped
+                    question = change(entry["id"])
+                    target = "fields" if question["exists"] else "snapshot_fields"
+                    question[target].update(
+                        status=entry["status"],
+                        last_updated=entry["last_updated"],
+                        version=entry.get("version"),
+                    )
+            except (ValueError, KeyError):
+                print(f"Skipping corrupt journal entry in {log_path}")
+    return changes
+
+
+def final_questions(json_path: Path) -> Iterator[Dict]:
+    """Stream the questions of a JsonDB file with its change log applied"""
+    changes = journal_changes(json_path)
+    for question in iter_json_questions(json_path):
+        question_change = changes.pop(question.get("id"), None)
+        if question_change is None:
+            yield question
+            continue
+        base = question_change["record"] or {
+            **question,
+            **question_change["snapshot_fields"],
+        }
+        yield {**base, **question_change["fields"], "id": question["id"]}
+
+    # Questions created since the last compaction
+    for question_id, question_change in changes.items():
+        if question_change["exists"]:
+            yield {
+                **(question_change["record"] or {}),
+                **question_change["fields"],
+                "id": question_id,
+            }
+
+
+def upload_batches(
+    mongo_db: MongoDB,
+    batches: Iterator[List[Dict]],
+    checkpoint: Checkpoint,
+    uploaded: Set[str],
+    workers: int,
+) -> Tuple[int, int]:
+    """
+    Upload batches with up to workers bulk writes in flight.
+
+    The ids of each batch are added to uploaded and checkpointed as soon as
+    the batch is written, so a resume skips exactly the questions already
+    written, whichever order the batches finished in. Failed batches aren't
+    recorded, so a resume retries them.
+
+    Returns:
+        Tuple of (questions written, questions failed)
+    """
+    written = failed = 0
+    pending = {}  # future -> ids of the batch
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        numbered = enumerate(batches)
+        while True:
+            # Keep a bounded number of batches queued so memory stays flat
+            while len(pending) < workers * 2:
+                item = next(numbered, None)
+                if item is None:
+                    break
+                number, batch = item
+                future = executor.submit(mongo_db.bulk_upsert, batch)
+                pending[future] = (number, [question["id"] for question in batch])
+            if not pending:
+                break
+
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            advanced = False
+            for future in completed:
+                number, ids = pending.pop(future)
+                try:
+                    future.result()
+                    written += len(ids)
+                    uploaded.update(ids)
+                    advanced = True
+                except Exception as e:
+                    failed += len(ids)
+                    print(f"Error writing batch {number} ({len(ids)} questions): {e}")
+            if advanced:
+                checkpoint.save(uploaded=list(uploaded))
+
+            rate = written / max(time.monotonic() - start, 1e-9)
+            print(f"Migrated {written} questions ({rate:.0f}/s)")
+
+    return written, failed
+
+
+def migrate_json_to_mongodb(
+    json_path: Path,
+    batch_size: int = 500,
+    workers: int = 4,
+    checkpoint_path: Optional[Path] = None,
+):
+    """Migrate data from local JSON file to MongoDB Atlas"""
+    if not json_path.exists():
+        print("No JSON data found to migrate")
+        return
+
+    # Initialize MongoDB Atlas connection
+    print("Connecting to MongoDB Atlas...")
+    mongo_db = MongoDB()
+
+    checkpoint = Checkpoint(
+        checkpoint_path, {"direction": "import", "source": str(json_path.resolve())}
+    )
+    # Resuming by id rather than by position stays correct when questions
+    # were added to or compacted in the file since the last run
+    uploaded = set(checkpoint.state.get("uploaded", []))
+    if uploaded:
+        print(f"Resuming after {len(uploaded)} questions")
+
+    print(f"Starting migration of {json_path} to MongoDB Atlas...")
+    # Every question appears once, so batches can be written in any order
+    questions = (
+        question
+        for question in final_questions(json_path)
+        if question["id"] not in uploaded
+    )
+    written, failed = upload_batches(
+        mongo_db, batched(questions, batch_size), checkpoint, uploaded, workers
+    )
+
+    print(f"\nMigration completed:")
+    print(f"- Successfully migrated: {written} questions")
+    if failed:
+        print(f"- Failed: {failed} questions, run again to resume from the checkpoint")
+    else:
+        checkpoint.clear()
+
+
+def to_json_record(question: Dict) -> Dict:
+    """Mongo document as stored by JsonDB (ISO timestamp strings)"""
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in question.items()
+    }
+
+
+def export_mongodb(
+    output_path: Path,
+    output_format: str = "json",
+    batch_size: int = 500,
+    checkpoint_path: Optional[Path] = None,
+):
+    """
+    Back up MongoDB Atlas to a JsonDB file or a SQLiteDB database.
+
+    Questions are streamed in id order. A JSON backup is written to a
+    .partial file that is renamed into place once complete, so an existing
+    backup is never left half written.
+    """
+    print("Connecting to MongoDB Atlas...")
+    mongo_db = MongoDB()
+
+    checkpoint = Checkpoint(
+        checkpoint_path,
+        {
+            "direction": "export",
+            "format": output_format,
+            "target": str(output_path.resolve()),
+        },
+    )
+    after_id = checkpoint.state.get("last_id")
+    exported = checkpoint.state.get("exported", 0)
+    if after_id:
+        print(f"Resuming after {exported} questions")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    questions = (to_json_record(q) for q in mongo_db.iter_questions(after_id))
+
+    if output_format == "sqlite":
+        from utils.sqlite_utils import SQLiteDB
+
+        target = SQLiteDB(str(output_path), import_from=None)
+        try:
+            for batch in batched(questions, batch_size):
+                exported += target.import_questions(batch)
+                checkpoint.save(last_id=batch[-1]["id"], exported=exported)
+                print(f"Exported {exported} questions")
+        finally:
+            target.close()
+    else:
+        partial_path = output_path.with_name(f"{output_path.name}.partial")
+        if after_id and partial_path.exists():
+            f = open(partial_path, "r+")
+            # Drop anything written after the last checkpointed batch
+            f.seek(checkpoint.state["offset"])
+            f.truncate()
+        else:
+            f = open(partial_path, "w")
+            f.write('{"questions": [')
+            exported = 0
+        with f:
+            for batch in batched(questions, batch_size):
+                for question in batch:
+                    f.write(",\n" if exported else "\n")
+                    f.write(json.dumps(question, default=str))
+                    exported += 1
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint.save(
+                    last_id=batch[-1]["id"], exported=exported, offset=f.tell()
                 )
-            except Exception as e:
-                print(f"Error migrating question {question.get('id')}: {str(e)}")
+                print(f"Exported {exported} questions")
+            f.write("\n]}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial_path, output_path)
+
+    checkpoint.clear()
+    print(f"\nExport completed: {exported} questions written to {output_path}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Copy questions from data/questions.json to MongoDB Atlas, or with "
+            "--export back up MongoDB Atlas to a JSON or SQLite file."
+        )
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="Copy from MongoDB Atlas to --output instead",
+    )
+    parser.add_argument(
+        "--backfill-created-at",
+        action="store_true",
+        help="Set created_at on MongoDB questions saved without one, from "
+        "their last_updated, instead of migrating",
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=Path,
+        default=Path("data/questions.json"),
+        help="JsonDB file to migrate (default: data/questions.json)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path("data/questions_backup.json"),
+        help="Backup file written by --export (default: data/questions_backup.json)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["json", "sqlite"],
+        default="json",
+        help="Format of the --export backup (default: json)",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Questions per bulk write (default: 500)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="Bulk writes in flight at once when migrating (default: 4)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=Path("data/migration_checkpoint.json"),
+        help="File recording progress, rerun to resume "
+        "(default: data/migration_checkpoint.json)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore an existing checkpoint and start from the beginning",
+    )
+    args = parser.parse_args(argv)
+    if args.batch_size < 1 or args.workers < 1:
+        parser.error("--batch-size and --workers must be at least 1")
+    return args
+
+
+def main(argv=None):
+    # Load environment variables
+    load_dotenv()
+    args = parse_args(argv)
+
+    try:
+        # Verify MongoDB Atlas configuration
+        check_environment()
+
+        if args.restart:
+            args.checkpoint.unlink(missing_ok=True)
 
-        success_rate = (migrated / total_questions) * 100
-        print(f"\nMigration completed:")
-        print(f"- Successfully migrated: {migrated}/{total_questions} questions")
-        print(f"- Success rate: {success_rate:.1f}%")
+        if args.backfill_created_at:
+            print("Connecting to MongoDB Atlas...")
+            count = MongoDB().backfill_created_at()
+            print(f"Set created_at on {count} questions")
+        elif args.export:
+            export_mongodb(args.output, args.format, args.batch_size, args.checkpoint)
+        else:
+            migrate_json_to_mongodb(
+                args.input, args.batch_size, args.workers, args.checkpoint
+            )
 
     except Exception as e:
         print(f"\nMigration failed: {str(e)}")
@@ -79,11 +436,11 @@ def migrate_json_to_mongodb():
         print("2. The MongoDB Atlas connection string is correct")
         print("3. Your network can connect to MongoDB Atlas")
         print("4. Your IP address is whitelisted in MongoDB Atlas")
+        print("\nRun the same command again to resume from the checkpoint")
     finally:
-        if "mongo_db" in locals():
-            mongo_db.close()
-            print("\nDatabase connection closed")
+        close_mongo_clients()
+        print("\nDatabase connection closed")
 
 
 if __name__ == "__main__":
-    migrate_json_to_mongodb()
+    main()
@@ -0,0 +1,145 @@
+import argparse
+from pathlib import Path
+import sys
+import time
+from dotenv import load_dotenv
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from utils.constants import LEETCODE_CATEGORY_MAP
+from utils.db_utils import create_db
+from utils.pipeline import (
+    DEFAULT_STAGE_CONCURRENCY,
+    build_jobs,
+    run_pipeline,
+    summarize,
+)
+
+DEFAULT_THEMES = [
+    "Fantasy",
+    "Real-world",
+    "Sports",
+    "Science Fiction",
+    "Historical",
+]
+
+
+def parse_category_set(value: str):
+    """Parse a comma separated set of 1-3 categories, e.g. ARRAY,HASH_TABLE"""
+    categories = [c.strip().upper() for c in value.split(",") if c.strip()]
+    unknown = [c for c in categories if c not in LEETCODE_CATEGORY_MAP]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"Unknown categories {unknown}, choose from "
+            f"{', '.join(LEETCODE_CATEGORY_MAP)}"
+        )
+    if not 1 <= len(categories) <= 3:
+        raise argparse.ArgumentTypeError("Select between 1-3 categories per set")
+    return categories
+
+
+def parse_stage_limit(value: str):
+    """Parse a STAGE=N concurrency limit, e.g. debug=2"""
+    stage, _, limit = value.partition("=")
+    if stage not in DEFAULT_STAGE_CONCURRENCY or not limit.isdigit() or not int(limit):
+        raise argparse.ArgumentTypeError(
+            f"Expected STAGE=N with STAGE one of "
+            f"{', '.join(DEFAULT_STAGE_CONCURRENCY)} and N > 0"
+        )
+    return stage, int(limit)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Generate coding challenges end to end (generate, refine, solve, "
+            "format, test, review) without the Streamlit UI. Every stage is "
+            "saved to the configured database."
+        )
+    )
+    parser.add_argument(
+        "-c",
+        "--categories",
+        type=parse_category_set,
+        action="append",
+        required=True,
+        help="Comma separated category set, repeat for more sets "
+        "(e.g. -c ARRAY,HASH_TABLE -c GRAPH)",
+    )
+    parser.add_argument(
+        "-t",
+        "--theme",
+        dest="themes",
+        action="append",
+        help="Question theme, repeat for more themes (default: all themes)",
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=10,
+        help="Number of questions to produce, cycling through the "
+        "category/theme matrix (default: 10)",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        help="Questions admitted into the pipeline at once "
+        "(default: the sum of the stage limits)",
+    )
+    parser.add_argument(
+        "-s",
+        "--stage-concurrency",
+        type=parse_stage_limit,
+        action="append",
+        default=[],
+        help="Per-stage concurrency as STAGE=N, repeat for more stages "
+        f"(stages: {', '.join(DEFAULT_STAGE_CONCURRENCY)}; "
+        f"defaults: {DEFAULT_STAGE_CONCURRENCY})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    load_dotenv()
+    args = parse_args(argv)
+
+    jobs = build_jobs(args.categories, args.themes or DEFAULT_THEMES, args.count)
+    db = create_db()
+    stage_concurrency = dict(args.stage_concurrency)
+    print(f"Running {len(jobs)} questions...")
+
+    start = time.time()
+    finished = 0
+
+    def on_done(record):
+        nonlocal finished
+        finished += 1
+        outcome = record.get("pipeline_error") or record["status"]
+        print(
+            f"[{finished}/{len(jobs)}] {record['id']} "
+            f"({', '.join(record['selected_categories'])} / "
+            f"{record['selected_theme']}): {outcome}"
+        )
+
+    try:
+        records = run_pipeline(
+            db,
+            jobs,
+            max_in_flight=args.max_in_flight,
+            stage_concurrency=stage_concurrency,
+            on_done=on_done,
+        )
+    finally:
+        if hasattr(db, "close"):
+            db.close()
+
+    print(f"\nPipeline finished in {time.time() - start:.1f}s:")
+    for status, count in sorted(summarize(records).items()):
+        print(f"- {status}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(monkeypatch, tmp_path):
+    """Keep tests off the similarity index and the data/ directory"""
+    monkeypatch.setenv("SIMILARITY_INDEX_ENABLED", "false")
+    monkeypatch.setenv("COMPRESS_TEXT_FIELDS", "false")
+    monkeypatch.setenv("HTTP_CACHE_PATH", str(tmp_path / "http_cache.sqlite3"))
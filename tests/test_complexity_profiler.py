@@ -0,0 +1,27 @@
+import math
+
+import pytest
+
+from utils.complexity_profiler import fit_complexity
+
+SIZES = [100, 200, 400, 800, 1600, 3200]
+
+
+@pytest.mark.parametrize(
+    "name, growth",
+    [
+        ("O(1)", lambda n: 5.0),
+        ("O(n)", lambda n: 3 * n + 50),
+        ("O(n log n)", lambda n: n * math.log2(n)),
+        ("O(n^2)", lambda n: n * n + 10 * n),
+        ("O(n^3)", lambda n: n**3),
+    ],
+)
+def test_fit_complexity(name, growth):
+    assert fit_complexity(SIZES, [growth(n) for n in SIZES])[0] == name
+
+
+def test_noise_does_not_promote_linear_growth():
+    noise = [1.03, 0.97, 1.02, 0.99, 1.01, 0.98]
+    values = [n * f for n, f in zip(SIZES, noise)]
+    assert fit_complexity(SIZES, values)[0] == "O(n)"
@@ -0,0 +1,39 @@
+from utils.compression import PACKED_FIELD, pack_fields, unpack_fields
+
+
+def test_round_trip(monkeypatch):
+    monkeypatch.setenv("COMPRESS_TEXT_FIELDS", "true")
+    record = {"id": "q1", "solution": "def f(): pass", "generated_text": "text"}
+    packed = pack_fields(record)
+    assert set(packed) == {"id", PACKED_FIELD}
+    assert unpack_fields(packed) == record
+    assert isinstance(pack_fields(record, binary=True)[PACKED_FIELD], bytes)
+
+
+def test_disabled_by_default():
+    record = {"id": "q1", "solution": "def f(): pass"}
+    assert pack_fields(record) is record
+
+
+def test_plain_fields_win_over_the_blob(monkeypatch):
+    monkeypatch.setenv("COMPRESS_TEXT_FIELDS", "true")
+    packed = pack_fields({"id": "q1", "solution": "old", "formatted_text": "text"})
+    updated = {**packed, "solution": "new"}
+    assert unpack_fields(updated)["solution"] == "new"
+    # Packing again merges the update into the blob
+    repacked = pack_fields(updated)
+    assert "solution" not in repacked
+    assert unpack_fields(repacked) == {
+        "id": "q1",
+        "solution": "new",
+        "formatted_text": "text",
+    }
+
+
+def test_unpack_skips_blob_without_text_fields(monkeypatch):
+    monkeypatch.setenv("COMPRESS_TEXT_FIELDS", "true")
+    packed = pack_fields({"id": "q1", "status": "started", "solution": "x"})
+    assert unpack_fields(packed, ["id", "status"]) == {
+        "id": "q1",
+        "status": "started",
+    }
@@ -0,0 +1,142 @@
+import json
+
+import pytest
+
+from utils import db_utils
+from utils.db_utils import JsonDB, VersionConflictError, journal_path
+from utils.sqlite_utils import SQLiteDB
+
+
+@pytest.fixture(params=["json", "journal", "sqlite"])
+def db(request, tmp_path):
+    if request.param == "sqlite":
+        database = SQLiteDB(str(tmp_path / "questions.sqlite3"), import_from=None)
+    else:
+        database = JsonDB(
+            str(tmp_path / "questions.json"), journal=request.param == "journal"
+        )
+    yield database
+    database.close()
+
+
+def reopen(path, **options) -> JsonDB:
+    """Open a JsonDB as a new process would, without the shared cache"""
+    db_utils._shared_stores.clear()
+    return JsonDB(str(path), **options)
+
+
+def test_save_writes_back_version(db):
+    question = {"id": "q1", "title": "a"}
+    db.save_question(question)
+    assert question["version"] == 1
+
+    fields = {"title": "b", "version": 1}
+    db.update_question("q1", fields)
+    assert fields["version"] == 2
+    assert db.get_question("q1")["title"] == "b"
+
+
+def test_stale_version_conflicts(db):
+    db.save_question({"id": "q1", "title": "a"})
+    db.update_question("q1", {"title": "b", "version": 1})
+
+    with pytest.raises(VersionConflictError) as error:
+        db.update_question("q1", {"title": "c", "version": 1})
+    assert error.value.current_version == 2
+    with pytest.raises(VersionConflictError):
+        db.save_question({"id": "q1", "title": "c", "version": 1})
+    assert db.get_question("q1")["title"] == "b"
+
+
+def test_save_without_version_always_succeeds(db):
+    db.save_question({"id": "q1", "title": "a"})
+    db.save_question({"id": "q1", "title": "b"})
+    assert db.get_question("q1")["version"] == 2
+
+
+@pytest.mark.parametrize("sort", ["-last_updated", "created_at"])
+def test_cursor_paging_visits_every_question_once(db, sort):
+    ids = [f"q{i}" for i in range(7)]
+    for question_id in ids:
+        db.save_question({"id": question_id, "status": "started"})
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = db.list_questions(sort=sort, limit=3, cursor=cursor)
+        assert len(page) <= 3
+        seen.extend(question["id"] for question in page)
+        if cursor is None:
+            break
+
+    assert sorted(seen) == ids
+    values = [db.get_question(i)[sort.lstrip("-")] for i in seen]
+    assert values == sorted(values, reverse=sort.startswith("-"))
+
+
+def test_list_questions_filters_and_projects(db):
+    db.save_question({"id": "q1", "status": "started", "selected_categories": ["A"]})
+    db.save_question({"id": "q2", "status": "completed", "selected_categories": ["B"]})
+
+    page, cursor = db.list_questions(fields=["id", "status"], status="completed")
+    assert cursor is None
+    assert [q["id"] for q in page] == ["q2"]
+    assert "selected_categories" not in page[0]
+
+    page, _ = db.list_questions(category="A")
+    assert [q["id"] for q in page] == ["q1"]
+
+
+def test_journal_replay_skips_truncated_last_line(tmp_path):
+    path = tmp_path / "questions.json"
+    db = JsonDB(str(path), journal=True)
+    db.save_question({"id": "q1", "title": "a"})
+    db.update_question("q1", {"title": "b"})
+    # A crash while appending leaves a line without its newline
+    with open(journal_path(path), "a") as f:
+        f.write(json.dumps({"op": "update", "id": "q1", "fields": {"title": "c"}})[:20])
+
+    db = reopen(path, journal=True)
+    assert db.get_question("q1")["title"] == "b"
+    assert db.get_question("q1")["version"] == 2
+
+
+def test_journal_skips_corrupt_entries(tmp_path):
+    path = tmp_path / "questions.json"
+    db = JsonDB(str(path), journal=True)
+    db.save_question({"id": "q1", "title": "a"})
+    with open(journal_path(path), "a") as f:
+        f.write("not json\n")
+    db.save_question({"id": "q2", "title": "b"})
+
+    db = reopen(path, journal=True)
+    assert {q["id"] for q in db.get_all_questions()} == {"q1", "q2"}
+
+
+def test_journal_compaction_keeps_questions(tmp_path):
+    path = tmp_path / "questions.json"
+    db = JsonDB(str(path), journal=True)
+    db.save_question({"id": "q1", "title": "a"})
+    db.update_question_status("q1", "completed")
+    db.compact()
+
+    assert not journal_path(path).exists()
+    plain = reopen(path)
+    assert plain.get_question("q1")["status"] == "completed"
+
+
+def test_compressed_fields_are_unpacked_on_read(tmp_path, monkeypatch):
+    monkeypatch.setenv("COMPRESS_TEXT_FIELDS", "true")
+    path = tmp_path / "questions.json"
+    db = JsonDB(str(path), journal=True)
+    db.save_question({"id": "q1", "solution": "old", "formatted_text": "text"})
+    db.update_question("q1", {"solution": "new"})
+    db.compact()
+    assert "_packed" in json.loads(path.read_text())["questions"][0]
+
+    db = reopen(path, journal=True)
+    question = db.get_question("q1")
+    assert (question["solution"], question["formatted_text"]) == ("new", "text")
+    assert "_packed" not in question
+    page, _ = db.list_questions(fields=["id", "solution"])
+    assert page[0]["solution"] == "new"
+    assert "_packed" not in page[0]
@@ -0,0 +1,81 @@
+import pytest
+
+from utils import http_cache
+from utils.http_cache import HTTPCache, fetch_metadata
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    """Serves the responses queued per url and records the request headers"""
+    monkeypatch.setattr(
+        http_cache, "_cache", HTTPCache(str(tmp_path / "http_cache.sqlite3"))
+    )
+    responses, requests = {}, []
+
+    def fetch_pages(urls, handler, headers=None, **options):
+        results = []
+        for url in urls:
+            requests.append((url, headers(url) if headers else {}))
+            results.append(handler(url, responses[url].pop(0)))
+        return results
+
+    monkeypatch.setattr(http_cache, "fetch_pages", fetch_pages)
+    return responses, requests
+
+
+def parse(response):
+    return {"title": response.text} if response.status_code == 200 else None
+
+
+def test_fresh_entries_skip_the_network(server):
+    responses, requests = server
+    responses["https://a"] = [FakeResponse(200, "A")]
+    assert fetch_metadata(["https://a"], "title", parse) == [{"title": "A"}]
+    assert fetch_metadata(["https://a"], "title", parse) == [{"title": "A"}]
+    assert len(requests) == 1
+
+
+def test_stale_entries_are_revalidated(server):
+    responses, requests = server
+    responses["https://a"] = [
+        FakeResponse(200, "A", {"ETag": '"v1"', "Last-Modified": "yesterday"}),
+        FakeResponse(304),
+        FakeResponse(200, "B", {"ETag": '"v2"'}),
+    ]
+    fetch_metadata(["https://a"], "title", parse, ttl=0)
+
+    assert fetch_metadata(["https://a"], "title", parse, ttl=0) == [{"title": "A"}]
+    assert requests[1][1] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "yesterday",
+    }
+    assert fetch_metadata(["https://a"], "title", parse, ttl=0) == [{"title": "B"}]
+
+
+def test_unexpected_304_is_a_miss(server):
+    responses, _ = server
+    responses["https://a"] = [FakeResponse(304)]
+    assert fetch_metadata(["https://a"], "title", parse) == [None]
+
+
+def test_missing_pages_are_cached(server):
+    responses, requests = server
+    responses["https://gone"] = [FakeResponse(404)]
+    assert fetch_metadata(["https://gone"], "title", parse) == [None]
+    assert fetch_metadata(["https://gone"], "title", parse) == [None]
+    assert len(requests) == 1
+
+
+def test_search_results_expire(tmp_path):
+    cache = HTTPCache(str(tmp_path / "http_cache.sqlite3"))
+    cache.set_search("google", "two sum", ["https://a"], ttl=60)
+    assert cache.get_search("google", "two sum") == ["https://a"]
+    cache.set_search("google", "islands", ["https://b"], ttl=0)
+    assert cache.get_search("google", "islands") is None
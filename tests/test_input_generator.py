@@ -0,0 +1,62 @@
+import pytest
+
+from questions_py.types import Input, LeetcodeLevel, Metadata, Output, UnitTest
+from utils.input_generator import InputGenerator, parse_constraints, parse_number
+
+
+@pytest.mark.parametrize(
+    "text, value",
+    [
+        ("100,000", 100_000),
+        ("10^5", 100_000),
+        ("10⁵", 100_000),
+        ("2 * 10**5", 200_000),
+        ("1e6", 1_000_000),
+        ("-10^9", -1e9),
+    ],
+)
+def test_parse_number(text, value):
+    assert parse_number(text) == value
+
+
+def test_parse_constraints():
+    bounds = parse_constraints(
+        "1 <= len(sodas) <= 100,000; 0 < max_cans < 10^6; k <= 50; "
+        "-10^9 <= nums[i] <= 10^9"
+    )
+    assert bounds == {
+        "len(sodas)": (1, 100_000),
+        "max_cans": (1, 999_999),
+        "k": (None, 50),
+        "nums[i]": (-1e9, 1e9),
+    }
+
+
+def test_generated_inputs_follow_examples_and_bounds():
+    metadata = Metadata(
+        statement="",
+        approx_leetcode_level=LeetcodeLevel.EASY,
+        categories=[],
+        inputs=[
+            Input(
+                name="inventory",
+                description="",
+                constraints="1 <= len(inventory) <= 1000",
+            ),
+            Input(name="sold", description="", constraints="1 <= len(sold) <= 500"),
+        ],
+        output=Output(name="left", description=""),
+        unit_tests=[
+            UnitTest(input={"inventory": ["cola", "lime"], "sold": ["cola"]}, output=1)
+        ],
+        approx_time_spent_min=1,
+    )
+    generator = InputGenerator(metadata)
+    assert generator.max_sizes == {"inventory": 1000, "sold": 500}
+
+    generated = generator.generate(200, seed=1)
+    assert len(generated["inventory"]) == 200
+    assert len(generated["sold"]) == 100
+    # Sold items are drawn from the generated inventory, like in the example
+    assert set(generated["sold"]) <= set(generated["inventory"])
+    assert generator.generate(200, seed=1) == generated
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("pymongo")
+
+from scripts.migrate_to_mongodb import (  # noqa: E402
+    Checkpoint,
+    batched,
+    final_questions,
+    journal_changes,
+)
+from utils import db_utils  # noqa: E402
+from utils.db_utils import JsonDB, journal_path  # noqa: E402
+
+
+def test_final_questions_match_what_jsondb_reads(tmp_path, monkeypatch):
+    monkeypatch.setenv("COMPRESS_TEXT_FIELDS", "true")
+    path = tmp_path / "questions.json"
+    db = JsonDB(str(path), journal=True)
+    db.save_question({"id": "kept", "solution": "a"})
+    db.save_question({"id": "updated", "solution": "a", "title": "t"})
+    db.save_question({"id": "replaced", "solution": "a", "title": "t"})
+    db.compact()
+    db.update_question("updated", {"solution": "b"})
+    db.save_question({"id": "replaced", "solution": "c"})
+    db.update_question_status("kept", "completed")
+    db.save_question({"id": "new", "solution": "d"})
+    db.update_question_status("unknown", "completed")
+
+    db_utils._shared_stores.clear()
+    expected = JsonDB(str(path), journal=True).get_all_questions()
+    migrated = list(final_questions(path))
+    assert sorted(migrated, key=lambda q: q["id"]) == sorted(
+        expected, key=lambda q: q["id"]
+    )
+
+
+def test_journal_changes_stop_at_truncated_line(tmp_path):
+    path = tmp_path / "questions.json"
+    db = JsonDB(str(path), journal=True)
+    db.save_question({"id": "q1", "title": "a"})
+    with open(journal_path(path), "a") as f:
+        f.write('{"op": "update", "id": "q1", "fie')
+
+    changes = journal_changes(path)
+    assert changes["q1"]["record"]["title"] == "a"
+    assert changes["q1"]["fields"] == {}
+
+
+def test_checkpoint_only_applies_to_the_same_migration(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    Checkpoint(path, {"source": "a"}).save(uploaded=["q1"])
+    assert Checkpoint(path, {"source": "a"}).state == {"uploaded": ["q1"]}
+    assert Checkpoint(path, {"source": "b"}).state == {}
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
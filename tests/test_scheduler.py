@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.scheduler import Stage, StageScheduler, StageSkipped, topological_order
+
+
+def test_topological_order():
+    stages = [
+        Stage("review", None, after=("debug",)),
+        Stage("debug", None, after=("solve",)),
+        Stage("solve", None),
+    ]
+    assert [s.name for s in topological_order(stages)] == ["solve", "debug", "review"]
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [Stage("a", None, after=("b",)), Stage("b", None, after=("a",))],
+        [Stage("a", None, after=("missing",))],
+        [Stage("a", None), Stage("a", None)],
+        [Stage("a", None, kind="gpu")],
+    ],
+)
+def test_invalid_graphs(stages):
+    with pytest.raises(ValueError):
+        topological_order(stages)
+
+
+def test_failures_skip_dependent_stages_only():
+    async def generate(item):
+        if item == "bad":
+            raise RuntimeError("no question")
+        return f"{item} question"
+
+    def check(item):
+        return f"{item} checked"
+
+    async def solve(item):
+        return f"{item} solved"
+
+    scheduler = StageScheduler(
+        [
+            Stage("generate", generate),
+            Stage("check", check, kind="cpu", after=("generate",)),
+            Stage("solve", solve, after=("generate",)),
+        ]
+    )
+    good, bad = asyncio.run(scheduler.run(["good", "bad"]))
+
+    assert good == {
+        "generate": "good question",
+        "check": "good checked",
+        "solve": "good solved",
+    }
+    assert isinstance(bad["generate"], RuntimeError)
+    assert isinstance(bad["check"], StageSkipped)
+    assert isinstance(bad["solve"], StageSkipped)
+
+
+def test_stage_concurrency_and_pipelining():
+    peak = {"llm": 0, "cpu": 0}
+    overlap = []
+
+    async def llm(item):
+        peak["llm"] = max(peak["llm"], scheduler.running["llm"])
+        await asyncio.sleep(0.02)
+
+    def cpu(item):
+        peak["cpu"] = max(peak["cpu"], scheduler.running["cpu"])
+        overlap.append(scheduler.running["llm"])
+        time.sleep(0.02)
+
+    scheduler = StageScheduler(
+        [
+            Stage("llm", llm, concurrency=2),
+            Stage("cpu", cpu, kind="cpu", after=("llm",), concurrency=1),
+        ]
+    )
+    done = []
+    asyncio.run(scheduler.run(range(8), on_done=lambda item, _: done.append(item)))
+
+    assert peak == {"llm": 2, "cpu": 1}
+    # Later items were on the LLM stage while earlier ones were on the CPU one
+    assert any(overlap)
+    assert sorted(done) == list(range(8))
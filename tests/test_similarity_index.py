@@ -0,0 +1,94 @@
+import pytest
+
+from utils import similarity_index
+from utils.db_utils import JsonDB
+from utils.dedup import check_duplicate
+from utils.similarity_index import CHALLENGE_SOURCE, SimilarityIndex
+
+TWO_SUM = (
+    "Given an array of integers nums and an integer target, return the indices "
+    "of the two numbers such that they add up to target"
+)
+ISLANDS = "Count the islands in a grid of land and water cells"
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SimilarityIndex(str(tmp_path / "index.sqlite3"))
+    yield index
+    index.close()
+
+
+def test_query_ranks_near_duplicates_first(index):
+    index.add("two_sum", TWO_SUM)
+    index.add("islands", ISLANDS)
+
+    matches = index.query(TWO_SUM.replace("integers", "whole numbers"), k=2)
+    assert matches[0].question_id == "two_sum"
+    assert matches[0].score > 0.5
+    assert all(
+        m.question_id != "two_sum" for m in index.query(TWO_SUM, exclude="two_sum")
+    )
+
+
+def test_empty_texts_match_nothing(index):
+    index.add("empty", "")
+    index.add("islands", ISLANDS)
+    assert index.query("") == []
+    assert index.query(" ?! ") == []
+    assert [m.question_id for m in index.query(ISLANDS)] == ["islands"]
+
+
+def test_changes_by_another_connection_are_picked_up(tmp_path, index):
+    other = SimilarityIndex(str(tmp_path / "index.sqlite3"))
+    other.add("islands", ISLANDS)
+    assert [m.question_id for m in index.query(ISLANDS)] == ["islands"]
+    other.close()
+
+
+def test_rebuild_replaces_documents_and_keeps_concurrent_ones(tmp_path, index):
+    db = JsonDB(str(tmp_path / "questions.json"))
+    db.save_question({"id": "two_sum", "generated_question": TWO_SUM})
+    challenges = tmp_path / "final_challenges"
+    challenges.mkdir()
+    (challenges / "challenge_islands.py").write_text(
+        f"problem_statement = {ISLANDS!r}\n"
+    )
+    index.add("deleted", "A question that is no longer stored anywhere")
+
+    entries = index._entries
+
+    def add_during_rebuild(documents):
+        documents = list(documents)
+        if documents and documents[0][0] == "two_sum":
+            # The old index is still served while the new one is computed
+            assert [m.question_id for m in index.query("no longer stored")]
+            index.add("concurrent", "Saved while the rebuild was running")
+        return entries(documents)
+
+    index._entries = add_during_rebuild
+    assert index.rebuild(db, str(challenges)) == 2
+    assert index.built
+    assert sorted(index._keys) == [
+        "final_challenge:islands",
+        "question:concurrent",
+        "question:two_sum",
+    ]
+    assert index.query(ISLANDS)[0].source == CHALLENGE_SOURCE
+
+
+def test_check_duplicate_decisions(monkeypatch, index):
+    monkeypatch.setattr(similarity_index, "get_similarity_index", lambda: index)
+    index.add("two_sum", TWO_SUM)
+
+    duplicate = check_duplicate(TWO_SUM, threshold=0.5)
+    assert (duplicate["decision"], duplicate["similar_to"]) == ("duplicate", "two_sum")
+    assert check_duplicate(ISLANDS, threshold=0.5)["decision"] == "unique"
+
+    check_duplicate(ISLANDS, exclude="islands", register=True)
+    assert check_duplicate(ISLANDS)["similar_to"] == "islands"
+
+
+def test_check_duplicate_without_index(monkeypatch):
+    monkeypatch.setattr(similarity_index, "get_similarity_index", lambda: None)
+    assert check_duplicate(TWO_SUM)["decision"] == "unchecked"
@@ -0,0 +1,98 @@
+import sys
+
+import pytest
+
+from utils import solution_tester
+from utils.solution_tester import ResourceLimits, SolutionTester
+
+Outcome = solution_tester.TestOutcome
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="limits are enforced with fork and rlimits"
+)
+
+CHALLENGE = """
+import os
+import signal
+import time
+
+from questions_py.types import Input, LeetcodeLevel, Metadata, Output, UnitTest
+
+MODES = {modes!r}
+
+metadata = Metadata(
+    statement="",
+    approx_leetcode_level=LeetcodeLevel.EASY,
+    categories=[],
+    inputs=[Input(name="mode", description="", constraints="")],
+    output=Output(name="result", description=""),
+    unit_tests=[UnitTest(input={{"mode": mode}}, output="ok") for mode in MODES],
+    approx_time_spent_min=1,
+)
+
+
+def solution(mode):
+    if mode == "kill_worker":
+        os.kill(os.getppid(), signal.SIGKILL)
+        time.sleep(1)
+    if mode == "stop_worker":
+        os.kill(os.getppid(), signal.SIGSTOP)
+        time.sleep(30)
+    if mode == "exit":
+        os._exit(3)
+    if mode == "sleep":
+        time.sleep(30)
+    if mode == "spin":
+        while True:
+            pass
+    if mode == "allocate":
+        return len(bytearray(2 * 1024**3))
+    return "ok"
+"""
+
+
+def run(tmp_path, modes, **limits):
+    path = tmp_path / "challenge.py"
+    path.write_text(CHALLENGE.format(modes=modes))
+    limits = ResourceLimits(**{"suite_wall_time_sec": 60, **limits})
+    with SolutionTester.from_challenge_file(path, max_workers=2, limits=limits) as t:
+        return [r.outcome for r in t.run_all_tests(parallel=True)]
+
+
+def test_only_the_test_that_killed_its_worker_crashes(tmp_path):
+    modes = ["ok", "kill_worker", "ok", "ok", "exit", "ok"]
+    assert run(tmp_path, modes) == [
+        Outcome.PASSED,
+        Outcome.CRASHED,
+        Outcome.PASSED,
+        Outcome.PASSED,
+        Outcome.CRASHED,
+        Outcome.PASSED,
+    ]
+
+
+def test_timeouts_are_attributed_to_the_slow_tests(tmp_path):
+    modes = ["sleep", "ok", "spin", "stop_worker", "ok"]
+    outcomes = run(tmp_path, modes, wall_time_sec=1, cpu_time_sec=1)
+    assert outcomes[0] == Outcome.TIMEOUT
+    assert outcomes[1] == Outcome.PASSED
+    assert outcomes[2] in (Outcome.TIMEOUT, Outcome.CPU_LIMIT)
+    # A stopped worker is only caught by the parent's deadline
+    assert outcomes[3] == Outcome.TIMEOUT
+    assert outcomes[4] == Outcome.PASSED
+
+
+def test_cpu_limit_without_wall_limit(tmp_path):
+    outcomes = run(tmp_path, ["spin", "ok"], wall_time_sec=None, cpu_time_sec=1)
+    assert outcomes == [Outcome.CPU_LIMIT, Outcome.PASSED]
+
+
+def test_memory_limit(tmp_path):
+    outcomes = run(tmp_path, ["allocate", "ok"], memory_mb=256)
+    assert outcomes == [Outcome.MEMORY_LIMIT, Outcome.PASSED]
+
+
+def test_suite_budget_skips_queued_tests(tmp_path):
+    outcomes = run(tmp_path, ["sleep"] * 4, wall_time_sec=5, suite_wall_time_sec=1)
+    assert outcomes[:2] == [Outcome.TIMEOUT, Outcome.TIMEOUT]
+    assert outcomes[2:] == [Outcome.SKIPPED, Outcome.SKIPPED]
@@ -0,0 +1,82 @@
+import gc
+
+from utils.db_utils import JsonDB, VersionConflictError
+from utils.write_behind import WriteBehindQueue
+
+
+class FlakyDB:
+    """Backend whose first writes fail"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.writes = []
+
+    def update_question(self, question_id, fields):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("unreachable")
+        self.writes.append(dict(fields))
+        fields["version"] = len(self.writes)
+
+    save_question = update_question
+
+
+def test_coalesces_saves_and_chains_versions(tmp_path):
+    db = JsonDB(str(tmp_path / "questions.json"))
+    queue = WriteBehindQueue(delay=0.05)
+    queue.submit(db, "q1", {"id": "q1", "title": "a"}, full=True)
+    queue.submit(db, "q1", {"title": "b"})
+    queue.submit(db, "q1", {"status": "solving"})
+    assert queue.wait_for_durability(db, "q1", timeout=5)
+
+    question = db.get_question("q1")
+    assert (question["title"], question["status"]) == ("b", "solving")
+    assert question["version"] == queue.version(db, "q1") == 1
+
+    queue.submit(db, "q1", {"title": "c"})
+    assert queue.wait_for_durability(timeout=5)
+    assert db.get_question("q1")["version"] == queue.version(db, "q1") == 2
+
+
+def test_conflict_is_kept_until_forget(tmp_path):
+    db = JsonDB(str(tmp_path / "questions.json"))
+    db.save_question({"id": "q1"})
+    db.save_question({"id": "q1"})
+    queue = WriteBehindQueue(delay=0.01)
+    queue.submit(db, "q1", {"title": "b"}, version=1)
+    queue.wait_for_durability(timeout=5)
+
+    assert isinstance(queue.error(db, "q1"), VersionConflictError)
+    assert isinstance(queue.error(db, "q1"), VersionConflictError)
+    queue.forget(db, "q1")
+    assert queue.error(db, "q1") is None
+
+
+def test_failed_writes_are_retried():
+    db = FlakyDB(failures=2)
+    queue = WriteBehindQueue(delay=0.01, retries=3)
+    queue.submit(db, "q1", {"title": "a"})
+    queue.wait_for_durability(timeout=5)
+    assert [w["title"] for w in db.writes] == ["a"]
+    assert queue.error(db, "q1") is None
+
+
+def test_error_is_reported_once_after_last_retry():
+    db = FlakyDB(failures=10)
+    queue = WriteBehindQueue(delay=0.01, retries=1)
+    queue.submit(db, "q1", {"title": "a"})
+    queue.wait_for_durability(timeout=5)
+    assert isinstance(queue.error(db, "q1"), ConnectionError)
+    assert queue.error(db, "q1") is None
+
+
+def test_new_backend_does_not_inherit_state_of_a_collected_one():
+    queue = WriteBehindQueue(delay=0.01)
+    db = FlakyDB(failures=0)
+    queue.submit(db, "q1", {"title": "a"})
+    queue.wait_for_durability(timeout=5)
+    assert queue.version(db, "q1") == 1
+
+    del db
+    gc.collect()
+    assert queue.version(FlakyDB(failures=0), "q1") is None
@@ -0,0 +1,360 @@
+import asyncio
+import os
+import random
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import anthropic
+import openai
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from utils.llm_cache import get_llm_cache
+from utils.prompts import (
+    analyze_problem_similarity_request,
+    build_messages,
+    debug_solution_request,
+    format_solution_request,
+    generate_question_request,
+    refine_problem_request,
+    review_solution_request,
+    solve_problem_request,
+    validate_unit_tests_request,
+)
+
+
+def _parse_rpm_limits(value: str) -> Dict[str, int]:
+    """Parse LLM_RPM_LIMITS, e.g. "gpt-4o=500,o3-mini=100" """
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            model, rpm = item.split("=", 1)
+            limits[model.strip()] = int(rpm)
+    return limits
+
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+RPM_LIMITS = _parse_rpm_limits(os.getenv("LLM_RPM_LIMITS", ""))
+
+# Errors _call retries. A rate limit pauses the model for every caller, the
+# others (connection errors, timeouts and 5xx responses) only the request.
+RATE_LIMIT_ERRORS = (openai.RateLimitError, anthropic.RateLimitError)
+TRANSIENT_ERRORS = (
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    anthropic.APIConnectionError,
+    anthropic.InternalServerError,
+)
+
+
+class RateLimiter:
+    """
+    Sliding-window requests-per-minute limiter for a single model.
+
+    A 429 from the API pauses the model for every caller (see backoff), not
+    just the request that hit it, so the rest of the batch doesn't pile on.
+    """
+
+    def __init__(self, rpm: Optional[int] = None):
+        self.rpm = rpm
+        self._sent = deque()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if self.rpm:
+                    while self._sent and now - self._sent[0] >= 60:
+                        self._sent.popleft()
+                    if len(self._sent) >= self.rpm:
+                        wait = max(wait, 60 - (now - self._sent[0]))
+                if wait <= 0:
+                    self._sent.append(now)
+                    return
+                await asyncio.sleep(wait)
+
+    def backoff(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class _LoopState:
+    """Clients and limits shared by every coroutine on one event loop"""
+
+    def __init__(self):
+        # max_retries=0: failures are retried in _call, where a rate limit
+        # pauses every caller
+        self.openai = AsyncOpenAI(max_retries=0)
+        self._anthropic = None
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        self.limiters: Dict[str, RateLimiter] = {}
+
+    @property
+    def anthropic(self) -> AsyncAnthropic:
+        if self._anthropic is None:
+            self._anthropic = AsyncAnthropic(max_retries=0)
+        return self._anthropic
+
+    def limiter(self, model: str) -> RateLimiter:
+        if model not in self.limiters:
+            self.limiters[model] = RateLimiter(RPM_LIMITS.get(model))
+        return self.limiters[model]
+
+
+# asyncio primitives and httpx connection pools are bound to the loop they
+# were created on, so keep one set per running loop
+_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    if loop not in _states:
+        _states[loop] = _LoopState()
+    return _states[loop]
+
+
+def get_async_openai() -> AsyncOpenAI:
+    """Return the pooled AsyncOpenAI client of the running event loop"""
+    return _state().openai
+
+
+def _retry_after(error: Exception, attempt: int) -> float:
+    """Seconds to wait after a 429, preferring the server's Retry-After"""
+    try:
+        return float(error.response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return min(2**attempt, 60) + random.random()
+
+
+async def _call(model: str, request):
+    """
+    Run request() under the global semaphore and the model's rate limit,
+    retrying RATE_LIMIT_ERRORS and TRANSIENT_ERRORS
+    """
+    state = _state()
+    limiter = state.limiter(model)
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire()
+        async with state.semaphore:
+            try:
+                return await request()
+            except RATE_LIMIT_ERRORS as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                limiter.backoff(_retry_after(e, attempt))
+                continue
+            except TRANSIENT_ERRORS:
+                if attempt == MAX_RETRIES:
+                    raise
+        # Waited outside the semaphore so other requests can go on meanwhile
+        await asyncio.sleep(min(2**attempt, 60) + random.random())
+
+
+async def aquery_openai(
+    _client: Optional[AsyncOpenAI] = None,
+    prompt: str = "",
+    system_message: Optional[str] = None,
+    temperature: float = 0.8,
+    max_tokens: Optional[int] = None,
+    model: str = "gpt-4",
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Async version of query_openai.
+
+    Requests share one pooled client per event loop (unless _client is given),
+    at most LLM_MAX_CONCURRENCY of them are in flight at once and each model is
+    held to its LLM_RPM_LIMITS entry. Rate-limited requests, connection errors,
+    timeouts and server errors are retried up to LLM_MAX_RETRIES times.
+    """
+    client = _client or get_async_openai()
+
+    cache = get_llm_cache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = cache.make_key(model, prompt, temperature, system_message)
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return {"generated_text": cached, "status": "success"}
+
+    try:
+        response = await _call(
+            model,
+            lambda: client.chat.completions.create(
+                model=model,
+                messages=build_messages(prompt, system_message),
+                temperature=temperature,
+                max_completion_tokens=None,
+            ),
+        )
+        generated_text = response.choices[0].message.content
+        if cache and generated_text:
+            await asyncio.to_thread(cache.set, cache_key, model, generated_text)
+        return {
+            "generated_text": generated_text,
+            "status": "success",
+        }
+    except Exception as e:
+        print(e)
+        return {"generated_text": str(e), "status": "error"}
+
+
+async def aquery_anthropic(
+    prompt: str,
+    system_message: Optional[str] = None,
+    temperature: float = 0.8,
+    max_tokens: Optional[int] = None,
+    model: str = "claude-3-5-sonnet-20241022",
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """Async version of query_anthropic, see aquery_openai"""
+    cache = get_llm_cache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = cache.make_key(model, prompt, temperature, system_message)
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return {"generated_text": cached, "status": "success"}
+
+    client = _state().anthropic
+    request = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens or 4096,
+    }
+    if system_message:
+        request["system"] = system_message
+
+    try:
+        response = await _call(model, lambda: client.messages.create(**request))
+        generated_text = "".join(
+            block.text for block in response.content if block.type == "text"
+        )
+        if cache and generated_text:
+            await asyncio.to_thread(cache.set, cache_key, model, generated_text)
+        return {
+            "generated_text": generated_text,
+            "status": "success",
+        }
+    except Exception as e:
+        print(e)
+        return {"generated_text": str(e), "status": "error"}
+
+
+async def agenerate_question(
+    _client: Optional[AsyncOpenAI], categories: List[str], selected_theme: str
+) -> Dict[str, Any]:
+    """Async version of generate_question"""
+    return await aquery_openai(
+        _client, **generate_question_request(categories, selected_theme)
+    )
+
+
+async def avalidate_unit_tests(
+    _client: Optional[AsyncOpenAI],
+    question_text: str,
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> Dict[str, Any]:
+    """Async version of validate_unit_tests"""
+    if not question_text:
+        return {"generated_text": "Invalid input", "status": "error"}
+
+    return await aquery_openai(
+        _client, **validate_unit_tests_request(question_text, model, temperature)
+    )
+
+
+async def asolve_problem(
+    _client: Optional[AsyncOpenAI], problem_statement: str, model: str = "o3-mini"
+) -> Dict[str, Any]:
+    """Async version of solve_problem"""
+    return await aquery_openai(
+        _client, **solve_problem_request(problem_statement, model)
+    )
+
+
+async def aformat_solution(
+    _client: Optional[AsyncOpenAI], solution_response: str
+) -> Dict[str, Any]:
+    """Async version of format_solution"""
+    return await aquery_openai(_client, **format_solution_request(solution_response))
+
+
+async def adebug_solution(
+    _client: Optional[AsyncOpenAI],
+    solution: str,
+    failed_tests: str,
+    model: str = "o3-mini",
+    temperature: float = 1,
+) -> Dict[str, Any]:
+    """Async version of debug_solution"""
+    return await aquery_openai(
+        _client,
+        **debug_solution_request(solution, failed_tests, model, temperature),
+    )
+
+
+async def aget_completion(
+    _client: Optional[AsyncOpenAI],
+    prompt: str,
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> Dict[str, Any]:
+    """Async version of get_completion"""
+    return await aquery_openai(
+        _client=_client, prompt=prompt, model=model, temperature=temperature
+    )
+
+
+async def areview_solution(
+    _client: Optional[AsyncOpenAI],
+    solution_text: str,
+    selected_theme: str,
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> Dict[str, Any]:
+    """Async version of review_solution"""
+    return await aquery_openai(
+        _client,
+        **review_solution_request(solution_text, selected_theme, model, temperature),
+    )
+
+
+async def aanalyze_problem_similarity(
+    _client: Optional[AsyncOpenAI],
+    original_problem: str,
+    found_problems: List[str],
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> Dict[str, Any]:
+    """Async version of analyze_problem_similarity"""
+    return await aquery_openai(
+        _client,
+        **analyze_problem_similarity_request(
+            original_problem, found_problems, model, temperature
+        ),
+    )
+
+
+async def arefine_problem(
+    _client: Optional[AsyncOpenAI],
+    problem_text: str,
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> Dict[str, Any]:
+    """Async version of refine_problem"""
+    if not problem_text:
+        return {"generated_text": "Invalid input", "status": "error"}
+
+    return await aquery_openai(
+        _client, **refine_problem_request(problem_text, model, temperature)
+    )
@@ -0,0 +1,272 @@
+import math
+import time
+import tracemalloc
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.input_generator import InputGenerator
+from utils.solution_tester import (
+    CPUTimeExceeded,
+    SolutionTester,
+    TimeoutException,
+    cpu_limit,
+    get_worker_context,
+    memory_limit,
+    timeout,
+)
+
+COMPLEXITY_CLASSES: Dict[str, Callable[[float], float]] = {
+    "O(1)": lambda n: 1.0,
+    "O(log n)": lambda n: math.log2(n),
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * math.log2(n),
+    "O(n^2)": lambda n: n**2,
+    "O(n^3)": lambda n: n**3,
+    "O(2^n)": lambda n: 2.0**n,
+}
+
+# Exponential fits are only meaningful (and representable) for tiny inputs
+_MAX_EXPONENTIAL_SIZE = 64
+
+
+@dataclass
+class ProfileSample:
+    size: int
+    seconds: float
+    peak_memory_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ComplexityProfile:
+    time_complexity: str
+    space_complexity: str
+    samples: List[ProfileSample] = field(default_factory=list)
+    message: str = ""
+
+
+def fit_complexity(sizes: List[int], values: List[float]) -> Tuple[str, float]:
+    """
+    Pick the complexity class that best explains how values grow with sizes.
+
+    Each class f is fitted as value = a + b * f(n) with b >= 0 by least squares
+    on values normalized to [0, 1]. Neighbouring classes such as O(n) and
+    O(n log n) are hard to tell apart on noisy timings, so a more complex class
+    only wins if it at least halves the residual of the simpler one.
+
+    Returns:
+        Tuple of (class name, residual sum of squares)
+    """
+    scale = max(values) or 1.0
+    ys = [v / scale for v in values]
+    best = ("O(1)", math.inf)
+    for name, func in COMPLEXITY_CLASSES.items():
+        if name == "O(2^n)" and max(sizes) > _MAX_EXPONENTIAL_SIZE:
+            continue
+        xs = [func(max(n, 2)) for n in sizes]
+        x_mean = sum(xs) / len(xs)
+        y_mean = sum(ys) / len(ys)
+        var = sum((x - x_mean) ** 2 for x in xs)
+        slope = (
+            sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / var
+            if var
+            else 0.0
+        )
+        slope = max(slope, 0.0)
+        intercept = y_mean - slope * x_mean
+        residual = sum((y - intercept - slope * x) ** 2 for x, y in zip(xs, ys))
+        # Classes are ordered simplest first
+        if residual < best[1] * 0.5:
+            best = (name, residual)
+    return best
+
+
+# Input generator built lazily once per worker process
+_worker_generator: Optional[InputGenerator] = None
+
+
+def _measure_in_worker(
+    size: int, seed: int, repeats: int, run_budget_sec: float
+) -> ProfileSample:
+    """Time and memory-profile the solution on one synthesized input size"""
+    global _worker_generator
+    solution_func, metadata, limits = get_worker_context()
+    if _worker_generator is None:
+        _worker_generator = InputGenerator(metadata)
+
+    # The memory budget is measured from what the worker holds right now
+    with memory_limit(limits.memory_mb):
+        try:
+            best = math.inf
+            for repeat in range(repeats):
+                # Fresh inputs per run since solutions may mutate their arguments
+                inputs = _worker_generator.generate(size, seed=seed + repeat)
+                start = time.perf_counter()
+                with timeout(limits.wall_time_sec), cpu_limit(limits.cpu_time_sec):
+                    solution_func(**inputs)
+                elapsed = time.perf_counter() - start
+                best = min(best, elapsed)
+                # Repeats only smooth out noise on very short runs
+                if elapsed > 0.1:
+                    break
+
+            # tracemalloc slows the solution down several times, so skip the
+            # memory run once the timed run is already over budget
+            if best > run_budget_sec:
+                return ProfileSample(size=size, seconds=best)
+
+            inputs = _worker_generator.generate(size, seed=seed)
+            memory_timeout = max(best * 20, 1.0)
+            if limits.wall_time_sec is not None:
+                memory_timeout = min(memory_timeout, limits.wall_time_sec)
+            tracemalloc.start()
+            try:
+                with timeout(memory_timeout), cpu_limit(limits.cpu_time_sec):
+                    solution_func(**inputs)
+                _, peak = tracemalloc.get_traced_memory()
+            except TimeoutException:
+                # Allocation-heavy solutions can be too slow to trace, keep
+                # the timing
+                return ProfileSample(size=size, seconds=best)
+            finally:
+                tracemalloc.stop()
+            return ProfileSample(size=size, seconds=best, peak_memory_bytes=peak)
+        except TimeoutException:
+            error = f"timed out after {limits.wall_time_sec} seconds"
+        except CPUTimeExceeded:
+            error = f"exceeded the CPU budget of {limits.cpu_time_sec} seconds"
+        except MemoryError:
+            error = f"exceeded the memory budget of {limits.memory_mb} MB"
+        except Exception as e:
+            error = f"failed with error: {e}"
+        return ProfileSample(size=size, seconds=math.inf, error=error)
+
+
+def profile_complexity(
+    tester: SolutionTester,
+    min_size: int = 16,
+    max_size: Optional[int] = None,
+    growth: float = 2.0,
+    run_budget_sec: float = 1.0,
+    total_budget_sec: float = 20.0,
+    repeats: int = 3,
+) -> ComplexityProfile:
+    """
+    Estimate the time and space complexity of a solution empirically.
+
+    Inputs of geometrically growing size are synthesized from the challenge
+    metadata (see InputGenerator) and the solution is timed and memory-profiled
+    on each size in a worker process, under the tester's resource limits.
+    Growth stops at the largest size allowed by the input constraints, once a
+    single run takes longer than run_budget_sec, or when total_budget_sec is
+    spent.
+
+    Args:
+        tester: Tester whose solution should be profiled (needs metadata)
+        min_size: Size of the largest argument for the first measurement
+        max_size: Upper bound on the input size (defaults to the constraints)
+        growth: Factor between consecutive sizes
+        run_budget_sec: Stop growing once a run takes longer than this
+        total_budget_sec: Overall time budget for the profile
+        repeats: Timed runs per size (the fastest one is kept)
+
+    Returns:
+        ComplexityProfile with the estimated classes and raw samples
+    """
+    if tester.metadata is None:
+        return ComplexityProfile(
+            time_complexity="unknown",
+            space_complexity="unknown",
+            message="Challenge metadata is required to synthesize inputs",
+        )
+
+    try:
+        generator = InputGenerator(tester.metadata)
+    except ValueError as e:
+        return ComplexityProfile(
+            time_complexity="unknown",
+            space_complexity="unknown",
+            message=f"Could not synthesize inputs: {e}",
+        )
+
+    max_size = max_size or generator.max_size
+    if not max_size:
+        return ComplexityProfile(
+            time_complexity="O(1)",
+            space_complexity="O(1)",
+            message="The solution takes no sized inputs",
+        )
+
+    # Signal-based limits can't interrupt native code, so give up on a sample
+    # once all of its runs could have hit the wall-clock limit
+    per_run = tester.limits.wall_time_sec or run_budget_sec
+    sample_backstop = (repeats + 1) * (per_run + 1.0) + 5.0
+
+    samples: List[ProfileSample] = []
+    message = ""
+    start = time.time()
+    size = min(min_size, max_size)
+    while True:
+        future = tester.submit(
+            _measure_in_worker, size, len(samples), repeats, run_budget_sec
+        )
+        wait_sec = max(total_budget_sec - (time.time() - start), 0) + sample_backstop
+        try:
+            sample = future.result(timeout=wait_sec)
+        except FutureTimeout:
+            tester.terminate()
+            message = (
+                f"Stopped at n={size}: the solution didn't finish within "
+                f"{wait_sec:.0f}s"
+            )
+            break
+        except BrokenProcessPool:
+            # A broken pool can't take new work, start fresh on the next run
+            tester.close()
+            message = (
+                f"Stopped at n={size}: the worker process died (killed by a "
+                "resource limit or crashed)"
+            )
+            break
+        if sample.error:
+            message = f"Stopped at n={size}: {sample.error}"
+            break
+        samples.append(sample)
+        if sample.seconds > run_budget_sec:
+            message = f"Stopped at n={size}: a single run took {sample.seconds:.2f}s"
+            break
+        if time.time() - start > total_budget_sec:
+            message = f"Stopped at n={size}: profiling budget exhausted"
+            break
+        if size >= max_size:
+            message = f"Reached the maximum input size n={max_size}"
+            break
+        size = min(max(int(size * growth), size + 1), max_size)
+
+    # Time and space are fitted separately: tracemalloc is skipped on runs
+    # that are already over budget, so there can be fewer memory samples
+    memory_samples = [s for s in samples if s.peak_memory_bytes is not None]
+    time_complexity = space_complexity = "unknown"
+    if len(samples) >= 4:
+        time_complexity, _ = fit_complexity(
+            [s.size for s in samples], [s.seconds for s in samples]
+        )
+    if len(memory_samples) >= 4:
+        space_complexity, _ = fit_complexity(
+            [s.size for s in memory_samples],
+            [float(s.peak_memory_bytes) for s in memory_samples],
+        )
+    if len(memory_samples) < 4:
+        message += (
+            " (not enough samples to fit a complexity class)"
+            if len(samples) < 4
+            else " (not enough memory samples to fit the space complexity)"
+        )
+    return ComplexityProfile(
+        time_complexity=time_complexity,
+        space_complexity=space_complexity,
+        samples=samples,
+        message=message,
+    )
@@ -1,3 +1,6 @@
+import time
+from typing import Any, Dict, Generator
+
 import streamlit as st
 
 
@@ -30,3 +33,32 @@ def card(content: str, key: str = None):
 
     st.markdown(styles, unsafe_allow_html=True)
     st.markdown(f'<div class="stCard">{content}</div>', unsafe_allow_html=True)
+
+
+def render_stream(
+    stream: Generator[str, None, Dict[str, Any]], update_interval: float = 0.1
+) -> Dict[str, Any]:
+    """
+    Render a streaming LLM response as it arrives and return the final result.
+
+    The placeholder is redrawn at most every update_interval seconds so long
+    responses don't flood the browser with rerenders, and is cleared once the
+    stream ends so the page can show the final (e.g. formatted) version.
+    """
+    placeholder = st.empty()
+    text = ""
+    last_update = 0.0
+    try:
+        while True:
+            try:
+                text += next(stream)
+            except StopIteration as done:
+                return done.value
+            now = time.monotonic()
+            if now - last_update >= update_interval:
+                placeholder.markdown(text + "▌")
+                last_update = now
+    finally:
+        # Stops the underlying request if the script is interrupted mid-stream
+        stream.close()
+        placeholder.empty()
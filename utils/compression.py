@@ -0,0 +1,74 @@
+import base64
+import json
+import os
+import zlib
+from typing import Dict, Iterable, Optional
+
+# Large text fields of a question record. They are mostly copies of each other
+# (the question before and after refining, the solution before and after
+# formatting), and neighbours in this order are the most alike.
+TEXT_FIELDS = (
+    "generated_text",
+    "generated_question",
+    "solution_text",
+    "solution",
+    "formatted_text",
+    "saved_solution",
+)
+# Field holding the compressed text fields of a stored record
+PACKED_FIELD = "_packed"
+
+
+def compression_enabled() -> bool:
+    """Whether new writes compress text fields (COMPRESS_TEXT_FIELDS, opt-in)"""
+    return os.getenv("COMPRESS_TEXT_FIELDS", "false").lower() == "true"
+
+
+def pack_fields(record: Dict, binary: bool = False) -> Dict:
+    """
+    Copy of record with its text fields moved into one compressed blob.
+
+    The fields are compressed together in TEXT_FIELDS order, so each one is
+    stored as a delta against the fields before it (zlib's 32KB window spans
+    the neighbouring fields). A blob the record already holds is merged with
+    its plain text fields. Records without plain text fields, or with
+    compression disabled, are returned unchanged.
+
+    Args:
+        record: Question record or a subset of its fields
+        binary: Store the blob as bytes (for MongoDB) instead of base64 text
+    """
+    texts = {f: record[f] for f in TEXT_FIELDS if isinstance(record.get(f), str)}
+    if not texts or not compression_enabled():
+        return record
+    if PACKED_FIELD in record:
+        record = unpack_fields(record)
+        texts = {f: record[f] for f in TEXT_FIELDS if isinstance(record.get(f), str)}
+    data = zlib.compress(json.dumps(texts).encode(), 6)
+    packed = {k: v for k, v in record.items() if k not in texts}
+    packed[PACKED_FIELD] = data if binary else base64.b64encode(data).decode()
+    return packed
+
+
+def unpack_fields(record: Dict, fields: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Inverse of pack_fields.
+
+    Args:
+        record: Stored record
+        fields: Fields the caller reads, the blob is only decompressed if one
+            of them is a text field (default: all fields)
+    """
+    if PACKED_FIELD not in record:
+        return record
+    unpacked = {k: v for k, v in record.items() if k != PACKED_FIELD}
+    if fields is not None and not any(f in TEXT_FIELDS for f in fields):
+        return unpacked
+    data = record[PACKED_FIELD]
+    if isinstance(data, str):
+        data = base64.b64decode(data)
+    for field, text in json.loads(zlib.decompress(data)).items():
+        # Plain fields were written after the blob (e.g. with compression
+        # turned off since), so they win
+        unpacked.setdefault(field, text)
+    return unpacked
@@ -1,14 +1,540 @@
+import base64
+import bisect
 import json
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import copy
 import uuid
+import os
+import threading
+
+from utils.compression import pack_fields, unpack_fields
+from utils.dedup import index_saved_question
+
+try:
+    import fcntl
+except ImportError:  # Windows, only in-process locking
+    fcntl = None
+
+
+def _atomic_write_text(path: Path, text: str):
+    """Replace path with text without ever leaving a truncated file behind"""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _dump_questions(questions: List[Dict]) -> str:
+    """Serialize a JsonDB file, compressing the text fields of each record"""
+    return json.dumps({"questions": [pack_fields(q) for q in questions]}, indent=2)
+
+
+def _load_questions(text: str) -> List[Dict]:
+    """
+    Parse a JsonDB file written by _dump_questions.
+
+    Records keep their text fields packed until they are read (see
+    _unpacked), so loading a large file doesn't decompress every question.
+    """
+    return json.loads(text)["questions"]
+
+
+def _unpacked(record: Dict) -> Dict:
+    """Copy of a cached record with its text fields unpacked for the caller"""
+    return dict(unpack_fields(record))
+
+
+def journal_path(snapshot_path: Path) -> Path:
+    """Path of the change log kept next to a journaled JsonDB file"""
+    return snapshot_path.with_name(f"{snapshot_path.stem}.journal.jsonl")
+
+
+_QUESTIONS_START = re.compile(r'"questions"\s*:\s*\[')
+
+
+def iter_json_questions(
+    json_path: Union[str, Path], chunk_size: int = 1 << 16
+) -> Iterator[Dict]:
+    """
+    Stream the questions of a JsonDB file one at a time.
+
+    The file is read in chunks and only the question being decoded is kept in
+    memory, so arbitrarily large files can be migrated. Journal entries are not
+    included (see journal_path).
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, "r") as f:
+        buffer = ""
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            match = _QUESTIONS_START.search(buffer)
+            if match:
+                buffer = buffer[match.end() :]
+                break
+            if not chunk:
+                return
+
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if buffer[position : position + 1] == "]":
+                return
+            try:
+                question, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The next question continues past the end of the buffer
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise ValueError(f"{json_path} ends in the middle of a question")
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield unpack_fields(question)
+
+
+# Fields returned by list_questions by default, enough to draw a history row
+SUMMARY_FIELDS = [
+    "id",
+    "status",
+    "created_at",
+    "last_updated",
+    "selected_categories",
+    "selected_theme",
+]
+# Fields list_questions can sort on, prefix with "-" for descending
+SORT_FIELDS = ("last_updated", "created_at")
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split a sort spec such as "-last_updated" into (field, descending)"""
+    field = sort.lstrip("-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Cannot sort on {field}, choose from {SORT_FIELDS}")
+    return field, sort.startswith("-")
+
+
+def encode_cursor(value: Any, question_id: str) -> str:
+    """Opaque keyset cursor pointing just past a (sort value, id) pair"""
+    if isinstance(value, datetime):
+        payload = {"v": value.isoformat(), "t": "datetime", "id": question_id}
+    else:
+        payload = {"v": value, "id": question_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Inverse of encode_cursor"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = payload["v"]
+        if payload.get("t") == "datetime":
+            value = datetime.fromisoformat(value)
+        return value, payload["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def projected_fields(fields: Optional[Iterable[str]], sort_field: str) -> List[str]:
+    """Requested fields plus the ones keyset pagination needs"""
+    fields = list(fields or SUMMARY_FIELDS)
+    for required in ("id", sort_field):
+        if required not in fields:
+            fields.append(required)
+    return fields
+
+
+def status_from_flags(flags) -> str:
+    """Determine progress status from the completion flags of a question"""
+    if flags.get("review_completed"):
+        return "completed"
+    elif flags.get("debug_completed"):
+        return "reviewing"
+    elif flags.get("format_completed"):
+        return "debugging"
+    elif flags.get("solve_completed"):
+        return "formatting"
+    elif flags.get("generate_completed"):
+        return "solving"
+    else:
+        return "started"
+
+
+class VersionConflictError(Exception):
+    """Raised when a record was saved by someone else since it was read"""
+
+    def __init__(self, question_id: str, expected_version, current_version):
+        super().__init__(
+            f"Question {question_id} is at version {current_version}, "
+            f"expected version {expected_version}"
+        )
+        self.question_id = question_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def check_version(question_id: str, expected_version, stored: Optional[Dict]) -> int:
+    """
+    Optimistic concurrency check shared by the backends.
+
+    Saves carry the version of the record they were based on in its "version"
+    field. A save without a version (new questions, scripts) always goes
+    through; otherwise it must match the stored version.
+
+    Returns:
+        The version the record gets when saved
+    """
+    current_version = (stored or {}).get("version")
+    if expected_version is not None and stored is not None:
+        if expected_version != current_version:
+            raise VersionConflictError(question_id, expected_version, current_version)
+    return (current_version or 0) + 1
+
+
+class _FileLock:
+    """
+    Reentrant lock that excludes other threads and other processes.
+
+    Other processes are excluded with flock on a lock file next to the
+    database, so it also works for containers sharing the data volume.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._file = open(self.path, "a")
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+class _RecordIndex:
+    """
+    In-memory question index: id -> record, plus status and recency indexes.
+
+    Records are treated as immutable; changes replace the whole record.
+    """
+
+    def __init__(self, questions: Optional[List[Dict]] = None):
+        self.records: Dict[str, Dict] = {}
+        self.by_status: Dict[Optional[str], Dict[str, None]] = {}
+        self._sorted: Dict[str, Tuple[List[Tuple[str, str]], List[Dict]]] = {}
+        for question in questions or []:
+            if "id" in question:
+                self.put(question)
+
+    def put(self, record: Dict):
+        previous = self.records.get(record["id"])
+        if previous is not None:
+            self.by_status.get(previous.get("status"), {}).pop(record["id"], None)
+        self.records[record["id"]] = record
+        # Dicts double as insertion-ordered sets
+        self.by_status.setdefault(record.get("status"), {})[record["id"]] = None
+        self._sorted.clear()
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        return self.records.get(question_id)
+
+    def all(self) -> List[Dict]:
+        return list(self.records.values())
+
+    def with_status(self, status: str) -> List[Dict]:
+        return [self.records[i] for i in self.by_status.get(status, {})]
+
+    def sorted_by(self, field: str) -> Tuple[List[Tuple[str, str]], List[Dict]]:
+        """
+        Records in ascending (field, id) order, with their sort keys for
+        bisecting. Cached until the next change.
+        """
+        if field not in self._sorted:
+            records = sorted(
+                self.records.values(),
+                key=lambda q: (str(q.get(field) or ""), q["id"]),
+            )
+            keys = [(str(q.get(field) or ""), q["id"]) for q in records]
+            self._sorted[field] = (keys, records)
+        return self._sorted[field]
+
+    def by_last_updated(self) -> List[Dict]:
+        """Records sorted most recently updated first"""
+        return self.sorted_by("last_updated")[1][::-1]
+
+
+class _Snapshot:
+    """
+    Process-wide read cache of a JsonDB file.
+
+    The parsed file is kept in a _RecordIndex and shared by every JsonDB on
+    the same path, i.e. by every Streamlit session. Each read stats the file
+    and only re-parses it when its mtime, size or inode changed, so writes by
+    other processes are still picked up.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.index = _RecordIndex()
+        self._signature = None
+        self.lock = _FileLock(path.with_name(f"{path.name}.lock"))
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def current(self) -> _RecordIndex:
+        with self.lock:
+            signature = self._stat_signature()
+            if signature != self._signature:
+                self.index = _RecordIndex(_load_questions(self.path.read_text()))
+                self._signature = signature
+            return self.index
+
+    def write(self, questions: List[Dict]):
+        """Write questions to the file and adopt them as the cached index"""
+        with self.lock:
+            _atomic_write_text(self.path, _dump_questions(questions))
+            self.index = _RecordIndex(questions)
+            self._signature = self._stat_signature()
+
+
+class _Journal:
+    """
+    Append-only change log on top of a JsonDB snapshot file.
+
+    Every change is appended to the log as one JSON line and applied to an
+    in-memory index, so writes cost O(record size), or O(changed fields) for
+    partial updates. The log is replayed over the snapshot on open, and folded
+    back into the snapshot once it grows past compact_min_bytes and
+    compact_ratio times the snapshot size. Replaying is idempotent (upserts
+    carry the full record, updates and status changes the new values), so a
+    crash at any point only loses a partially written last line.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        compact_min_bytes: int = 1024 * 1024,
+        compact_ratio: float = 1.0,
+    ):
+        self.snapshot_path = snapshot_path
+        self.log_path = journal_path(snapshot_path)
+        self.compact_min_bytes = compact_min_bytes
+        self.compact_ratio = compact_ratio
+        self.index = _RecordIndex()
+        self.lock = _FileLock(snapshot_path.with_name(f"{snapshot_path.name}.lock"))
+        self._snapshot_signature = None
+        self._log_offset = 0
+        self._log_inode = None
+        self._compaction: Optional[threading.Thread] = None
+        self.load()
+
+    def _apply(self, entry: Dict):
+        if entry.get("op") == "upsert":
+            self.index.put(entry["record"])
+        elif entry.get("op") == "update":
+            # The stored blob stays packed, the updated text fields are kept
+            # next to it and take precedence over it (see unpack_fields)
+            self.index.put(
+                {
+                    **self.index.records.get(entry["id"], {}),
+                    **unpack_fields(entry["fields"]),
+                    "id": entry["id"],
+                }
+            )
+        elif entry.get("op") == "status" and entry["id"] in self.index.records:
+            # Records are replaced rather than mutated so snapshots taken for
+            # compaction stay consistent
+            self.index.put(
+                {
+                    **self.index.records[entry["id"]],
+                    "status": entry["status"],
+                    "last_updated": entry["last_updated"],
+                    "version": entry.get("version"),
+                }
+            )
+
+    def _replay(self, offset: int = 0) -> int:
+        """Apply the complete lines of the log from offset, returning the new offset"""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return offset
+        # A trailing line without a newline was cut short by a crash
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError):
+                print(f"Skipping corrupt journal entry in {self.log_path}")
+        return offset + end
+
+    def _stat_signature(self, path: Path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def load(self):
+        """Rebuild the index from the snapshot and the log"""
+        with self.lock:
+            self._snapshot_signature = self._stat_signature(self.snapshot_path)
+            self.index = _RecordIndex(_load_questions(self.snapshot_path.read_text()))
+            self._log_inode = (self._stat_signature(self.log_path) or [None])[-1]
+            self._log_offset = self._replay()
+
+    def refresh(self):
+        """Apply entries appended by other processes since the last read"""
+        with self.lock:
+            if self._stat_signature(self.snapshot_path) != self._snapshot_signature:
+                # Another process compacted the log
+                self.load()
+                return
+            inode = (self._stat_signature(self.log_path) or [None])[-1]
+            if inode is None:
+                return
+            if inode != self._log_inode:
+                if self._log_inode is not None:
+                    self.load()
+                    return
+                # A new log started after the last compaction
+                self._log_inode = inode
+                self._log_offset = 0
+            self._log_offset = self._replay(self._log_offset)
+
+    def append(self, entry: Dict):
+        """Durably append an entry and apply it"""
+        # Text fields are compressed on their own in every entry, so replaying
+        # an entry never needs the ones before it
+        if "record" in entry:
+            entry = {**entry, "record": pack_fields(entry["record"])}
+        if "fields" in entry:
+            entry = {**entry, "fields": pack_fields(entry["fields"])}
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            self.refresh()
+            with open(self.log_path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.refresh()
+            if self._should_compact():
+                self._compaction = threading.Thread(target=self.compact, daemon=True)
+                self._compaction.start()
+
+    def _should_compact(self) -> bool:
+        if self._compaction is not None and self._compaction.is_alive():
+            return False
+        log_size = self._log_offset
+        snapshot_size = self.snapshot_path.stat().st_size
+        return (
+            log_size >= self.compact_min_bytes
+            and log_size >= snapshot_size * self.compact_ratio
+        )
+
+    def compact(self):
+        """Fold the log into the snapshot file"""
+        with self.lock:
+            self.refresh()
+            _atomic_write_text(self.snapshot_path, _dump_questions(self.index.all()))
+            # The log is only dropped once the snapshot is durable, a crash in
+            # between just replays it again
+            self.log_path.unlink(missing_ok=True)
+            self._snapshot_signature = self._stat_signature(self.snapshot_path)
+            self._log_inode = None
+            self._log_offset = 0
+
+    def current(self) -> _RecordIndex:
+        self.refresh()
+        return self.index
+
+    def wait_for_compaction(self):
+        if self._compaction is not None:
+            self._compaction.join()
+
+
+# Snapshot caches and journals shared by every JsonDB in the process, keyed
+# by resolved path and mode
+_shared_stores: Dict[Tuple[str, bool], Union[_Snapshot, _Journal]] = {}
+_shared_stores_lock = threading.Lock()
+
+
+def _shared_store(path: Path, journal: bool, **journal_options):
+    key = (str(path.resolve()), journal)
+    with _shared_stores_lock:
+        if key not in _shared_stores:
+            _shared_stores[key] = (
+                _Journal(path, **journal_options) if journal else _Snapshot(path)
+            )
+        return _shared_stores[key]
 
 
 class JsonDB:
-    def __init__(self, db_path: str = "data/questions.json"):
+    def __init__(
+        self,
+        db_path: str = "data/questions.json",
+        journal: bool = False,
+        compact_min_bytes: int = 1024 * 1024,
+        compact_ratio: float = 1.0,
+    ):
+        """
+        Args:
+            db_path: Path of the JSON database file
+            journal: Append changes to a log instead of rewriting the whole
+                file on every save (see _Journal). The file at db_path stays
+                the snapshot, so existing databases open unchanged.
+            compact_min_bytes: Minimum log size before it is compacted
+            compact_ratio: Minimum log size relative to the snapshot before
+                it is compacted
+
+        The parsed database is cached process-wide and shared by all JsonDB
+        instances on the same path, so instances are cheap to create. Returned
+        records are copies, but their nested values are shared with the cache
+        and must not be modified in place.
+        """
         self.db_path = Path(db_path)
         self._ensure_db_exists()
+        self._journal = journal
+        self._store = _shared_store(
+            self.db_path,
+            journal,
+            compact_min_bytes=compact_min_bytes,
+            compact_ratio=compact_ratio,
+        )
 
     def _ensure_db_exists(self):
         """Create database file and parent directories if they don't exist"""
@@ -16,54 +542,225 @@ class JsonDB:
         if not self.db_path.exists():
             self.db_path.write_text('{"questions": []}')
 
-    def _read_db(self) -> Dict:
-        """Read the database file"""
-        return json.loads(self.db_path.read_text())
-
-    def _write_db(self, data: Dict):
-        """Write to the database file"""
-        self.db_path.write_text(json.dumps(data, indent=2))
+    def _index(self) -> _RecordIndex:
+        """The up to date index of the database"""
+        return self._store.current()
 
     def save_question(self, question_data: Dict) -> str:
-        """Save or update a question in the database"""
-        db_data = self._read_db()
+        """
+        Save or update a question in the database.
 
+        The read-check-write runs under a lock shared with other processes.
+        If question_data carries a "version", it must match the stored one or
+        VersionConflictError is raised (see check_version). On success the
+        new version is written back into question_data.
+        """
         # Generate unique ID if not exists
         question_id = question_data.get("id", str(uuid.uuid4()))
         question_data["id"] = question_id
-        question_data["last_updated"] = datetime.now().isoformat()
 
-        # Update existing or add new
-        questions = db_data["questions"]
-        for i, q in enumerate(questions):
-            if q.get("id") == question_id:
-                questions[i] = question_data
-                break
-        else:
-            question_data["created_at"] = datetime.now().isoformat()
-            questions.append(question_data)
+        with self._store.lock:
+            index = self._index()
+            stored = index.get(question_id)
+            version = check_version(question_id, question_data.get("version"), stored)
+            question_data["version"] = version
+            question_data["last_updated"] = datetime.now().isoformat()
+            if stored is None:
+                question_data["created_at"] = datetime.now().isoformat()
+
+            if self._journal:
+                self._store.append({"op": "upsert", "record": question_data})
+            else:
+                # Update existing or add new. The caller keeps question_data,
+                # so the cache gets its own copy.
+                record = copy.deepcopy(question_data)
+                questions = index.all()
+                for i, q in enumerate(questions):
+                    if q.get("id") == question_id:
+                        questions[i] = record
+                        break
+                else:
+                    questions.append(record)
+
+                self._store.write(questions)
+        index_saved_question(question_id, question_data)
+        return question_id
+
+    def update_question(self, question_id: str, fields: Dict) -> str:
+        """
+        Update only the given fields of a question, creating it if needed.
 
-        self._write_db(db_data)
+        Versioned like save_question: fields may carry the expected "version",
+        and the new version and last_updated are written back into fields. In
+        journal mode only these fields are appended to the log.
+        """
+        with self._store.lock:
+            index = self._index()
+            stored = index.get(question_id)
+            fields["version"] = check_version(
+                question_id, fields.get("version"), stored
+            )
+            fields["last_updated"] = datetime.now().isoformat()
+            if stored is None:
+                fields["created_at"] = fields["last_updated"]
+
+            if self._journal:
+                self._store.append(
+                    {"op": "update", "id": question_id, "fields": fields}
+                )
+            else:
+                record = {**(stored or {}), **copy.deepcopy(fields), "id": question_id}
+                questions = index.all()
+                for i, q in enumerate(questions):
+                    if q.get("id") == question_id:
+                        questions[i] = record
+                        break
+                else:
+                    questions.append(record)
+
+                self._store.write(questions)
+        index_saved_question(question_id, fields)
         return question_id
 
     def get_question(self, question_id: str) -> Optional[Dict]:
         """Get a specific question by ID"""
-        db_data = self._read_db()
-        for question in db_data["questions"]:
-            if question.get("id") == question_id:
-                return question
-        return None
+        question = self._index().get(question_id)
+        return _unpacked(question) if question is not None else None
 
     def get_all_questions(self) -> List[Dict]:
         """Get all questions"""
-        return self._read_db()["questions"]
+        return [_unpacked(q) for q in self._index().all()]
+
+    def get_questions_by_status(self, status: str) -> List[Dict]:
+        """Get all questions with the given status"""
+        return [_unpacked(q) for q in self._index().with_status(status)]
+
+    def get_recent_questions(self, limit: Optional[int] = None) -> List[Dict]:
+        """Get questions sorted by last_updated, most recent first"""
+        return [_unpacked(q) for q in self._index().by_last_updated()[:limit]]
+
+    def list_questions(
+        self,
+        fields: Optional[List[str]] = None,
+        sort: str = "-last_updated",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List one page of questions with only the requested fields.
+
+        Args:
+            fields: Fields to return (defaults to SUMMARY_FIELDS)
+            sort: Field to sort on, "-" prefixed for descending (see SORT_FIELDS)
+            limit: Maximum number of questions to return
+            cursor: next_cursor of the previous page
+            status: Only list questions with this status
+            category: Only list questions whose selected_categories include
+                this category
+
+        Returns:
+            Tuple of (questions, next_cursor), next_cursor is None on the last page
+        """
+        field, descending = parse_sort(sort)
+        fields = projected_fields(fields, field)
+        keys, records = self._index().sorted_by(field)
+
+        if descending:
+            end = len(keys)
+            if cursor:
+                value, question_id = decode_cursor(cursor)
+                end = bisect.bisect_left(keys, (str(value or ""), question_id))
+            positions = range(end - 1, -1, -1)
+        else:
+            start = 0
+            if cursor:
+                value, question_id = decode_cursor(cursor)
+                start = bisect.bisect_right(keys, (str(value or ""), question_id))
+            positions = range(start, len(keys))
+
+        page = []
+        for position in positions:
+            record = records[position]
+            if status is not None and record.get("status") != status:
+                continue
+            if category is not None and category not in (
+                record.get("selected_categories") or []
+            ):
+                continue
+            if len(page) == limit:
+                last = page[-1]
+                return page, encode_cursor(last.get(field), last["id"])
+            # Only decompresses the record if a text field was asked for
+            record = unpack_fields(record, fields)
+            page.append({f: record.get(f) for f in fields})
+        return page, None
 
     def update_question_status(self, question_id: str, status: str):
         """Update the status of a question"""
-        db_data = self._read_db()
-        for question in db_data["questions"]:
-            if question.get("id") == question_id:
-                question["status"] = status
-                question["last_updated"] = datetime.now().isoformat()
-                break
-        self._write_db(db_data)
+        last_updated = datetime.now().isoformat()
+        with self._store.lock:
+            stored = self._index().get(question_id)
+            if stored is None:
+                return
+            version = (stored.get("version") or 0) + 1
+
+            if self._journal:
+                self._store.append(
+                    {
+                        "op": "status",
+                        "id": question_id,
+                        "status": status,
+                        "last_updated": last_updated,
+                        "version": version,
+                    }
+                )
+                return
+
+            questions = [
+                (
+                    {
+                        **q,
+                        "status": status,
+                        "last_updated": last_updated,
+                        "version": version,
+                    }
+                    if q.get("id") == question_id
+                    else q
+                )
+                for q in self._index().all()
+            ]
+            self._store.write(questions)
+
+    def compact(self):
+        """Fold the journal into the JSON file so plain JsonDB readers see it"""
+        if self._journal:
+            self._store.wait_for_compaction()
+            self._store.compact()
+
+    def close(self):
+        """Wait for a running background compaction to finish"""
+        if self._journal:
+            self._store.wait_for_compaction()
+
+
+def create_db():
+    """
+    Create the database configured by the environment.
+
+    Uses MongoDB when USE_MONGODB is true (connecting to MONGODB_URI), SQLite
+    when USE_SQLITE is true (stored at SQLITE_PATH) and the local JSON file
+    otherwise, in journal mode when JSONDB_JOURNAL is true.
+    """
+    use_mongo = os.getenv("USE_MONGODB", "false").lower() == "true"
+    use_sqlite = os.getenv("USE_SQLITE", "false").lower() == "true"
+    if use_mongo:
+        from utils.mongo_utils import MongoDB
+
+        return MongoDB(os.getenv("MONGODB_URI"))
+    if use_sqlite:
+        from utils.sqlite_utils import SQLiteDB
+
+        return SQLiteDB(os.getenv("SQLITE_PATH", "data/questions.sqlite3"))
+    return JsonDB(journal=os.getenv("JSONDB_JOURNAL", "false").lower() == "true")
@@ -0,0 +1,108 @@
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# utils.similarity_index (and numpy) is imported inside the functions, so the
+# database modules can use the index_* helpers without loading it
+
+
+def dedup_threshold() -> float:
+    """
+    Similarity (0 to 1, see SimilarityIndex) at or above which a newly
+    generated question counts as a duplicate (DEDUP_THRESHOLD)
+    """
+    return float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+
+
+def dedup_attempts() -> int:
+    """Questions generated before giving up on duplicates (DEDUP_MAX_ATTEMPTS)"""
+    return max(1, int(os.getenv("DEDUP_MAX_ATTEMPTS", "3")))
+
+
+def check_duplicate(
+    text: str,
+    exclude: Optional[str] = None,
+    threshold: Optional[float] = None,
+    attempt: int = 1,
+    register: bool = False,
+) -> Dict[str, Any]:
+    """
+    Compare a freshly generated and refined question with the stored ones,
+    before any tokens are spent solving it.
+
+    Args:
+        text: Generated question
+        exclude: Id of the question itself, if it is stored already
+        threshold: Defaults to dedup_threshold()
+        attempt: Number of the generation attempt, stored with the result
+        register: Index a unique text under exclude right away, so questions
+            generated at the same time are checked against it too
+
+    Returns:
+        The "dedup" field of the question record: the threshold, the most
+        similar stored question and its score, the attempt and the decision,
+        "unique", "duplicate" or "unchecked" if the index is disabled or failed
+    """
+    result = {
+        "threshold": dedup_threshold() if threshold is None else threshold,
+        "decision": "unchecked",
+        "similar_to": None,
+        "score": None,
+        "attempt": attempt,
+    }
+    try:
+        from utils.similarity_index import get_similarity_index
+
+        index = get_similarity_index()
+        if index is None:
+            return result
+        matches = index.query(text, k=1, exclude=exclude)
+        result["decision"] = "unique"
+        if matches:
+            result["similar_to"] = matches[0].question_id
+            result["score"] = round(matches[0].score, 3)
+            if matches[0].score >= result["threshold"]:
+                result["decision"] = "duplicate"
+        if register and exclude and result["decision"] == "unique":
+            index.add(exclude, text)
+    except Exception as e:
+        print(f"Error checking generated question for duplicates: {e}")
+        result["decision"] = "unchecked"
+    return result
+
+
+def index_saved_question(question_id: str, fields: Dict):
+    """Re-index a question after a save that changed its generated_question"""
+    text = fields.get("generated_question")
+    if not isinstance(text, str) or not text.strip():
+        return
+    try:
+        from utils.similarity_index import get_similarity_index
+
+        index = get_similarity_index(include_unbuilt=True)
+        if index is not None:
+            index.add(question_id, text)
+    except Exception as e:
+        # The index can be rebuilt, a failure here mustn't fail the save
+        print(f"Error updating similarity index for {question_id}: {e}")
+
+
+def index_final_challenge(path: Path):
+    """Re-index a challenge file after it was written"""
+    try:
+        from utils.similarity_index import (
+            CHALLENGE_SOURCE,
+            get_similarity_index,
+            read_problem_statement,
+        )
+
+        index = get_similarity_index(include_unbuilt=True)
+        problem_statement = read_problem_statement(path)
+        if index is not None and problem_statement:
+            question_id = path.stem[len("challenge_") :]
+            index.add_many(
+                [(question_id, CHALLENGE_SOURCE, problem_statement)],
+                {question_id: path.stat().st_mtime},
+            )
+    except Exception as e:
+        print(f"Error updating similarity index for {path}: {e}")
@@ -1,6 +1,8 @@
 from pathlib import Path
 from typing import Optional
 
+from utils.dedup import index_final_challenge
+
 
 def get_next_challenge_number() -> str:
     """Get the next available challenge number"""
@@ -16,15 +18,41 @@ def get_next_challenge_number() -> str:
     return f"{next_num:02d}"
 
 
-def save_challenge_file(formatted_solution: str) -> str:
-    """Save the formatted solution to a new challenge file"""
-    challenge_num = get_next_challenge_number()
-    filename = f"coding_challenge_{challenge_num}.py"
+def save_challenge_file(
+    formatted_solution: str, question_id: Optional[str] = None
+) -> str:
+    """
+    Save the formatted solution to a new challenge file.
+
+    Files are numbered sequentially unless a question_id is given, in which
+    case the file is named after it so concurrent pipeline runs can't race for
+    the same number.
+    """
+    if question_id:
+        filename = f"challenge_{question_id}.py"
+    else:
+        challenge_num = get_next_challenge_number()
+        filename = f"coding_challenge_{challenge_num}.py"
 
     challenges_dir = Path("challenges")
+    challenges_dir.mkdir(exist_ok=True)
     filepath = challenges_dir / filename
 
     with open(filepath, "w") as f:
         f.write(formatted_solution)
 
     return str(filepath)
+
+
+def save_final_challenge(challenge_text: str, question_id: str) -> Path:
+    """Save the final challenge to the final_challenges directory"""
+    # Create final_challenges directory if it doesn't exist
+    final_dir = Path("final_challenges")
+    final_dir.mkdir(exist_ok=True)
+
+    # Save the challenge file with the question ID as the filename
+    challenge_path = final_dir / f"challenge_{question_id}.py"
+    with open(challenge_path, "w") as f:
+        f.write(challenge_text)
+    index_final_challenge(challenge_path)
+    return challenge_path
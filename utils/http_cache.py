@@ -0,0 +1,335 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import requests
+
+from utils.web_fetch import fetch_pages
+
+# Pages answering with these are cached as missing (metadata None) too
+NEGATIVE_STATUSES = (404, 410)
+NEGATIVE_TTL = 3600
+
+
+@dataclass
+class CachedPage:
+    metadata: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class HTTPCache:
+    """
+    Persistent cache of metadata parsed from web pages.
+
+    Entries are keyed on the URL and the kind of metadata extracted from it
+    (e.g. a page title), and store the parsed result rather than the HTML. A
+    fresh entry is used without touching the network; a stale one is
+    revalidated with its ETag / Last-Modified, so unchanged pages are not
+    downloaded again. Search engine results are kept in their own table, as
+    they can't be revalidated and simply expire. The least recently used
+    entries are evicted once the stored data exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/http_cache.sqlite3",
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=10, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (url, kind)
+                )
+                """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_pages_last_access "
+                "ON pages (last_access)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS searches (
+                    engine TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (engine, query)
+                )
+                """)
+
+    def get(self, url: str, kind: str) -> Optional[CachedPage]:
+        """Return the cached entry, fresh or stale, or None"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT metadata, etag, last_modified, expires_at FROM pages "
+                "WHERE url = ? AND kind = ?",
+                (url, kind),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE pages SET last_access = ? WHERE url = ? AND kind = ?",
+                (time.time(), url, kind),
+            )
+        metadata, etag, last_modified, expires_at = row
+        return CachedPage(json.loads(metadata), etag, last_modified, expires_at)
+
+    def set(
+        self,
+        url: str,
+        kind: str,
+        metadata: Any,
+        ttl: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Store metadata and evict least recently used entries if needed"""
+        now = time.time()
+        data = json.dumps(metadata)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO pages
+                    (url, kind, metadata, etag, last_modified, size,
+                     expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    kind,
+                    data,
+                    etag,
+                    last_modified,
+                    len(data) + len(url),
+                    now + ttl,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def refresh(self, url: str, kind: str, ttl: float):
+        """Mark an entry fresh again after the server said it's unchanged"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET expires_at = ?, last_access = ? "
+                "WHERE url = ? AND kind = ?",
+                (now + ttl, now, url, kind),
+            )
+
+    def get_search(self, engine: str, query: str) -> Optional[List[str]]:
+        """Return the unexpired result URLs of a search, or None"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT results, expires_at FROM searches "
+                "WHERE engine = ? AND query = ?",
+                (engine, query),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute(
+                    "DELETE FROM searches WHERE engine = ? AND query = ?",
+                    (engine, query),
+                )
+                return None
+            self._conn.execute(
+                "UPDATE searches SET last_access = ? WHERE engine = ? AND query = ?",
+                (now, engine, query),
+            )
+        return json.loads(row[0])
+
+    def set_search(self, engine: str, query: str, results: List[str], ttl: float):
+        """Store the result URLs of a search for ttl seconds"""
+        now = time.time()
+        data = json.dumps(results)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO searches
+                    (engine, query, results, size, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (engine, query, data, len(data) + len(query), now + ttl, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop the least recently used entries until under max_bytes"""
+        total = self._conn.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM pages)"
+            " + (SELECT COALESCE(SUM(size), 0) FROM searches)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Evict down to 90% so that every insert doesn't trigger a sweep
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        rows = self._conn.execute("""
+            SELECT 'pages', url, kind, size, last_access FROM pages
+            UNION ALL
+            SELECT 'searches', engine, query, size, last_access FROM searches
+            ORDER BY last_access
+            """).fetchall()
+        for table, first, second, size, _ in rows:
+            if freed >= target:
+                break
+            if table == "pages":
+                self._conn.execute(
+                    "DELETE FROM pages WHERE url = ? AND kind = ?", (first, second)
+                )
+            else:
+                self._conn.execute(
+                    "DELETE FROM searches WHERE engine = ? AND query = ?",
+                    (first, second),
+                )
+            freed += size
+
+    def clear(self):
+        """Remove every cached page and search"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM searches")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[HTTPCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HTTPCache]:
+    """
+    Return the process-wide page metadata cache, or None when it is disabled.
+
+    Configured with HTTP_CACHE_ENABLED (default true), HTTP_CACHE_PATH and
+    HTTP_CACHE_MAX_MB.
+    """
+    global _cache
+    if os.getenv("HTTP_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTTPCache(
+                db_path=os.getenv("HTTP_CACHE_PATH", "data/http_cache.sqlite3"),
+                max_bytes=int(os.getenv("HTTP_CACHE_MAX_MB", "32")) * 1024 * 1024,
+            )
+        return _cache
+
+
+_NOT_MODIFIED = object()
+
+
+def fetch_metadata(
+    urls: Sequence[str],
+    kind: str,
+    parser: Callable[[requests.Response], Any],
+    ttl: float = 7 * 24 * 3600,
+    **fetch_options,
+) -> List[Any]:
+    """
+    fetch_pages through the page metadata cache.
+
+    Fresh entries are returned without a request, stale ones are revalidated
+    with a conditional request and only re-parsed if the page changed.
+
+    Args:
+        urls: Pages to get metadata for
+        kind: Name of what parser extracts, part of the cache key
+        parser: Extracts JSON-serializable metadata from a response, or None
+        ttl: Seconds an entry is used without revalidating it
+        **fetch_options: Passed on to fetch_pages
+
+    Returns:
+        The metadata of each url, in order, None where it couldn't be fetched
+    """
+    cache = get_http_cache()
+    results: List[Any] = [None] * len(urls)
+    cached: Dict[str, CachedPage] = {}
+    to_fetch: List[str] = []
+    for i, url in enumerate(urls):
+        entry = cache.get(url, kind) if cache else None
+        if entry is not None and entry.fresh:
+            results[i] = entry.metadata
+            continue
+        if entry is not None:
+            cached[url] = entry
+        if url not in to_fetch:
+            to_fetch.append(url)
+    if not to_fetch:
+        return results
+
+    def request_headers(url: str) -> Dict[str, str]:
+        entry = cached.get(url)
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def handle(url: str, response: requests.Response):
+        if response.status_code == 304:
+            # Without a cached copy there is nothing to reuse, count it as a miss
+            return _NOT_MODIFIED if url in cached else None
+        metadata = parser(response)
+        if cache and (response.status_code == 200 or metadata is not None):
+            cache.set(
+                url,
+                kind,
+                metadata,
+                ttl,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        elif cache and response.status_code in NEGATIVE_STATUSES:
+            cache.set(url, kind, None, NEGATIVE_TTL)
+        return metadata
+
+    fetched = dict(
+        zip(
+            to_fetch,
+            fetch_pages(to_fetch, handle, headers=request_headers, **fetch_options),
+        )
+    )
+    for i, url in enumerate(urls):
+        if url not in fetched:
+            continue
+        metadata = fetched[url]
+        if metadata is _NOT_MODIFIED:
+            if cache:
+                cache.refresh(url, kind, ttl)
+            metadata = cached[url].metadata
+        results[i] = metadata
+    return results
@@ -0,0 +1,298 @@
+import random
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from questions_py.types import Metadata
+
+_NUMBER = (
+    r"-?(?:\d[\d,]*(?:\.\d+)?\s*(?:[*x×]\s*10\s*)?(?:\^|\*\*)\s*-?\d+"
+    r"|\d[\d,]*(?:\.\d+)?(?:e\d+)?)"
+)
+_TERM = r"len\(\s*[A-Za-z_][\w\[\]\.]*\s*\)|[A-Za-z_][\w\[\]\.]*"
+_RANGE_PATTERN = re.compile(
+    rf"(?P<lo>{_NUMBER})\s*(?P<op1><=|<|≤)\s*(?P<term>{_TERM})\s*(?P<op2><=|<|≤)\s*(?P<hi>{_NUMBER})"
+)
+_UPPER_PATTERN = re.compile(rf"(?P<term>{_TERM})\s*(?P<op><=|<|≤)\s*(?P<hi>{_NUMBER})")
+_SUPERSCRIPT_PATTERN = re.compile("[⁰¹²³⁴⁵⁶⁷⁸⁹]+")
+_SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+
+
+def _normalize(text: str) -> str:
+    """Rewrite superscript exponents (10⁵) as caret exponents (10^5)"""
+    return _SUPERSCRIPT_PATTERN.sub(
+        lambda match: "^" + match.group().translate(_SUPERSCRIPTS), text
+    )
+
+
+def parse_number(text: str) -> float:
+    """Parse constraint numbers such as 1,000,000, 10^5, 2 * 10**5 or 1e6"""
+    text = _normalize(text).replace(",", "").replace(" ", "")
+    text = text.replace("**", "^").replace("×", "*").replace("x", "*")
+    sign = -1.0 if text.startswith("-") else 1.0
+    text = text.lstrip("-")
+    if "^" in text:
+        mantissa, _, exponent = text.rpartition("^")
+        base = mantissa.split("*")
+        coefficient = float(base[0]) if len(base) == 2 else 1.0
+        return sign * coefficient * float(base[-1]) ** float(exponent)
+    return sign * float(text)
+
+
+def parse_constraints(constraints: str) -> Dict[str, Tuple[Optional[float], float]]:
+    """
+    Extract numeric bounds from a free-form constraints string.
+
+    Args:
+        constraints: Text such as "1 <= len(sodas) <= 100,000; 1 <= max_cans <= 10^6"
+
+    Returns:
+        Dict mapping each bounded term (e.g. "len(sodas)", "max_cans") to its
+        (lower, upper) bounds. Strict "<" upper bounds are converted to "<=".
+    """
+    text = _normalize(constraints)
+    bounds: Dict[str, Tuple[Optional[float], float]] = {}
+    for match in _RANGE_PATTERN.finditer(text):
+        term = re.sub(r"\s+", "", match.group("term"))
+        lo = parse_number(match.group("lo"))
+        hi = parse_number(match.group("hi"))
+        if match.group("op1") == "<":
+            lo += 1
+        if match.group("op2") == "<":
+            hi -= 1
+        bounds[term] = (lo, hi)
+    for match in _UPPER_PATTERN.finditer(text):
+        term = re.sub(r"\s+", "", match.group("term"))
+        if term in bounds:
+            continue
+        hi = parse_number(match.group("hi"))
+        if match.group("op") == "<":
+            hi -= 1
+        bounds[term] = (None, hi)
+    return bounds
+
+
+def _leaves(value: Any) -> List[Any]:
+    """Flatten the scalar values contained in a (possibly nested) input"""
+    if isinstance(value, (list, tuple, set)):
+        return [leaf for item in value for leaf in _leaves(item)]
+    if isinstance(value, dict):
+        return [leaf for pair in value.items() for leaf in _leaves(list(pair))]
+    return [value]
+
+
+def _size_of(value: Any) -> int:
+    return len(value) if hasattr(value, "__len__") else 0
+
+
+# Orderings applied to generated lists, each a classic worst case for some
+# family of algorithms (e.g. naive quicksort, insertion sort, hashing)
+SHAPES = ("random", "sorted", "reversed", "uniform")
+
+
+def _apply_shape(value: Any, shape: str) -> Any:
+    if shape == "random" or not isinstance(value, list) or not value:
+        return value
+    if shape == "uniform":
+        # Repeating one element only keeps numeric lists valid; names are
+        # often required to be unique
+        if all(isinstance(leaf, (int, float)) for leaf in _leaves(value)):
+            return [value[0]] * len(value)
+        return value
+    try:
+        return sorted(value, reverse=shape == "reversed")
+    except TypeError:
+        return value
+
+
+class InputGenerator:
+    """
+    Synthesize larger inputs for a solution from its metadata.
+
+    The unit tests provide the shape of every argument (types, nesting and
+    value ranges) and the Input.constraints strings provide the upper bounds.
+    Collections and strings are grown to the requested size, everything else
+    keeps the shape of the largest example. Strings that only ever reference
+    strings of an earlier argument in the examples (e.g. sold items that must
+    exist in the inventory) are drawn from that argument's generated values.
+    """
+
+    def __init__(self, metadata: Metadata, default_max_size: int = 100_000):
+        if not metadata.unit_tests:
+            raise ValueError("Cannot synthesize inputs without example unit tests")
+
+        self.names = [inp.name for inp in metadata.inputs] or list(
+            metadata.unit_tests[0].input
+        )
+        self.bounds: Dict[str, Tuple[Optional[float], float]] = {}
+        for inp in metadata.inputs:
+            self.bounds.update(parse_constraints(inp.constraints))
+
+        # The largest example of each argument serves as its template
+        samples = [test.input for test in metadata.unit_tests]
+        self.templates: Dict[str, Any] = {}
+        for name in self.names:
+            values = [sample[name] for sample in samples if name in sample]
+            if not values:
+                raise ValueError(f"No example value for input '{name}'")
+            self.templates[name] = max(values, key=_size_of)
+
+        # Element bounds such as "nums[i]" win over the ranges observed in the
+        # examples, which are used to keep other generated values realistic
+        self.value_ranges: Dict[str, Tuple[float, float]] = {}
+        for name in self.names:
+            numbers = [
+                leaf
+                for sample in samples
+                for leaf in _leaves(sample.get(name))
+                if isinstance(leaf, (int, float)) and not isinstance(leaf, bool)
+            ]
+            element_bound = self.bounds.get(f"{name}[i]")
+            if element_bound is not None and numbers:
+                lo = element_bound[0] if element_bound[0] is not None else min(numbers)
+                self.value_ranges[name] = (lo, element_bound[1])
+            elif numbers:
+                self.value_ranges[name] = (min(numbers), max(numbers))
+
+        self.references = self._find_references(samples)
+        self.max_sizes = {
+            name: self._max_size(name, default_max_size) for name in self.names
+        }
+
+    def _find_references(self, samples: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Map arguments whose strings always come from an earlier argument"""
+        references: Dict[str, str] = {}
+        for i, name in enumerate(self.names):
+            for source in self.names[:i]:
+                consistent, seen = True, False
+                for sample in samples:
+                    strings = {
+                        leaf
+                        for leaf in _leaves(sample.get(name))
+                        if isinstance(leaf, str)
+                    }
+                    pool = {
+                        leaf
+                        for leaf in _leaves(sample.get(source))
+                        if isinstance(leaf, str)
+                    }
+                    if strings:
+                        seen = True
+                        consistent = consistent and strings <= pool
+                if seen and consistent:
+                    references[name] = source
+                    break
+        return references
+
+    def _max_size(self, name: str, default: int) -> int:
+        template = self.templates[name]
+        bound = self.bounds.get(f"len({name})") or self.bounds.get(f"{name}.length")
+        if bound is not None:
+            return max(int(bound[1]), 1)
+        if isinstance(template, (str, list, tuple, set, dict)):
+            return default
+        return 0
+
+    @property
+    def max_size(self) -> int:
+        """Upper bound on the size of the largest argument"""
+        return max(self.max_sizes.values(), default=0)
+
+    def sizes_for(self, size: int) -> Dict[str, int]:
+        """Per-argument sizes when the largest argument has `size` elements"""
+        largest = self.max_size or 1
+        return {
+            name: max(1, round(size * max_size / largest)) if max_size else 0
+            for name, max_size in self.max_sizes.items()
+        }
+
+    def generate(
+        self,
+        size: int,
+        seed: int = 0,
+        shape: str = "random",
+        overrides: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build one input dict whose largest argument has `size` elements.
+
+        Args:
+            size: Number of elements of the largest argument
+            seed: Seed for the random values
+            shape: Ordering of generated lists, one of SHAPES
+            overrides: Explicit sizes for some arguments
+        """
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown input shape '{shape}', expected one of {SHAPES}")
+        rng = random.Random(seed)
+        sizes = {**self.sizes_for(size), **(overrides or {})}
+        generated: Dict[str, Any] = {}
+        generated_strings: Dict[str, List[str]] = {}
+        for name in self.names:
+            pool = generated_strings.get(self.references.get(name, ""), None)
+            value = self._grow(name, self.templates[name], sizes[name], rng, pool)
+            value = _apply_shape(value, shape)
+            generated[name] = value
+            generated_strings[name] = [
+                leaf for leaf in _leaves(value) if isinstance(leaf, str)
+            ] or None
+        return generated
+
+    def _grow(
+        self,
+        name: str,
+        template: Any,
+        size: int,
+        rng: random.Random,
+        pool: Optional[List[str]],
+    ) -> Any:
+        if isinstance(template, str):
+            alphabet = sorted(set(template)) or ["a"]
+            return "".join(rng.choice(alphabet) for _ in range(size))
+        if isinstance(template, (list, tuple, set)):
+            items = list(template)
+            if not items:
+                return type(template)()
+            counter = iter(range(size))
+            grown = [
+                self._mutate(name, items[i % len(items)], rng, pool, counter)
+                for i in range(size)
+            ]
+            return grown if isinstance(template, list) else type(template)(grown)
+        if isinstance(template, dict):
+            items = list(template.items())
+            if not items:
+                return {}
+            counter = iter(range(size))
+            return dict(
+                self._mutate(name, items[i % len(items)], rng, pool, counter)
+                for i in range(size)
+            )
+        return template
+
+    def _mutate(
+        self,
+        name: str,
+        item: Any,
+        rng: random.Random,
+        pool: Optional[List[str]],
+        counter: Any,
+    ) -> Any:
+        """Derive a new collection element from an example element"""
+        if isinstance(item, bool):
+            return rng.random() < 0.5
+        if isinstance(item, int):
+            lo, hi = self.value_ranges.get(name, (item, item))
+            return rng.randint(int(lo), int(hi))
+        if isinstance(item, float):
+            lo, hi = self.value_ranges.get(name, (item, item))
+            return rng.uniform(lo, hi)
+        if isinstance(item, str):
+            if pool:
+                return rng.choice(pool)
+            # Unique strings keep solutions that key on names well-defined
+            return f"{item}{next(counter, '')}"
+        if isinstance(item, tuple):
+            return tuple(self._mutate(name, part, rng, pool, counter) for part in item)
+        if isinstance(item, list):
+            return [self._mutate(name, part, rng, pool, counter) for part in item]
+        return item
@@ -1,8 +1,9 @@
 from typing import List, Dict, Optional
 import requests
-from bs4 import BeautifulSoup
 from googlesearch import search
 from utils.openai_utils import analyze_problem_similarity, init_openai
+from utils.http_cache import fetch_metadata, get_http_cache
+from utils.web_fetch import read_title
 from tavily import TavilyClient
 import json
 import streamlit as st
@@ -34,6 +35,18 @@ CODING_PLATFORMS = [
     "https://cses.fi",
 ]
 
+# Seconds Google results for a query are reused
+SEARCH_TTL = 24 * 3600
+
+
+def parse_problem_title(response: requests.Response) -> Optional[str]:
+    """Title of a fetched problem page, or None if it failed"""
+    if response.status_code != 200:
+        print(f"Error fetching problem details: {response.status_code}")
+        return None
+    title = read_title(response) or "Unknown Title"
+    return title.replace(" - LeetCode", "")
+
 
 def find_similar_leetcode_problems(problem_statement: str) -> Dict:
     """
@@ -54,56 +67,37 @@ def find_similar_leetcode_problems(problem_statement: str) -> Dict:
     # print("search_query", search_query)
 
     # Get top 12 LeetCode results from Google
-    leetcode_results = []
-    try:
-        search_results = search(search_query, num_results=12, lang="en")
-        print("search_results", search_results)
-        for result in search_results:
-            print("result", result)
-            if isinstance(result, str):
-                leetcode_results.append(result)
-                # print("leetcode_results", leetcode_results)
-    except Exception as e:
-        print(f"Error during Google search: {e}")
-        return {"error": str(e)}
-
-    print("leetcode_results", leetcode_results)
-    # Extract problem details from LeetCode URLs
-    problems_info = []
-    for url in leetcode_results:
+    cache = get_http_cache()
+    cached = cache.get_search("google", search_query) if cache else None
+    if cached is not None:
+        leetcode_results = cached
+    else:
+        leetcode_results = []
         try:
-            # Update the headers with more realistic browser information
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "none",
-                "Sec-Fetch-User": "?1",
-                "Cache-Control": "max-age=0",
-            }
-
-            # Add delay between requests to avoid rate limiting
-            # time.sleep(2)  # Add a 2-second delay between requests
-            response = requests.get(url, headers=headers, timeout=10)
-            print("response", response)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, "html.parser")
-                title_element = soup.find("title")
-                title = title_element.text if title_element else "Unknown Title"
-                print("title", title)
-                problems_info.append(
-                    {"title": title.replace(" - LeetCode", ""), "url": url}
-                )
-            else:
-                print(f"Error fetching problem details: {response.status_code}")
+            search_results = search(search_query, num_results=12, lang="en")
+            print("search_results", search_results)
+            for result in search_results:
+                print("result", result)
+                if isinstance(result, str):
+                    leetcode_results.append(result)
+                    # print("leetcode_results", leetcode_results)
         except Exception as e:
-            print(f"Error fetching problem details: {e}")
-            continue
+            print(f"Error during Google search: {e}")
+            return {"error": str(e)}
+        # An empty answer is more likely a blocked or failed search than a
+        # query without matches, so it is tried again next time
+        if cache and leetcode_results:
+            cache.set_search("google", search_query, leetcode_results, SEARCH_TTL)
+
+    print("leetcode_results", leetcode_results)
+    # Extract problem details from LeetCode URLs, fetched concurrently and
+    # cached between searches
+    titles = fetch_metadata(leetcode_results, "title", parse_problem_title)
+    problems_info = [
+        {"title": title, "url": url}
+        for url, title in zip(leetcode_results, titles)
+        if title is not None
+    ]
 
     # Use LLM to assess similarity
     if problems_info:
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache of LLM completions.
+
+    Responses are stored in a SQLite file keyed on a hash of the model, prompt,
+    temperature and system message, so the cache survives restarts and can be
+    shared by every process that mounts the same data directory. The least
+    recently used entries are evicted once the stored text exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/llm_cache.sqlite3",
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=10, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                "ON responses (last_access)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+                """)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO counters (name, value) "
+                "VALUES ('hits', 0), ('misses', 0), ('evictions', 0)"
+            )
+
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt: str,
+        temperature: float,
+        system_message: Optional[str] = None,
+    ) -> str:
+        """Hash the request parameters that determine a completion"""
+        payload = json.dumps(
+            {
+                "model": model,
+                "prompt": prompt,
+                "temperature": temperature,
+                "system_message": system_message,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _increment(self, name: str, amount: int = 1):
+        self._conn.execute(
+            "UPDATE counters SET value = value + ? WHERE name = ?", (amount, name)
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._increment("misses")
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._increment("hits")
+            return row[0]
+
+    def set(self, key: str, model: str, response: str):
+        """Store a response and evict least recently used entries if needed"""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, model, response, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, model, response, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop the least recently used entries until under max_bytes"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Evict down to 90% so that every insert doesn't trigger a sweep
+        target = total - int(self.max_bytes * 0.9)
+        freed = evicted = 0
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall()
+        for key, size in rows:
+            if freed >= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            freed += size
+            evicted += 1
+        self._increment("evictions", evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters plus the current size of the cache"""
+        with self._lock:
+            counters = dict(
+                self._conn.execute("SELECT name, value FROM counters").fetchall()
+            )
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            **counters,
+            "hit_rate": counters.get("hits", 0) / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        """Remove every cached response and reset the counters"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("UPDATE counters SET value = 0")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Return the process-wide LLM cache, or None when it is disabled.
+
+    Configured with LLM_CACHE_ENABLED (default true), LLM_CACHE_PATH and
+    LLM_CACHE_MAX_MB. Works the same inside and outside Streamlit.
+    """
+    global _cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                db_path=os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3"),
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024,
+            )
+        return _cache
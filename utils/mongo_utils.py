@@ -1,11 +1,85 @@
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import uuid
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from pymongo.database import Database
 from pymongo.collection import Collection
 import os
 from dotenv import load_dotenv
+from utils.db_utils import (
+    VersionConflictError,
+    decode_cursor,
+    encode_cursor,
+    parse_sort,
+    projected_fields,
+)
+from utils.compression import (
+    PACKED_FIELD,
+    TEXT_FIELDS,
+    compression_enabled,
+    pack_fields,
+    unpack_fields,
+)
+from utils.dedup import index_saved_question
+import atexit
+import threading
+
+# MongoClients shared by every session of the process, keyed by connection
+# string. MongoClient is thread-safe and pools its own connections.
+_clients: Dict[str, MongoClient] = {}
+# (connection string, db name) pairs that were pinged and indexed
+_prepared: set = set()
+_registry_lock = threading.Lock()
+
+
+def _client_options() -> Dict:
+    """Pool size and timeout settings for MongoClient from the environment"""
+    options = {
+        "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000")),
+        "connectTimeoutMS": int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000")),
+        "serverSelectionTimeoutMS": int(
+            os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000")
+        ),
+    }
+    socket_timeout = os.getenv("MONGODB_SOCKET_TIMEOUT_MS")
+    if socket_timeout:
+        options["socketTimeoutMS"] = int(socket_timeout)
+    return options
+
+
+def _to_datetime(value):
+    """Convert an ISO timestamp string (as stored by JsonDB and SQLiteDB)"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return value
+
+
+def get_mongo_client(connection_string: str) -> MongoClient:
+    """Return the process-wide MongoClient for a connection string"""
+    with _registry_lock:
+        if connection_string not in _clients:
+            _clients[connection_string] = MongoClient(
+                connection_string, **_client_options()
+            )
+        return _clients[connection_string]
+
+
+def close_mongo_clients():
+    """Close every shared MongoClient (runs automatically at exit)"""
+    with _registry_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _prepared.clear()
+
+
+atexit.register(close_mongo_clients)
 
 
 class MongoDB:
@@ -16,6 +90,12 @@ class MongoDB:
     ):
         """
         Initialize MongoDB connection
+
+        The MongoClient and its connection pool are shared by every MongoDB
+        on the same connection string (see get_mongo_client), and the
+        connection check and index setup only run the first time, so
+        creating one per session is cheap.
+
         Args:
             connection_string: MongoDB Atlas connection string
             db_name: Name of the database
@@ -31,42 +111,165 @@ class MongoDB:
             )
 
         try:
-            self.client = MongoClient(self.connection_string)
-            # Test the connection
-            self.client.admin.command("ping")
-            print("Successfully connected to MongoDB Atlas")
-
+            self.client = get_mongo_client(self.connection_string)
             self.db: Database = self.client[db_name]
             self.questions: Collection = self.db.questions
 
-            # Create an index on the id field if it doesn't exist
-            self.questions.create_index("id", unique=True)
+            key = (self.connection_string, db_name)
+            with _registry_lock:
+                prepared = key in _prepared
+            # Index creation is idempotent, so sessions starting at the same
+            # time may both run it rather than wait on each other
+            if not prepared:
+                # Test the connection
+                self.client.admin.command("ping")
+                print("Successfully connected to MongoDB Atlas")
+
+                # Create an index on the id field if it doesn't exist
+                self.questions.create_index("id", unique=True)
+                # Indexes for the sorts and filters of list_questions
+                self.questions.create_index(
+                    [("last_updated", DESCENDING), ("id", DESCENDING)]
+                )
+                self.questions.create_index(
+                    [
+                        ("status", ASCENDING),
+                        ("last_updated", DESCENDING),
+                        ("id", DESCENDING),
+                    ]
+                )
+                self.questions.create_index(
+                    [("created_at", DESCENDING), ("id", DESCENDING)]
+                )
+                with _registry_lock:
+                    _prepared.add(key)
 
         except Exception as e:
             print(f"Error connecting to MongoDB Atlas: {e}")
             raise
 
     def save_question(self, question_data: Dict) -> str:
-        """Save or update a question in the database"""
+        """
+        Save or update a question in the database.
+
+        Versioned like JsonDB.save_question: a stale "version" raises
+        VersionConflictError. The check and the write are a single atomic
+        update on the server.
+        """
         # Generate unique ID if not exists
         question_id = question_data.get("id", str(uuid.uuid4()))
         question_data["id"] = question_id
-        question_data["last_updated"] = datetime.now()
+        return self.update_question(question_id, question_data)
 
-        # Update existing or insert new
-        self.questions.update_one(
-            {"id": question_id}, {"$set": question_data}, upsert=True
+    def update_question(self, question_id: str, fields: Dict) -> str:
+        """
+        Update only the given fields of a question, creating it if needed.
+
+        Versioned like save_question. Only the given fields are sent, as a
+        single $set. Text fields are stored in one compressed blob (see
+        utils.compression), so updating some of them merges them with the
+        stored ones first; without an expected version that merge is guarded
+        by the version it read and retried if someone else wrote in between.
+        """
+        caller_fields = fields
+        fields = {**fields, "id": question_id, "last_updated": datetime.now()}
+        expected_version = fields.pop("version", None)
+
+        texts = {f: fields[f] for f in TEXT_FIELDS if f in fields}
+        merge_texts = (
+            bool(texts) and compression_enabled() and len(texts) < len(TEXT_FIELDS)
         )
 
+        for attempt in range(5):
+            document, unset, read_version = self._packed_update(
+                question_id, fields, merge_texts
+            )
+            # pack_fields may hand back fields itself, so don't pop from it
+            document = dict(document)
+            created_at = _to_datetime(document.pop("created_at", None))
+            guard = expected_version
+            if merge_texts and expected_version is None:
+                # Nobody may write between reading the blob and writing it
+                guard = read_version
+
+            if guard is not None or merge_texts:
+                query = {"id": question_id, "version": guard}
+                update = {"$set": {**document, "version": (guard or 0) + 1}}
+            else:
+                query = {"id": question_id}
+                update = {"$set": document, "$inc": {"version": 1}}
+            if unset:
+                update["$unset"] = unset
+            # Like SQLiteDB, created_at is only written on insert
+            update["$setOnInsert"] = {
+                "created_at": created_at or fields["last_updated"]
+            }
+
+            # Update existing or insert new
+            try:
+                saved = self.questions.find_one_and_update(
+                    query,
+                    update,
+                    projection={"version": 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                # The upsert only inserts when no document matched the version
+                if expected_version is None and attempt < 4:
+                    continue
+                current = self.questions.find_one({"id": question_id}, {"version": 1})
+                raise VersionConflictError(
+                    question_id, expected_version, (current or {}).get("version")
+                )
+        # Hand the new version back like the other backends do
+        fields["version"] = caller_fields["version"] = saved["version"]
+        index_saved_question(question_id, fields)
+
         return question_id
 
+    def _packed_update(
+        self, question_id: str, fields: Dict, merge_texts: bool
+    ) -> Tuple[Dict, Dict, Optional[int]]:
+        """
+        $set and $unset documents writing fields with the text fields packed,
+        plus the version the stored text fields were read at (if merged)
+        """
+        read_version = None
+        if not merge_texts:
+            document = pack_fields(fields, binary=True)
+        else:
+            current = (
+                self.questions.find_one(
+                    {"id": question_id},
+                    projection={
+                        PACKED_FIELD: 1,
+                        "version": 1,
+                        **{f: 1 for f in TEXT_FIELDS},
+                        "_id": 0,
+                    },
+                )
+                or {}
+            )
+            stored = {
+                f: v for f, v in unpack_fields(current).items() if f in TEXT_FIELDS
+            }
+            document = pack_fields({**stored, **fields}, binary=True)
+            read_version = current.get("version")
+        if PACKED_FIELD not in document:
+            return document, {}, read_version
+        # Plain copies would shadow the blob
+        unset = {f: "" for f in TEXT_FIELDS if f not in document}
+        return document, unset, read_version
+
     def get_question(self, question_id: str) -> Optional[Dict]:
         """Get a specific question by ID"""
         question = self.questions.find_one({"id": question_id})
         if question:
             # Remove MongoDB's _id field
             question.pop("_id", None)
-            return question
+            return unpack_fields(question)
         return None
 
     def get_all_questions(self) -> List[Dict]:
@@ -75,15 +278,135 @@ class MongoDB:
         # Remove MongoDB's _id field from each document
         for question in questions:
             question.pop("_id", None)
-        return questions
+        return [unpack_fields(question) for question in questions]
+
+    def list_questions(
+        self,
+        fields: Optional[List[str]] = None,
+        sort: str = "-last_updated",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List one page of questions with only the requested fields.
+
+        Same contract as JsonDB.list_questions. Projection, sorting and
+        keyset pagination all happen on the server using the (sort field, id)
+        indexes, so only the requested fields of one page are transferred.
+        """
+        field, descending = parse_sort(sort)
+        fields = projected_fields(fields, field)
+        direction = DESCENDING if descending else ASCENDING
+
+        query: Dict = {}
+        if status is not None:
+            query["status"] = status
+        if category is not None:
+            # Matches any element of the array
+            query["selected_categories"] = category
+        if cursor:
+            value, question_id = decode_cursor(cursor)
+            op = "$lt" if descending else "$gt"
+            query["$or"] = [
+                {field: {op: value}},
+                {field: value, "id": {op: question_id}},
+            ]
+
+        projection = {**{f: 1 for f in fields}, "_id": 0}
+        if any(f in TEXT_FIELDS for f in fields):
+            projection[PACKED_FIELD] = 1
+        documents = list(
+            self.questions.find(
+                query,
+                projection=projection,
+                sort=[(field, direction), ("id", direction)],
+                limit=limit + 1,
+            )
+        )
+        page = [
+            {f: v for f, v in unpack_fields(d, fields).items() if f in fields}
+            for d in documents[:limit]
+        ]
+        next_cursor = None
+        if len(documents) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(last.get(field), last["id"])
+        return page, next_cursor
+
+    def bulk_upsert(self, questions: Iterable[Dict], ordered: bool = False) -> int:
+        """
+        Upsert many questions in a single round trip.
+
+        Unlike save_question the questions keep their own timestamps and
+        versions, which is what migrations and restores want. ISO timestamp
+        strings (as stored by JsonDB and SQLiteDB) are converted to datetimes
+        like the ones save_question writes.
+
+        Returns:
+            The number of questions written
+        """
+        operations = []
+        for question in questions:
+            document = {k: v for k, v in question.items() if k != "_id"}
+            for field in ("created_at", "last_updated"):
+                if field in document:
+                    document[field] = _to_datetime(document[field])
+            packed = pack_fields(document, binary=True)
+            update = {"$set": packed}
+            if not packed.get("created_at"):
+                packed.pop("created_at", None)
+                update["$setOnInsert"] = {
+                    "created_at": packed.get("last_updated") or datetime.now()
+                }
+            if PACKED_FIELD in packed:
+                update["$unset"] = {f: "" for f in TEXT_FIELDS if f not in packed}
+            operations.append(UpdateOne({"id": document["id"]}, update, upsert=True))
+        if not operations:
+            return 0
+        result = self.questions.bulk_write(operations, ordered=ordered)
+        return result.matched_count + result.upserted_count
+
+    def backfill_created_at(self) -> int:
+        """
+        Give questions saved without created_at their last update time, so
+        sorting by created_at sees them. Run by scripts/migrate_to_mongodb.py.
+
+        Returns:
+            The number of questions updated
+        """
+        result = self.questions.update_many(
+            {"created_at": {"$exists": False}},
+            [{"$set": {"created_at": "$last_updated"}}],
+        )
+        return result.modified_count
+
+    def iter_questions(
+        self, after_id: Optional[str] = None, batch_size: int = 1000
+    ) -> Iterator[Dict]:
+        """Stream every question in id order, starting after after_id"""
+        query = {"id": {"$gt": after_id}} if after_id else {}
+        for question in self.questions.find(
+            query,
+            projection={"_id": 0},
+            sort=[("id", ASCENDING)],
+            batch_size=batch_size,
+        ):
+            yield unpack_fields(question)
 
     def update_question_status(self, question_id: str, status: str):
         """Update the status of a question"""
         self.questions.update_one(
             {"id": question_id},
-            {"$set": {"status": status, "last_updated": datetime.now()}},
+            {
+                "$set": {"status": status, "last_updated": datetime.now()},
+                "$inc": {"version": 1},
+            },
         )
 
     def close(self):
-        """Close the MongoDB connection"""
-        self.client.close()
+        """
+        Release this handle. The shared client stays open for other sessions
+        until close_mongo_clients() is called or the process exits.
+        """
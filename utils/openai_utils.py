@@ -1,22 +1,33 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Generator, List
 from openai import OpenAI
 from anthropic import Anthropic
 import streamlit as st
 from utils.prompts import (
-    GENERATE_PROMPT,
-    GENERATE_V2_PROMPT,
-    VALIDATE_TESTS_PROMPT,
-    SOLVE_SOLUTION_PROMPT,
-    FORMAT_PROMPT,
-    DEBUG_SOLUTION_PROMPT,
-    REVIEW_SOLUTION_PROMPT,
-    REFINE_PROMPT,
-    ANALYZE_SIMILARITY_PROMPT,
+    analyze_problem_similarity_request,
+    build_messages,
+    debug_solution_request,
+    format_solution_request,
+    generate_question_request,
+    refine_problem_request,
+    review_solution_request,
+    solve_problem_request,
+    validate_unit_tests_request,
 )
+from utils.llm_cache import get_llm_cache
 
+# Text chunks yielded while streaming, with the usual response dict returned
+# at the end (available as StopIteration.value, see utils.components.render_stream)
+ResponseStream = Generator[str, None, Dict[str, Any]]
 
+
+@st.cache_resource
 def init_openai() -> Optional[OpenAI]:
-    """Initialize OpenAI client if API key is set"""
+    """
+    Initialize OpenAI client if API key is set.
+
+    The client is shared across reruns and sessions so its connection pool is
+    reused instead of rebuilt on every page render.
+    """
     return OpenAI()
 
 
@@ -27,25 +38,37 @@ def query_openai(
     temperature: float = 0.8,
     max_tokens: Optional[int] = None,
     model: str = "gpt-4",
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
-    """Generic helper function to query OpenAI models."""
+    """
+    Generic helper function to query OpenAI models.
+
+    Successful responses are stored in the persistent LLM cache (see
+    utils.llm_cache) unless use_cache is False.
+    """
     if not _client:
         return {"generated_text": "OpenAI client not initialized", "status": "error"}
 
-    messages = []
-    if system_message:
-        messages.append({"role": "system", "content": system_message})
-    messages.append({"role": "user", "content": prompt})
+    cache = get_llm_cache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = cache.make_key(model, prompt, temperature, system_message)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {"generated_text": cached, "status": "success"}
 
     try:
         response = _client.chat.completions.create(
             model=model,
-            messages=messages,
+            messages=build_messages(prompt, system_message),
             temperature=temperature,
             max_completion_tokens=None,
         )
+        generated_text = response.choices[0].message.content
+        if cache and generated_text:
+            cache.set(cache_key, model, generated_text)
         return {
-            "generated_text": response.choices[0].message.content,
+            "generated_text": generated_text,
             "status": "success",
         }
     except Exception as e:
@@ -53,6 +76,65 @@ def query_openai(
         return {"generated_text": str(e), "status": "error"}
 
 
+def stream_openai(
+    _client: OpenAI,
+    prompt: str,
+    system_message: Optional[str] = None,
+    temperature: float = 0.8,
+    max_tokens: Optional[int] = None,
+    model: str = "gpt-4",
+    use_cache: bool = True,
+) -> ResponseStream:
+    """
+    Streaming variant of query_openai.
+
+    Yields the completion text as it arrives and returns the same
+    {"generated_text", "status"} dict as query_openai when exhausted. Closing
+    the generator early (e.g. when Streamlit stops the script) closes the HTTP
+    stream, so an unwanted generation is not billed to completion. Cache hits
+    are yielded as a single chunk.
+    """
+    if not _client:
+        return {"generated_text": "OpenAI client not initialized", "status": "error"}
+
+    cache = get_llm_cache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = cache.make_key(model, prompt, temperature, system_message)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return {"generated_text": cached, "status": "success"}
+
+    chunks = []
+    try:
+        stream = _client.chat.completions.create(
+            model=model,
+            messages=build_messages(prompt, system_message),
+            temperature=temperature,
+            max_completion_tokens=None,
+            stream=True,
+        )
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        finally:
+            stream.close()
+    except Exception as e:
+        print(e)
+        return {"generated_text": str(e), "status": "error"}
+
+    generated_text = "".join(chunks)
+    if cache and generated_text:
+        cache.set(cache_key, model, generated_text)
+    return {"generated_text": generated_text, "status": "success"}
+
+
 @st.cache_data(ttl=3600)
 def query_anthropic(
     prompt: str,
@@ -60,8 +142,17 @@ def query_anthropic(
     temperature: float = 0.8,
     max_tokens: Optional[int] = None,
     model: str = "claude-3-5-sonnet-20241022",
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """Generic helper function to query Anthropic Claude 3.5 Sonnet model."""
+    cache = get_llm_cache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = cache.make_key(model, prompt, temperature, system_message)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {"generated_text": cached, "status": "success"}
+
     try:
         client = Anthropic()
 
@@ -76,9 +167,14 @@ def query_anthropic(
             temperature=temperature,
             max_tokens=max_tokens,
         )
+        generated_text = "".join(
+            block.text for block in response.content if block.type == "text"
+        )
+        if cache and generated_text:
+            cache.set(cache_key, model, generated_text)
 
         return {
-            "generated_text": response.content,
+            "generated_text": generated_text,
             "status": "success",
         }
     except Exception as e:
@@ -86,7 +182,59 @@ def query_anthropic(
         return {"generated_text": str(e), "status": "error"}
 
 
-@st.cache_data(ttl=3600)
+def stream_anthropic(
+    prompt: str,
+    system_message: Optional[str] = None,
+    temperature: float = 0.8,
+    max_tokens: Optional[int] = None,
+    model: str = "claude-3-5-sonnet-20241022",
+    use_cache: bool = True,
+) -> ResponseStream:
+    """Streaming variant of query_anthropic, see stream_openai"""
+    cache = get_llm_cache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = cache.make_key(model, prompt, temperature, system_message)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return {"generated_text": cached, "status": "success"}
+
+    chunks = []
+    try:
+        client = Anthropic()
+
+        # The Messages API takes the system prompt separately and requires
+        # max_tokens
+        request = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens or 4096,
+        }
+        if system_message:
+            request["system"] = system_message
+
+        with client.messages.stream(**request) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+                yield text
+    except Exception as e:
+        print(e)
+        return {"generated_text": str(e), "status": "error"}
+
+    generated_text = "".join(chunks)
+    if cache and generated_text:
+        cache.set(cache_key, model, generated_text)
+    return {"generated_text": generated_text, "status": "success"}
+
+
+def _error_stream(message: str) -> ResponseStream:
+    """Stream that yields no text and returns an error response"""
+    yield from ()
+    return {"generated_text": message, "status": "error"}
+
+
 def generate_question(
     _client: Optional[OpenAI], categories: List[str], selected_theme: str
 ) -> Dict[str, Any]:
@@ -95,11 +243,18 @@ def generate_question(
         st.error("Please set your OpenAI API key in the secrets.")
         return {"generated_text": "OpenAI client not initialized", "status": "error"}
 
-    categories_str = ", ".join(categories)
-    prompt = GENERATE_PROMPT.format(
-        selected_category=categories_str, selected_theme=selected_theme
+    return query_openai(
+        _client, **generate_question_request(categories, selected_theme)
+    )
+
+
+def stream_generate_question(
+    _client: Optional[OpenAI], categories: List[str], selected_theme: str
+) -> ResponseStream:
+    """Streaming variant of generate_question"""
+    return stream_openai(
+        _client, **generate_question_request(categories, selected_theme)
     )
-    return query_openai(_client, prompt, temperature=0.8)
 
 
 @st.cache_data(ttl=3600)
@@ -113,11 +268,26 @@ def validate_unit_tests(
     if not _client or not question_text:
         return {"generated_text": "Invalid input", "status": "error"}
 
-    prompt = VALIDATE_TESTS_PROMPT.format(question_text=question_text)
-    return query_openai(_client, prompt, model=model, temperature=temperature)
+    return query_openai(
+        _client, **validate_unit_tests_request(question_text, model, temperature)
+    )
+
+
+def stream_validate_unit_tests(
+    _client: Optional[OpenAI],
+    question_text: str,
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> ResponseStream:
+    """Streaming variant of validate_unit_tests"""
+    if not question_text:
+        return _error_stream("Invalid input")
+
+    return stream_openai(
+        _client, **validate_unit_tests_request(question_text, model, temperature)
+    )
 
 
-@st.cache_data(ttl=3600)
 def solve_problem(
     _client: Optional[OpenAI], problem_statement: str, model: str = "o3-mini"
 ) -> Dict[str, Any]:
@@ -125,8 +295,14 @@ def solve_problem(
     if not _client:
         return {"generated_text": "OpenAI client not initialized", "status": "error"}
 
-    prompt = SOLVE_SOLUTION_PROMPT.format(problem_statement=problem_statement)
-    return query_openai(_client, prompt, model=model, temperature=1.0)
+    return query_openai(_client, **solve_problem_request(problem_statement, model))
+
+
+def stream_solve_problem(
+    _client: Optional[OpenAI], problem_statement: str, model: str = "o3-mini"
+) -> ResponseStream:
+    """Streaming variant of solve_problem"""
+    return stream_openai(_client, **solve_problem_request(problem_statement, model))
 
 
 @st.cache_data(ttl=3600)
@@ -137,16 +313,16 @@ def format_solution(
     if not _client:
         return {"generated_text": "OpenAI client not initialized", "status": "error"}
 
-    prompt = FORMAT_PROMPT.format(information=solution_response)
-    return query_openai(
-        _client=_client,
-        prompt=prompt,
-        model="gpt-4o",
-        temperature=0,
-    )
+    return query_openai(_client, **format_solution_request(solution_response))
+
+
+def stream_format_solution(
+    _client: Optional[OpenAI], solution_response: str
+) -> ResponseStream:
+    """Streaming variant of format_solution"""
+    return stream_openai(_client, **format_solution_request(solution_response))
 
 
-@st.cache_data(ttl=3600)
 def debug_solution(
     _client: Optional[OpenAI],
     solution: str,
@@ -158,12 +334,23 @@ def debug_solution(
     if not _client:
         return {"generated_text": "OpenAI client not initialized", "status": "error"}
 
-    prompt = DEBUG_SOLUTION_PROMPT.format(
-        solution=solution, failed_unit_tests=failed_tests
+    return query_openai(
+        _client,
+        **debug_solution_request(solution, failed_tests, model, temperature),
     )
 
-    return query_openai(
-        _client=_client, prompt=prompt, model=model, temperature=temperature
+
+def stream_debug_solution(
+    _client: Optional[OpenAI],
+    solution: str,
+    failed_tests: str,
+    model: str = "o3-mini",
+    temperature: float = 1,
+) -> ResponseStream:
+    """Streaming variant of debug_solution"""
+    return stream_openai(
+        _client,
+        **debug_solution_request(solution, failed_tests, model, temperature),
     )
 
 
@@ -195,11 +382,23 @@ def review_solution(
     if not _client:
         return {"generated_text": "OpenAI client not initialized", "status": "error"}
 
-    prompt = REVIEW_SOLUTION_PROMPT.format(
-        solution=solution_text, selected_theme=selected_theme
-    )
     return query_openai(
-        _client=_client, prompt=prompt, model=model, temperature=temperature
+        _client,
+        **review_solution_request(solution_text, selected_theme, model, temperature),
+    )
+
+
+def stream_review_solution(
+    _client: Optional[OpenAI],
+    solution_text: str,
+    selected_theme: str,
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> ResponseStream:
+    """Streaming variant of review_solution"""
+    return stream_openai(
+        _client,
+        **review_solution_request(solution_text, selected_theme, model, temperature),
     )
 
 
@@ -227,12 +426,11 @@ def analyze_problem_similarity(
     if not _client:
         return {"generated_text": "OpenAI client not initialized", "status": "error"}
 
-    prompt = ANALYZE_SIMILARITY_PROMPT.format(
-        original_problem=original_problem, found_problems=found_problems
-    )
-
     return query_openai(
-        _client=_client, prompt=prompt, model=model, temperature=temperature
+        _client,
+        **analyze_problem_similarity_request(
+            original_problem, found_problems, model, temperature
+        ),
     )
 
 
@@ -247,5 +445,21 @@ def refine_problem(
     if not _client or not problem_text:
         return {"generated_text": "Invalid input", "status": "error"}
 
-    prompt = REFINE_PROMPT.format(problem_text=problem_text)
-    return query_openai(_client, prompt, model=model, temperature=temperature)
+    return query_openai(
+        _client, **refine_problem_request(problem_text, model, temperature)
+    )
+
+
+def stream_refine_problem(
+    _client: Optional[OpenAI],
+    problem_text: str,
+    model: str = "gpt-4o",
+    temperature: float = 0,
+) -> ResponseStream:
+    """Streaming variant of refine_problem"""
+    if not problem_text:
+        return _error_stream("Invalid input")
+
+    return stream_openai(
+        _client, **refine_problem_request(problem_text, model, temperature)
+    )
@@ -0,0 +1,329 @@
+import asyncio
+import itertools
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.async_llm import (
+    aformat_solution,
+    agenerate_question,
+    arefine_problem,
+    areview_solution,
+    asolve_problem,
+)
+from utils.constants import LEETCODE_CATEGORY_MAP
+from utils.db_utils import status_from_flags
+from utils.dedup import check_duplicate, dedup_attempts
+from utils.scheduler import Stage, StageScheduler, StageSkipped
+from utils.file_utils import save_challenge_file, save_final_challenge
+from utils.solution_tester import SolutionTester
+from utils.text_utils import clean_code_block
+
+
+@dataclass
+class PipelineJob:
+    """One question to push through the pipeline"""
+
+    categories: List[str]  # Keys of LEETCODE_CATEGORY_MAP
+    theme: str
+
+
+class StageFailed(Exception):
+    """Raised when a pipeline stage can't produce usable output"""
+
+
+def build_jobs(
+    category_sets: Sequence[Sequence[str]], themes: Sequence[str], count: int
+) -> List[PipelineJob]:
+    """Cycle through the category/theme matrix until count jobs are built"""
+    matrix = itertools.cycle(itertools.product(category_sets, themes))
+    return [
+        PipelineJob(categories=list(categories), theme=theme)
+        for categories, theme in itertools.islice(matrix, count)
+    ]
+
+
+def new_record(job: PipelineJob) -> Dict[str, Any]:
+    """A question record with the same fields save_progress writes"""
+    return {
+        "id": str(uuid.uuid4()),
+        "selected_category": None,
+        "selected_categories": job.categories,
+        "selected_theme": job.theme,
+        "generated_text": None,
+        "generated_question": None,
+        "test_validation": None,
+        "solution_text": None,
+        "solution": None,
+        "formatted_text": None,
+        "saved_solution": None,
+        "challenge_file": None,
+        "debug_response": None,
+        "generate_completed": False,
+        "solve_completed": False,
+        "format_completed": False,
+        "debug_completed": False,
+        "review_completed": False,
+        "similar_problems": None,
+        "similarity_analysis": None,
+        "dedup": None,
+        "status": "started",
+    }
+
+
+# Default number of questions each stage works on at once. Stage names follow
+# the pages, and finishing a stage moves the question to the next status of
+# get_current_status (started -> solving -> ... -> completed).
+DEFAULT_STAGE_CONCURRENCY = {
+    "generate": 4,
+    "solve": 4,
+    "format": 4,
+    "debug": 1,  # Each SolutionTester runs its own process pool
+    "review": 4,
+}
+
+
+class Pipeline:
+    """
+    Headless version of the generate -> solve -> format -> debug -> review pages.
+
+    Every question goes through the same helpers as the Streamlit pages and
+    its record is saved to db after each stage, so partially processed
+    questions show up in the history and can be resumed from the UI. Questions
+    whose tests fail stop at the debugging stage for a human to look at.
+
+    Stages are run by a StageScheduler, so questions are pipelined: one
+    question's tests run on a worker thread while others wait on the LLM.
+    """
+
+    def __init__(
+        self,
+        db,
+        client=None,
+        stage_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self.db = db
+        self.client = client  # AsyncOpenAI, defaults to the shared client
+        self.stage_concurrency = {
+            **DEFAULT_STAGE_CONCURRENCY,
+            **(stage_concurrency or {}),
+        }
+        # Records are saved from to_thread workers and the CPU stage threads,
+        # never on the event loop
+        self._db_lock = threading.Lock()
+
+    def stages(self) -> List[Stage]:
+        concurrency = self.stage_concurrency
+        return [
+            Stage("generate", self.generate, concurrency=concurrency["generate"]),
+            Stage(
+                "solve",
+                self.solve,
+                after=("generate",),
+                concurrency=concurrency["solve"],
+            ),
+            Stage(
+                "format",
+                self.format,
+                after=("solve",),
+                concurrency=concurrency["format"],
+            ),
+            Stage(
+                "debug",
+                self.test,
+                kind="cpu",
+                after=("format",),
+                concurrency=concurrency["debug"],
+            ),
+            Stage(
+                "review",
+                self.review,
+                after=("debug",),
+                concurrency=concurrency["review"],
+            ),
+        ]
+
+    def save(self, record: Dict[str, Any]):
+        """Save record (blocking, call asave from the event loop)"""
+        record["status"] = status_from_flags(record)
+        with self._db_lock:
+            self.db.save_question(record)
+
+    async def asave(self, record: Dict[str, Any]):
+        """Save record on a worker thread, so the LLM calls in flight go on"""
+        await asyncio.to_thread(self.save, record)
+
+    async def generate(self, record: Dict[str, Any]):
+        category_values = [
+            LEETCODE_CATEGORY_MAP[category]
+            for category in record["selected_categories"]
+        ]
+        # Regenerate near-duplicates of stored questions before solving them
+        # costs anything. The refined text is compared, as that is what the
+        # stored questions hold.
+        for attempt in range(1, dedup_attempts() + 1):
+            result = await agenerate_question(
+                self.client, category_values, record["selected_theme"]
+            )
+            if result["status"] != "success":
+                raise StageFailed(f"generate: {result['generated_text']}")
+            # Fall back to the initial version if refining fails, like the page
+            refined = await arefine_problem(self.client, result["generated_text"])
+            if refined["status"] == "success":
+                result = refined
+            # Registered right away so the questions generated alongside this
+            # one are checked against it
+            dedup = await asyncio.to_thread(
+                check_duplicate,
+                result["generated_text"],
+                exclude=record["id"],
+                attempt=attempt,
+                register=True,
+            )
+            if dedup["decision"] != "duplicate":
+                break
+        record["dedup"] = dedup
+        record["generated_text"] = result["generated_text"]
+        if dedup["decision"] == "duplicate":
+            await self.asave(record)
+            raise StageFailed(
+                f"generate: duplicate of {dedup['similar_to']} (similarity "
+                f"{dedup['score']} >= {dedup['threshold']}) after {attempt} attempts"
+            )
+
+        record["generated_question"] = result["generated_text"]
+        record["generate_completed"] = True
+        await self.asave(record)
+
+    async def solve(self, record: Dict[str, Any]):
+        result = await asolve_problem(self.client, record["generated_question"])
+        if result["status"] != "success":
+            raise StageFailed(f"solve: {result['generated_text']}")
+        record["solution_text"] = result["generated_text"]
+        record["solution"] = result["generated_text"]
+        record["solve_completed"] = True
+        await self.asave(record)
+
+    async def format(self, record: Dict[str, Any]):
+        result = await aformat_solution(self.client, record["solution"])
+        if result["status"] != "success":
+            raise StageFailed(f"format: {result['generated_text']}")
+        record["formatted_text"] = result["generated_text"]
+        record["saved_solution"] = clean_code_block(result["generated_text"])
+        record["challenge_file"] = await asyncio.to_thread(
+            save_challenge_file, record["saved_solution"], record["id"]
+        )
+        record["format_completed"] = True
+        await self.asave(record)
+
+    def test(self, record: Dict[str, Any]):
+        """Run the unit tests (blocking, called on a scheduler thread)"""
+        results = run_challenge_tests(record["challenge_file"])
+        failed = [r for r in results if not r.passed]
+        record["test_summary"] = {
+            "passed": len(results) - len(failed),
+            "total": len(results),
+            "outcomes": [r.outcome.value for r in results],
+        }
+        if failed or not results:
+            self.save(record)
+            raise StageFailed(
+                f"debug: {len(failed)} of {len(results)} tests failed"
+                if results
+                else "debug: the challenge has no unit tests"
+            )
+        record["debug_completed"] = True
+        self.save(record)
+
+    async def review(self, record: Dict[str, Any]):
+        result = await areview_solution(
+            self.client, record["saved_solution"], record["selected_theme"]
+        )
+        if result["status"] != "success":
+            raise StageFailed(f"review: {result['generated_text']}")
+        record["solution_review"] = result["generated_text"]
+        await asyncio.to_thread(
+            save_final_challenge, record["saved_solution"], record["id"]
+        )
+        record["review_completed"] = True
+        await self.asave(record)
+
+    async def finish(self, record: Dict[str, Any], results: Dict[str, Any]):
+        """Record the first stage failure of a question, if any"""
+        for result in results.values():
+            if isinstance(result, Exception) and not isinstance(result, StageSkipped):
+                record["pipeline_error"] = (
+                    str(result)
+                    if isinstance(result, StageFailed)
+                    else f"{type(result).__name__}: {result}"
+                )
+                await self.asave(record)
+                break
+
+    async def run(
+        self,
+        jobs: List[PipelineJob],
+        max_in_flight: Optional[int] = None,
+        on_done=None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Process jobs through the stage graph.
+
+        Args:
+            jobs: Questions to produce
+            max_in_flight: Maximum number of questions admitted at once
+                (defaults to the sum of the stage limits)
+            on_done: Optional callback receiving each finished record
+
+        Returns:
+            The final record of every job, in order
+        """
+        records = [new_record(job) for job in jobs]
+        for record in records:
+            await self.asave(record)
+
+        async def done(record: Dict[str, Any], results: Dict[str, Any]):
+            await self.finish(record, results)
+            if on_done:
+                on_done(record)
+
+        scheduler = StageScheduler(self.stages(), max_in_flight=max_in_flight)
+        await scheduler.run(records, on_done=done)
+        return records
+
+
+def run_challenge_tests(challenge_file: str):
+    """Run a challenge file's unit tests on a fresh SolutionTester"""
+    with SolutionTester.from_challenge_file(challenge_file) as tester:
+        return tester.run_all_tests(parallel=True)
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count final records per status (plus failures and duplicates)"""
+    summary: Dict[str, int] = {}
+    for record in records:
+        if (record.get("dedup") or {}).get("decision") == "duplicate":
+            key = "duplicate"
+        elif record.get("pipeline_error"):
+            key = "failed"
+        else:
+            key = record["status"]
+        summary[key] = summary.get(key, 0) + 1
+    return summary
+
+
+def run_pipeline(
+    db,
+    jobs: List[PipelineJob],
+    max_in_flight: Optional[int] = None,
+    stage_concurrency: Optional[Dict[str, int]] = None,
+    on_done=None,
+) -> List[Dict[str, Any]]:
+    """Synchronous entry point for Pipeline.run"""
+
+    async def main():
+        pipeline = Pipeline(db, stage_concurrency=stage_concurrency)
+        return await pipeline.run(jobs, max_in_flight=max_in_flight, on_done=on_done)
+
+    return asyncio.run(main())
@@ -1,3 +1,5 @@
+from typing import Any, Dict, List, Optional
+
 GENERATE_PROMPT = """### Task
 A company is seeking our assistance in developing coding questions in python that can be used to improve LLM’s ability to be helpful in the domain.
 
@@ -555,3 +557,88 @@ Please analyze:
 1. Is the original problem too similar to the found problems? 
 2. Which LeetCode problems are most similar to the original problem?
 """
+
+
+def build_messages(prompt: str, system_message: Optional[str]) -> List[Dict]:
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+# Request builders shared by the blocking and streaming helpers of
+# utils.openai_utils and utils.async_llm. They return the keyword arguments
+# for query_openai.
+
+
+def generate_question_request(
+    categories: List[str], selected_theme: str
+) -> Dict[str, Any]:
+    categories_str = ", ".join(categories)
+    prompt = GENERATE_PROMPT.format(
+        selected_category=categories_str, selected_theme=selected_theme
+    )
+    # Never serve generated questions from the persistent cache, every request
+    # for the same categories and theme should produce a new question
+    return {"prompt": prompt, "temperature": 0.8, "use_cache": False}
+
+
+def validate_unit_tests_request(
+    question_text: str, model: str, temperature: float
+) -> Dict[str, Any]:
+    prompt = VALIDATE_TESTS_PROMPT.format(question_text=question_text)
+    return {"prompt": prompt, "model": model, "temperature": temperature}
+
+
+def solve_problem_request(problem_statement: str, model: str) -> Dict[str, Any]:
+    prompt = SOLVE_SOLUTION_PROMPT.format(problem_statement=problem_statement)
+    # Sampled at temperature 1, so asking again should give another solution
+    # rather than the cached one
+    return {"prompt": prompt, "model": model, "temperature": 1.0, "use_cache": False}
+
+
+def format_solution_request(solution_response: str) -> Dict[str, Any]:
+    prompt = FORMAT_PROMPT.format(information=solution_response)
+    return {"prompt": prompt, "model": "gpt-4o", "temperature": 0}
+
+
+def debug_solution_request(
+    solution: str, failed_tests: str, model: str, temperature: float
+) -> Dict[str, Any]:
+    prompt = DEBUG_SOLUTION_PROMPT.format(
+        solution=solution, failed_unit_tests=failed_tests
+    )
+    # Only deterministic requests are served from the persistent cache, so
+    # asking for debug help again gets new suggestions
+    return {
+        "prompt": prompt,
+        "model": model,
+        "temperature": temperature,
+        "use_cache": temperature == 0,
+    }
+
+
+def review_solution_request(
+    solution_text: str, selected_theme: str, model: str, temperature: float
+) -> Dict[str, Any]:
+    prompt = REVIEW_SOLUTION_PROMPT.format(
+        solution=solution_text, selected_theme=selected_theme
+    )
+    return {"prompt": prompt, "model": model, "temperature": temperature}
+
+
+def analyze_problem_similarity_request(
+    original_problem: str, found_problems: List[str], model: str, temperature: float
+) -> Dict[str, Any]:
+    prompt = ANALYZE_SIMILARITY_PROMPT.format(
+        original_problem=original_problem, found_problems=found_problems
+    )
+    return {"prompt": prompt, "model": model, "temperature": temperature}
+
+
+def refine_problem_request(
+    problem_text: str, model: str, temperature: float
+) -> Dict[str, Any]:
+    prompt = REFINE_PROMPT.format(problem_text=problem_text)
+    return {"prompt": prompt, "model": model, "temperature": temperature}
@@ -0,0 +1,162 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class Stage:
+    """
+    One step of the per-item dependency graph.
+
+    LLM stages are coroutine functions and run on the event loop, CPU stages
+    are plain functions and run on the scheduler's worker threads so they
+    never block LLM calls. Each stage may run for at most concurrency items at
+    once.
+    """
+
+    name: str
+    func: Callable[[Any], Any]
+    kind: str = "llm"  # "llm" or "cpu"
+    after: Tuple[str, ...] = ()
+    concurrency: int = 4
+
+
+class StageSkipped(Exception):
+    """Raised for stages whose dependencies failed"""
+
+
+def topological_order(stages: Sequence[Stage]) -> List[Stage]:
+    """Order stages so that every stage comes after its dependencies"""
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Stage names must be unique")
+    for stage in stages:
+        if stage.kind not in ("llm", "cpu"):
+            raise ValueError(f"Stage {stage.name} has unknown kind {stage.kind}")
+        for dependency in stage.after:
+            if dependency not in by_name:
+                raise ValueError(f"Stage {stage.name} depends on unknown {dependency}")
+
+    ordered: List[Stage] = []
+    visiting = set()
+    done = set()
+
+    def visit(stage: Stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Stage graph has a cycle through {stage.name}")
+        visiting.add(stage.name)
+        for dependency in stage.after:
+            visit(by_name[dependency])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+class StageScheduler:
+    """
+    Run many items through a DAG of stages with the stages pipelined.
+
+    Each stage of an item starts as soon as its own dependencies are done, so
+    while one item is in a CPU stage others can be waiting on LLM stages. The
+    limit on every stage bounds how many items it processes at once, and
+    max_in_flight bounds how many items are admitted at all so early items
+    make it through the graph instead of every item queueing on the first
+    stage.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        max_in_flight: Optional[int] = None,
+        cpu_workers: Optional[int] = None,
+    ):
+        self.stages = topological_order(stages)
+        self.max_in_flight = max_in_flight or sum(s.concurrency for s in stages)
+        self.cpu_workers = cpu_workers or max(
+            [s.concurrency for s in stages if s.kind == "cpu"] or [1]
+        )
+        self.running: Dict[str, int] = {s.name: 0 for s in self.stages}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _run_stage(
+        self, stage: Stage, item: Any, dependencies: List["asyncio.Task"]
+    ) -> Any:
+        # Gathered dependencies have already been awaited by their own tasks,
+        # this only re-raises their failures
+        for dependency in dependencies:
+            try:
+                await dependency
+            except Exception as e:
+                raise StageSkipped(f"{stage.name} skipped: {e}") from e
+
+        async with self._slots[stage.name]:
+            self.running[stage.name] += 1
+            try:
+                if stage.kind == "cpu":
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(self._executor, stage.func, item)
+                return await stage.func(item)
+            finally:
+                self.running[stage.name] -= 1
+
+    async def process(self, item: Any) -> Dict[str, Any]:
+        """
+        Run every stage for one item.
+
+        Returns:
+            Dict of stage name to its result, or to the exception it raised
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        for stage in self.stages:
+            dependencies = [tasks[name] for name in stage.after]
+            tasks[stage.name] = asyncio.create_task(
+                self._run_stage(stage, item, dependencies)
+            )
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return {name: task.exception() or task.result() for name, task in tasks.items()}
+
+    async def run(
+        self,
+        items: Iterable[Any],
+        on_done: Optional[Callable[[Any, Dict[str, Any]], Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Push every item through the stage graph.
+
+        Args:
+            items: Items to process, admitted in order
+            on_done: Optional callback receiving each item and its stage
+                results, awaited if it is a coroutine function
+
+        Returns:
+            The stage results of every item, in order
+        """
+        self._slots = {s.name: asyncio.Semaphore(s.concurrency) for s in self.stages}
+        admission = asyncio.Semaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.cpu_workers, thread_name_prefix="stage-cpu"
+        )
+
+        async def admit(item: Any) -> Dict[str, Any]:
+            async with admission:
+                results = await self.process(item)
+            if on_done:
+                done = on_done(item, results)
+                if inspect.isawaitable(done):
+                    await done
+            return results
+
+        try:
+            return await asyncio.gather(*(admit(item) for item in items))
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
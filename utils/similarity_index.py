@@ -0,0 +1,433 @@
+import ast
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Questions are compared as sets of word 2-grams
+SHINGLE_SIZE = 2
+NUM_PERM = 128
+# MinHash permutations are h(x) = (a * x + b) mod _PRIME over 32-bit shingle
+# hashes, which can't overflow uint64
+_PRIME = (1 << 31) - 1
+
+QUESTION_SOURCE = "question"
+CHALLENGE_SOURCE = "final_challenge"
+
+
+@dataclass
+class SimilarQuestion:
+    question_id: str
+    source: str  # QUESTION_SOURCE or CHALLENGE_SOURCE
+    score: float  # Estimated Jaccard similarity of the word 2-grams, 0 to 1
+
+
+def shingles(text: str) -> np.ndarray:
+    """Hashes of the word 2-grams of text, ignoring case and punctuation"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [
+            " ".join(words[i : i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        ]
+    return np.array(sorted({zlib.crc32(g.encode()) for g in grams}), dtype=np.uint64)
+
+
+def read_problem_statement(path: Path) -> Optional[str]:
+    """The problem_statement string of a challenge file, without running it"""
+    try:
+        tree = ast.parse(path.read_text())
+    except (OSError, SyntaxError, ValueError):
+        return None
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(
+                isinstance(t, ast.Name) and t.id == "problem_statement"
+                for t in node.targets
+            )
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            return node.value.value
+    return None
+
+
+def _challenge_documents(
+    directory: str, known: Optional[Dict[str, float]] = None
+) -> Tuple[List[Tuple[str, str, str]], Dict[str, float]]:
+    """
+    Documents and modification times of the challenge files in directory,
+    skipping those whose mtime in known is unchanged
+    """
+    documents, mtimes = [], {}
+    for path in sorted(Path(directory).glob("challenge_*.py")):
+        question_id = path.stem[len("challenge_") :]
+        mtime = path.stat().st_mtime
+        if (known or {}).get(question_id) == mtime:
+            continue
+        problem_statement = read_problem_statement(path)
+        if problem_statement:
+            documents.append((question_id, CHALLENGE_SOURCE, problem_statement))
+            mtimes[question_id] = mtime
+    return documents, mtimes
+
+
+class SimilarityIndex:
+    """
+    Persistent near-duplicate index of the generated questions.
+
+    Each question is stored as a MinHash signature of its word 2-grams, whose
+    share of equal positions with another signature estimates the Jaccard
+    similarity of the two texts. The signatures live in a SQLite file and are
+    held in memory as one matrix, so a query is a single vectorized comparison
+    against the whole corpus and needs no network. Documents are added one at
+    a time as questions are saved; changes made by other processes are picked
+    up on the next query.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/similarity_index.sqlite3",
+        num_perm: int = NUM_PERM,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.num_perm = num_perm
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=10, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    key TEXT PRIMARY KEY,
+                    question_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    mtime REAL
+                )
+                """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+                """)
+
+        # In-memory copy of the documents table; rows past len(_keys) are spare
+        # capacity so that adding a document doesn't copy the matrix
+        self._keys: List[str] = []
+        self._docs: List[Tuple[str, str]] = []  # (question_id, source) per row
+        self._rows: Dict[str, int] = {}
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._data_version = None
+        with self._lock:
+            self._reload()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of text"""
+        hashes = shingles(text)
+        if not len(hashes):
+            return np.full(self.num_perm, _PRIME, dtype=np.uint32)
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _reload(self):
+        """Load the documents table into memory if another process changed it"""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        rows = self._conn.execute(
+            "SELECT key, question_id, source, signature FROM documents"
+        ).fetchall()
+        self._keys = [key for key, _, _, _ in rows]
+        self._docs = [(question_id, source) for _, question_id, source, _ in rows]
+        self._rows = {key: i for i, key in enumerate(self._keys)}
+        self._signatures = np.zeros((max(len(rows), 64), self.num_perm), np.uint32)
+        for i, (_, _, _, signature) in enumerate(rows):
+            self._signatures[i] = np.frombuffer(signature, dtype=np.uint32)
+        self._data_version = data_version
+
+    def _put(self, key: str, question_id: str, source: str, signature: np.ndarray):
+        """Add or replace a row of the in-memory matrix"""
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row == len(self._signatures):
+                grown = np.zeros((row * 2, self.num_perm), np.uint32)
+                grown[:row] = self._signatures
+                self._signatures = grown
+            self._keys.append(key)
+            self._docs.append((question_id, source))
+            self._rows[key] = row
+        self._signatures[row] = signature
+
+    def add_many(
+        self,
+        documents: Iterable[Tuple[str, str, str]],
+        mtimes: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """
+        Index documents in one transaction.
+
+        Args:
+            documents: (question_id, source, text) tuples, a document replaces
+                the earlier one with the same question_id and source
+            mtimes: Modification time of the file of a question_id, for
+                CHALLENGE_SOURCE documents
+
+        Returns:
+            Number of documents indexed
+        """
+        entries = self._entries(documents)
+        with self._lock, self._conn:
+            self._reload()
+            self._insert(entries, mtimes)
+            for key, question_id, source, signature in entries:
+                self._put(key, question_id, source, signature)
+        return len(entries)
+
+    def _entries(
+        self, documents: Iterable[Tuple[str, str, str]]
+    ) -> List[Tuple[str, str, str, np.ndarray]]:
+        """(key, question_id, source, signature) rows of documents"""
+        return [
+            (f"{source}:{question_id}", question_id, source, self.signature(text))
+            for question_id, source, text in documents
+        ]
+
+    def _insert(
+        self,
+        entries: List[Tuple[str, str, str, np.ndarray]],
+        mtimes: Optional[Dict[str, float]] = None,
+    ):
+        """Write rows to the documents table, in the caller's transaction"""
+        self._conn.executemany(
+            """
+            INSERT OR REPLACE INTO documents
+                (key, question_id, source, signature, mtime)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    key,
+                    question_id,
+                    source,
+                    signature.tobytes(),
+                    (mtimes or {}).get(question_id),
+                )
+                for key, question_id, source, signature in entries
+            ],
+        )
+
+    def add(self, question_id: str, text: str, source: str = QUESTION_SOURCE):
+        """Index or re-index one question"""
+        self.add_many([(question_id, source, text)])
+
+    def query(
+        self,
+        text: str,
+        k: int = 5,
+        exclude: Optional[str] = None,
+        min_score: float = 0.0,
+    ) -> List[SimilarQuestion]:
+        """
+        The k indexed questions most similar to text, most similar first.
+
+        A question indexed both as a stored question and as a final challenge
+        is returned once, with its higher score. Questions sharing no word
+        pair with text are never returned, so neither is anything for a text
+        without words.
+
+        Args:
+            text: Question to compare
+            k: Maximum number of questions to return
+            exclude: Question id to leave out, e.g. the question being checked
+            min_score: Leave out questions scoring below this
+        """
+        if not len(shingles(text)):
+            # Its signature would equal that of every other empty text
+            return []
+        signature = self.signature(text)
+        with self._lock:
+            self._reload()
+            size = len(self._keys)
+            if not size:
+                return []
+            scores = (self._signatures[:size] == signature).mean(axis=1)
+            docs = list(self._docs)
+
+        best: Dict[str, SimilarQuestion] = {}
+        # Enough candidates for k distinct questions after dropping duplicates
+        candidates = min(size, 2 * k + 2)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        for row in top[np.argsort(-scores[top], kind="stable")]:
+            question_id, source = docs[row]
+            score = float(scores[row])
+            if question_id == exclude or score < min_score or not score:
+                continue
+            if question_id not in best:
+                best[question_id] = SimilarQuestion(question_id, source, score)
+            if len(best) == k:
+                break
+        return list(best.values())
+
+    def sync_final_challenges(self, directory: str = "final_challenges") -> int:
+        """
+        Index the challenge files added or changed since the last sync.
+
+        Returns:
+            Number of files indexed
+        """
+        with self._lock:
+            known = dict(
+                self._conn.execute(
+                    "SELECT question_id, mtime FROM documents WHERE source = ?",
+                    (CHALLENGE_SOURCE,),
+                ).fetchall()
+            )
+        documents, mtimes = _challenge_documents(directory, known)
+        return self.add_many(documents, mtimes) if documents else 0
+
+    def rebuild(self, db, directory: str = "final_challenges") -> int:
+        """
+        Re-index every stored question and challenge file from scratch.
+
+        The new documents replace the old ones in a single transaction, so
+        queries see the old index until then rather than an empty one.
+        Documents added while the rebuild runs are kept.
+
+        Returns:
+            Number of documents indexed
+        """
+
+        def stored_questions():
+            cursor = None
+            while True:
+                page, cursor = db.list_questions(
+                    fields=["id", "generated_question"],
+                    sort="created_at",
+                    limit=500,
+                    cursor=cursor,
+                )
+                for question in page:
+                    if question.get("generated_question"):
+                        yield (
+                            question["id"],
+                            QUESTION_SOURCE,
+                            question["generated_question"],
+                        )
+                if cursor is None:
+                    return
+
+        with self._lock:
+            self._reload()
+            previous = set(self._keys)
+        questions = self._entries(stored_questions())
+        challenges, mtimes = _challenge_documents(directory)
+        challenges = self._entries(challenges)
+        rebuilt = {key for key, _, _, _ in questions + challenges}
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM documents WHERE key = ?",
+                [(key,) for key in previous - rebuilt],
+            )
+            self._insert(questions)
+            self._insert(challenges, mtimes)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('built_at', ?)",
+                (str(time.time()),),
+            )
+        with self._lock:
+            # data_version only tracks other connections' commits
+            self._data_version = None
+            self._reload()
+        return len(questions) + len(challenges)
+
+    @property
+    def built(self) -> bool:
+        """Whether rebuild has ever completed on this index file"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM meta WHERE name = 'built_at'"
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._reload()
+            return len(self._keys)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index: Optional[SimilarityIndex] = None
+_index_built = False
+_build_thread: Optional[threading.Thread] = None
+_index_lock = threading.Lock()
+
+
+def _build_in_background(index: SimilarityIndex):
+    try:
+        from utils.db_utils import create_db
+
+        count = index.rebuild(create_db())
+        print(f"Built similarity index of {count} documents")
+    except Exception as e:
+        print(f"Error building similarity index: {e}")
+
+
+def get_similarity_index(include_unbuilt: bool = False) -> Optional[SimilarityIndex]:
+    """
+    Return the process-wide similarity index, or None when it is disabled or
+    not built yet.
+
+    Configured with SIMILARITY_INDEX_ENABLED (default true) and
+    SIMILARITY_INDEX_PATH. An index file that was never built is built from
+    the configured database and final_challenges/ in a background thread
+    (or by scripts/build_similarity_index.py), so no request waits for it;
+    afterwards only new challenge files are read.
+
+    Args:
+        include_unbuilt: Return the index while it is being built, for adding
+            documents; the build keeps documents added during it
+    """
+    global _index, _index_built, _build_thread
+    if os.getenv("SIMILARITY_INDEX_ENABLED", "true").lower() != "true":
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = SimilarityIndex(
+                os.getenv("SIMILARITY_INDEX_PATH", "data/similarity_index.sqlite3")
+            )
+        if not _index_built:
+            _index_built = _index.built
+            if _index_built:
+                _index.sync_final_challenges()
+            elif _build_thread is None:
+                _build_thread = threading.Thread(
+                    target=_build_in_background,
+                    args=(_index,),
+                    name="similarity-index-build",
+                    daemon=True,
+                )
+                _build_thread.start()
+        return _index if _index_built or include_unbuilt else None
@@ -1,8 +1,10 @@
-from typing import Any, Dict, List, Optional, Callable, Type, Union
+from typing import Any, Dict, Iterable, List, Optional, Callable, Tuple, Type, Union
 import time
 import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
 import importlib.util
+import math
 import os
 from pathlib import Path
 from questions_py.types import (
@@ -13,9 +15,35 @@ from questions_py.types import (
     Output,
     UnitTest,
 )
+import pickle
+import select
 import signal
 from contextlib import contextmanager
 import threading
+import multiprocessing
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits
+    resource = None
+
+
+class TestOutcome(Enum):
+    PASSED = "passed"
+    FAILED = "failed"
+    ERROR = "error"
+    TIMEOUT = "timeout"
+    CPU_LIMIT = "cpu_limit"
+    MEMORY_LIMIT = "memory_limit"
+    CRASHED = "crashed"
+    SKIPPED = "skipped"
 
 
 @dataclass
@@ -25,131 +53,783 @@ class TestResult:
     message: str
     expected_output: Any = None
     actual_output: Any = None
+    outcome: TestOutcome = TestOutcome.FAILED
+    cpu_time: float = 0.0
+
+
+@dataclass
+class ResourceLimits:
+    """
+    Per-test and per-suite budgets enforced on solutions run in worker processes.
+
+    A value of None disables the corresponding limit. Memory is the address
+    space a test may allocate on top of what its process holds when the test
+    starts.
+    """
+
+    wall_time_sec: Optional[float] = 5.0
+    cpu_time_sec: Optional[float] = 5.0
+    memory_mb: Optional[int] = 512
+    suite_wall_time_sec: Optional[float] = 60.0
+    suite_cpu_time_sec: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        """Build limits from TEST_* environment variables, falling back to defaults"""
+
+        def env_value(name: str, default: Optional[float], cast: Type) -> Any:
+            value = os.getenv(name)
+            if value is None:
+                return default
+            if value.lower() in ("", "none", "off"):
+                return None
+            return cast(value)
+
+        defaults = cls()
+        return cls(
+            wall_time_sec=env_value(
+                "TEST_WALL_TIME_SEC", defaults.wall_time_sec, float
+            ),
+            cpu_time_sec=env_value("TEST_CPU_TIME_SEC", defaults.cpu_time_sec, float),
+            memory_mb=env_value("TEST_MEMORY_MB", defaults.memory_mb, int),
+            suite_wall_time_sec=env_value(
+                "TEST_SUITE_WALL_TIME_SEC", defaults.suite_wall_time_sec, float
+            ),
+            suite_cpu_time_sec=env_value(
+                "TEST_SUITE_CPU_TIME_SEC", defaults.suite_cpu_time_sec, float
+            ),
+        )
+
+
+# How far past its wall-clock or CPU limit a test is allowed to run before it
+# is killed from outside, when the in-process limits couldn't stop it (e.g. a
+# loop in native code that never returns to the interpreter)
+LIMIT_GRACE_SEC = 1.0
 
 
 class TimeoutException(Exception):
     pass
 
 
-# @contextmanager
-# def timeout(seconds):
-#     """Context manager for timing out function execution"""
+class CPUTimeExceeded(Exception):
+    pass
+
+
+@contextmanager
+def timeout(seconds: Optional[float]):
+    """Context manager for timing out function execution"""
+
+    def signal_handler(signum, frame):
+        raise TimeoutException("Test execution timed out")
+
+    # Signals can only be installed from the main thread of a Unix process
+    # (Streamlit runs page scripts in worker threads, so this is a no-op there)
+    enabled = (
+        seconds is not None
+        and hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if enabled:
+        previous_handler = signal.signal(signal.SIGALRM, signal_handler)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+
+    try:
+        yield
+    finally:
+        if enabled:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _process_cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def cpu_limit(seconds: Optional[float]):
+    """
+    Raise CPUTimeExceeded once the block has used `seconds` of CPU time.
+
+    Uses the soft RLIMIT_CPU of the current process, so it is only safe in
+    dedicated worker processes. The hard limit is left untouched so that the
+    soft limit can be raised again for the next test.
+    """
+
+    def signal_handler(signum, frame):
+        raise CPUTimeExceeded("Test exceeded its CPU time budget")
+
+    enabled = (
+        seconds is not None
+        and resource is not None
+        and hasattr(signal, "SIGXCPU")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if enabled:
+        previous_handler = signal.signal(signal.SIGXCPU, signal_handler)
+        soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        new_soft = math.ceil(_process_cpu_time() + seconds)
+        if hard != resource.RLIM_INFINITY:
+            new_soft = min(new_soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (new_soft, hard))
+
+    try:
+        yield
+    finally:
+        if enabled:
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+            signal.signal(signal.SIGXCPU, previous_handler)
+
 
-#     def signal_handler(signum, frame):
-#         raise TimeoutException("Test execution timed out")
+def _current_address_space() -> int:
+    """Virtual memory size of the current process in bytes (Linux only)"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[0])
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+@contextmanager
+def memory_limit(megabytes: Optional[int]):
+    """
+    Cap the address space of the current process at its size plus `megabytes`
+    for the duration of the block.
+
+    Like cpu_limit only the soft limit is changed, so it is only safe in
+    dedicated worker processes.
+    """
+    enabled = megabytes is not None and resource is not None
+    if enabled:
+        try:
+            baseline = _current_address_space()
+        except (OSError, ValueError):
+            enabled = False
+    if enabled:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = baseline + megabytes * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+    try:
+        yield
+    finally:
+        if enabled:
+            resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def load_challenge_module(challenge_path: Union[str, Path]) -> Any:
+    """Import a challenge file and check that it defines solution and metadata."""
+    challenge_path = Path(challenge_path)
+    if not challenge_path.exists():
+        raise FileNotFoundError(f"Challenge file not found: {challenge_path}")
+
+    # Import the module dynamically
+    spec = importlib.util.spec_from_file_location(challenge_path.stem, challenge_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Could not load module: {challenge_path}")
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # Get solution function and metadata
+    if not hasattr(module, "solution"):
+        raise AttributeError(f"No solution function found in {challenge_path}")
+    if not hasattr(module, "metadata"):
+        raise AttributeError(f"No metadata found in {challenge_path}")
+
+    return module
+
+
+def _format_inputs(input_dict: Dict[str, Any]) -> str:
+    return "\n".join(f"  {k} = {v}" for k, v in input_dict.items())
+
+
+def execute_test(
+    solution_func: Callable[..., Any],
+    test_case: UnitTest,
+    test_number: int,
+    limits: Optional[ResourceLimits] = None,
+) -> TestResult:
+    """
+    Run a single test case against solution_func and return the result.
+
+    Wall-clock and CPU limits are only enforced when running on the main
+    thread of a worker process; in-process runs ignore them.
+    """
+    limits = limits or ResourceLimits(
+        wall_time_sec=None, cpu_time_sec=None, memory_mb=None
+    )
+    start_time = time.time()
+    start_cpu = _process_cpu_time() if resource else 0.0
+
+    def finish(outcome: TestOutcome, message: str, **kwargs: Any) -> TestResult:
+        return TestResult(
+            passed=outcome == TestOutcome.PASSED,
+            execution_time=time.time() - start_time,
+            message=message,
+            outcome=outcome,
+            cpu_time=(_process_cpu_time() - start_cpu) if resource else 0.0,
+            **kwargs,
+        )
+
+    input_dict = test_case.input
+    expected_output = test_case.output
+    try:
+        # Run solution with the configured limits
+        try:
+            with timeout(limits.wall_time_sec), cpu_limit(limits.cpu_time_sec):
+                actual_output = solution_func(**input_dict)
+        except TimeoutException:
+            return finish(
+                TestOutcome.TIMEOUT,
+                f"Test case {test_number} timed out after "
+                f"{limits.wall_time_sec} seconds",
+                expected_output=expected_output,
+            )
+        except CPUTimeExceeded:
+            return finish(
+                TestOutcome.CPU_LIMIT,
+                f"Test case {test_number} exceeded the CPU budget of "
+                f"{limits.cpu_time_sec} seconds",
+                expected_output=expected_output,
+            )
+        except MemoryError:
+            return finish(
+                TestOutcome.MEMORY_LIMIT,
+                f"Test case {test_number} exceeded the memory budget of "
+                f"{limits.memory_mb} MB",
+                expected_output=expected_output,
+            )
+
+        message = (
+            f"Test case {test_number}:\n"
+            f"Inputs:\n"
+            + _format_inputs(input_dict)
+            + f"\nExpected output: {expected_output}\n"
+            f"Actual output: {actual_output}"
+        )
+
+        outcome = (
+            TestOutcome.PASSED
+            if actual_output == expected_output
+            else TestOutcome.FAILED
+        )
+        return finish(
+            outcome,
+            message,
+            expected_output=expected_output,
+            actual_output=actual_output,
+        )
+
+    except Exception as e:
+        message = (
+            f"Test case {test_number} failed with error:\n"
+            f"Inputs:\n"
+            + _format_inputs(input_dict)
+            + f"\n\nError: {str(e)}\n{traceback.format_exc()}"
+        )
+        return finish(TestOutcome.ERROR, message)
 
-#     # Start timer only if on Unix-based system (Windows doesn't support SIGALRM)
-#     if hasattr(signal, "SIGALRM"):
-#         signal.signal(signal.SIGALRM, signal_handler)
-#         signal.alarm(seconds)
 
-#     try:
-#         yield
-#     finally:
-#         if hasattr(signal, "SIGALRM"):
-#             signal.alarm(0)
+# Solution, metadata and limits set once per worker process by _init_worker
+_worker_solution_func: Optional[Callable[..., Any]] = None
+_worker_metadata: Optional[Metadata] = None
+_worker_limits: Optional[ResourceLimits] = None
+# Tells the parent which tests have actually started, see _run_parallel
+_worker_started: Optional[Any] = None
+
+
+def _init_worker(
+    challenge_path: Optional[str],
+    solution_func: Optional[Callable[..., Any]],
+    metadata: Optional[Metadata],
+    limits: ResourceLimits,
+    started: Optional[Any] = None,
+) -> None:
+    """Pre-load the solution in a pool worker so tests don't pay the import cost"""
+    global _worker_solution_func, _worker_metadata, _worker_limits, _worker_started
+    if challenge_path is not None:
+        module = load_challenge_module(challenge_path)
+        _worker_solution_func = module.solution
+        _worker_metadata = module.metadata
+    else:
+        _worker_solution_func = solution_func
+        _worker_metadata = metadata
+    _worker_limits = limits
+    _worker_started = started
+
+
+def get_worker_context() -> (
+    Tuple[Callable[..., Any], Optional[Metadata], ResourceLimits]
+):
+    """Solution, metadata and limits of the current pool worker process"""
+    if _worker_solution_func is None or _worker_limits is None:
+        raise RuntimeError("Not running inside a SolutionTester worker process")
+    return _worker_solution_func, _worker_metadata, _worker_limits
+
+
+def _run_test_in_worker(test_case: UnitTest, test_number: int) -> TestResult:
+    """Entry point executed inside a pool worker for a single test case"""
+    if _worker_started is not None:
+        _worker_started.put((test_number, os.getpid(), time.time()))
+    if resource is None or not hasattr(os, "fork"):
+        with memory_limit(_worker_limits.memory_mb):
+            return execute_test(
+                _worker_solution_func, test_case, test_number, _worker_limits
+            )
+    return _execute_in_child(test_case, test_number)
+
+
+def _run_in_child(
+    write_fd: int, test_case: UnitTest, test_number: int, start: float
+) -> None:
+    """Body of the forked child of _execute_in_child: run and pickle the result"""
+    limits = _worker_limits
+    try:
+        if limits.cpu_time_sec is not None:
+            # The kernel kills the child at the hard limit if SIGXCPU at the
+            # soft one can't interrupt it
+            hard = math.ceil(
+                _process_cpu_time() + limits.cpu_time_sec + LIMIT_GRACE_SEC
+            )
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        with memory_limit(limits.memory_mb):
+            result = execute_test(_worker_solution_func, test_case, test_number, limits)
+        data = pickle.dumps(result)
+    except BaseException as e:  # E.g. an output that can't be pickled
+        data = pickle.dumps(
+            TestResult(
+                passed=False,
+                execution_time=time.time() - start,
+                message=f"Test case {test_number} failed with error: {e}",
+                outcome=TestOutcome.ERROR,
+            )
+        )
+    with os.fdopen(write_fd, "wb") as f:
+        f.write(data)
+
+
+def _execute_in_child(test_case: UnitTest, test_number: int) -> TestResult:
+    """
+    Run one test in a child forked from the pre-loaded worker.
+
+    The child gets hard CPU and memory limits of its own, which the kernel
+    enforces even on native code, and is killed once it overruns its
+    wall-clock limit. A test that crashes or has to be killed only loses
+    itself; the worker stays up for the next one.
+    """
+    limits = _worker_limits
+    start = time.time()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child
+        try:
+            os.close(read_fd)
+            _run_in_child(write_fd, test_case, test_number, start)
+        finally:
+            # Never return into the worker's loop from the child
+            os._exit(0)
+
+    os.close(write_fd)
+    deadline = (
+        None
+        if limits.wall_time_sec is None
+        else start + limits.wall_time_sec + LIMIT_GRACE_SEC
+    )
+    chunks = []
+    timed_out = False
+    with os.fdopen(read_fd, "rb") as f:
+        while True:
+            wait_sec = None if deadline is None else max(deadline - time.time(), 0)
+            ready, _, _ = select.select([f], [], [], wait_sec)
+            if not ready:
+                os.kill(pid, signal.SIGKILL)
+                timed_out = True
+                break
+            chunk = os.read(f.fileno(), 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    _, status, usage = os.wait4(pid, 0)
+    cpu_time = usage.ru_utime + usage.ru_stime
+
+    def killed(outcome: TestOutcome, message: str) -> TestResult:
+        return TestResult(
+            passed=False,
+            execution_time=time.time() - start,
+            message=message,
+            expected_output=test_case.output,
+            outcome=outcome,
+            cpu_time=cpu_time,
+        )
+
+    if timed_out:
+        return killed(
+            TestOutcome.TIMEOUT,
+            f"Test case {test_number} timed out after {limits.wall_time_sec} "
+            "seconds and was killed",
+        )
+    if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0 and chunks:
+        return pickle.loads(b"".join(chunks))
+    if limits.cpu_time_sec is not None and cpu_time >= limits.cpu_time_sec:
+        return killed(
+            TestOutcome.CPU_LIMIT,
+            f"Test case {test_number} exceeded the CPU budget of "
+            f"{limits.cpu_time_sec} seconds and was killed",
+        )
+    if os.WIFSIGNALED(status):
+        cause = f"was killed by signal {os.WTERMSIG(status)}"
+    else:
+        cause = f"exited with status {os.WEXITSTATUS(status)}"
+    return killed(
+        TestOutcome.CRASHED, f"Test case {test_number} crashed: the process {cause}"
+    )
 
 
 class SolutionTester:
-    def __init__(self, solution_func: Callable[..., Any], unit_tests: List[UnitTest]):
-        """Initialize the solution tester with a solution function and unit tests."""
+    def __init__(
+        self,
+        solution_func: Callable[..., Any],
+        unit_tests: List[UnitTest],
+        challenge_path: Optional[Union[str, Path]] = None,
+        max_workers: Optional[int] = None,
+        limits: Optional[ResourceLimits] = None,
+        metadata: Optional[Metadata] = None,
+    ):
+        """
+        Initialize the solution tester with a solution function and unit tests.
+
+        Args:
+            solution_func: The solution function under test
+            unit_tests: Unit tests to run against the solution
+            challenge_path: Challenge file the solution was loaded from. Worker
+                processes re-import the solution from this file; without it the
+                solution function must be picklable by reference.
+            max_workers: Size of the worker pool used by parallel runs
+                (defaults to the number of CPUs, capped at the number of tests)
+            limits: Resource budgets for parallel runs (defaults to the
+                TEST_* environment variables, see ResourceLimits.from_env)
+            metadata: Challenge metadata, needed by the complexity profiler
+        """
         self.solution_func = solution_func
         self.unit_tests = unit_tests
+        self.challenge_path = Path(challenge_path) if challenge_path else None
+        self.max_workers = max_workers or min(
+            os.cpu_count() or 1, max(len(unit_tests), 1)
+        )
+        self.limits = limits or ResourceLimits.from_env()
+        self.metadata = metadata
         self.results: List[TestResult] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._started: Optional[Any] = None
 
     @classmethod
-    def from_challenge_file(cls, challenge_path: Union[str, Path]) -> "SolutionTester":
+    def from_challenge_file(
+        cls,
+        challenge_path: Union[str, Path],
+        max_workers: Optional[int] = None,
+        limits: Optional[ResourceLimits] = None,
+    ) -> "SolutionTester":
         """Create a SolutionTester instance from a challenge file path."""
-        challenge_path = Path(challenge_path)
-        if not challenge_path.exists():
-            raise FileNotFoundError(f"Challenge file not found: {challenge_path}")
+        module = load_challenge_module(challenge_path)
+        return cls(
+            solution_func=module.solution,
+            unit_tests=module.metadata.unit_tests,
+            challenge_path=challenge_path,
+            max_workers=max_workers,
+            limits=limits,
+            metadata=module.metadata,
+        )
+
+    def __enter__(self) -> "SolutionTester":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start the worker pool and pre-load the solution in every worker."""
+        if self._executor is not None:
+            return
+
+        # Spawn instead of fork: the Streamlit server is multi-threaded and
+        # forking it can deadlock the children on locks held by other threads
+        context = multiprocessing.get_context("spawn")
+        self._started = context.SimpleQueue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                str(self.challenge_path) if self.challenge_path else None,
+                None if self.challenge_path else self.solution_func,
+                None if self.challenge_path else self.metadata,
+                self.limits,
+                self._started,
+            ),
+        )
+        # Spawned workers start lazily, so push a no-op through each of them
+        list(self._executor.map(time.sleep, [0] * self.max_workers))
+
+    def close(self) -> None:
+        """Shut down the worker pool if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Run a module-level function on the worker pool (see get_worker_context)"""
+        self.start()
+        return self._executor.submit(fn, *args)
+
+    def terminate(self) -> None:
+        """Forcefully stop every worker, e.g. one stuck in a C extension loop"""
+        if self._executor is None:
+            return
+        # ProcessPoolExecutor has no public way to kill busy workers before 3.14
+        for process in list(getattr(self._executor, "_processes", {}).values()):
+            process.kill()
+        self.close()
 
-        # Import the module dynamically
-        spec = importlib.util.spec_from_file_location(
-            challenge_path.stem, challenge_path
+    def _kill_worker(self, pid: int) -> None:
+        """Kill one worker; the pool breaks and has to be started again"""
+        if self._executor is None:
+            return
+        process = getattr(self._executor, "_processes", {}).get(pid)
+        if process is not None:
+            process.kill()
+
+    def _dead_workers(self) -> set:
+        """
+        Pids of the workers that exited on their own. Once the pool is broken
+        the executor sends SIGTERM to the remaining workers, so those are
+        left out.
+        """
+        processes = getattr(self._executor, "_processes", None) or {}
+        return {
+            pid
+            for pid, process in list(processes.items())
+            if process.exitcode is not None and process.exitcode != -signal.SIGTERM
+        }
+
+    @staticmethod
+    def _crashed_result(test_number: int, started_at: float) -> TestResult:
+        return TestResult(
+            passed=False,
+            execution_time=time.time() - started_at,
+            message=(
+                f"Test case {test_number} crashed: its worker process died while "
+                "running it (killed by a resource limit or crashed)"
+            ),
+            outcome=TestOutcome.CRASHED,
         )
-        if spec is None or spec.loader is None:
-            raise ImportError(f"Could not load module: {challenge_path}")
 
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+    def _drain_started(self) -> Dict[int, Tuple[int, float]]:
+        """Tests that workers started since the last call: number -> (pid, time)"""
+        started = {}
+        while self._started is not None and not self._started.empty():
+            test_number, pid, started_at = self._started.get()
+            started[test_number] = (pid, started_at)
+        return started
 
-        # Get solution function and metadata
-        if not hasattr(module, "solution"):
-            raise AttributeError(f"No solution function found in {challenge_path}")
-        if not hasattr(module, "metadata"):
-            raise AttributeError(f"No metadata found in {challenge_path}")
+    def _suite_deadline(self) -> Optional[float]:
+        """Wall-clock budget for a parallel run, with a backstop per test"""
+        limits = self.limits
+        if limits.suite_wall_time_sec is not None:
+            return limits.suite_wall_time_sec
+        if limits.wall_time_sec is None:
+            return None
+        # Signal-based limits can't interrupt native code, so give up on the
+        # suite once every worker could have run its share of tests
+        rounds = math.ceil(len(self.unit_tests) / self.max_workers)
+        return rounds * (limits.wall_time_sec + 1.0) + 5.0
 
-        return cls(solution_func=module.solution, unit_tests=module.metadata.unit_tests)
+    def run_all_tests(self, parallel: bool = False) -> List[TestResult]:
+        """
+        Run all unit tests and return the results.
+
+        Args:
+            parallel: Run the tests across the worker pool instead of in the
+                current process. Only parallel runs enforce the resource
+                limits. Results are returned in test order either way.
+        """
+        if parallel:
+            self.results = self._run_parallel()
+            return self.results
 
-    def run_all_tests(self) -> List[TestResult]:
-        """Run all unit tests and return the results."""
         self.results = []
         for i, test_case in enumerate(self.unit_tests, 1):
             result = self.run_single_test(test_case, test_number=i)
             self.results.append(result)
         return self.results
 
-    def run_single_test(self, test_case: UnitTest, test_number: int) -> TestResult:
-        """Run a single test case and return the result."""
-        start_time = time.time()
-        try:
-            input_dict = test_case.input
-            expected_output = test_case.output
-
-            # Run solution with timeout
-            try:
-                # with timeout(5):  # 5 second timeout per test
-                actual_output = self.solution_func(**input_dict)
-            except TimeoutException:
-                return TestResult(
-                    passed=False,
-                    execution_time=time.time() - start_time,
-                    message=f"Test case {test_number} timed out after 5 seconds",
-                    expected_output=expected_output,
-                    actual_output=None,
+    def _run_parallel(self) -> List[TestResult]:
+        """
+        Run the suite on the worker pool, enforcing the per-test and suite
+        budgets.
+
+        Workers report when they start a test, so a test that overruns its
+        wall-clock limit by more than the grace period is stopped by killing
+        its worker, and a suite that runs out of budget reports the tests
+        that never started as skipped. When a worker dies the pool is started
+        again and the tests it lost are resubmitted; only the test that was
+        running in the dead worker is reported as crashed.
+        """
+        suite_start = time.time()
+        deadline = self._suite_deadline()
+        test_deadline = (
+            None
+            if self.limits.wall_time_sec is None
+            else self.limits.wall_time_sec + 2 * LIMIT_GRACE_SEC
+        )
+        futures: Dict[Future, int] = {}
+        started: Dict[int, Tuple[int, float]] = {}  # -> (worker pid, start time)
+        results: Dict[int, TestResult] = {}
+        crashes: Dict[int, int] = {}  # Times a worker died while running a test
+        killed_pids = set()  # Workers we killed since the pool started
+        suite_cpu_time = 0.0
+        stop_reason: Optional[TestOutcome] = None
+
+        def submit(test_numbers: Iterable[int]):
+            self.start()
+            for i in test_numbers:
+                future = self._executor.submit(
+                    _run_test_in_worker, self.unit_tests[i - 1], i
                 )
+                futures[future] = i
+
+        def record(test_number: int, result: TestResult):
+            nonlocal suite_cpu_time
+            # A test whose worker was killed keeps its TIMEOUT
+            if test_number not in results:
+                results[test_number] = result
+                suite_cpu_time += result.cpu_time
 
-            execution_time = time.time() - start_time
+        submit(range(1, len(self.unit_tests) + 1))
+        while futures:
+            now = time.time()
+            remaining = None if deadline is None else deadline - (now - suite_start)
+            if remaining is not None and remaining <= 0:
+                stop_reason = TestOutcome.TIMEOUT
+                break
 
-            message = (
-                f"Test case {test_number}:\n"
-                f"Inputs:\n"
-                + "\n".join(f"  {k} = {v}" for k, v in input_dict.items())
-                + f"\nExpected output: {expected_output}\n"
-                f"Actual output: {actual_output}"
+            # Backstop for tests the worker couldn't stop itself
+            started.update(self._drain_started())
+            for i in futures.values():
+                if (
+                    test_deadline is not None
+                    and i in started
+                    and i not in results
+                    and now - started[i][1] > test_deadline
+                ):
+                    results[i] = TestResult(
+                        passed=False,
+                        execution_time=now - started[i][1],
+                        message=(
+                            f"Test case {i} did not finish within "
+                            f"{test_deadline:.1f} seconds and its worker was killed"
+                        ),
+                        outcome=TestOutcome.TIMEOUT,
+                    )
+                    self._kill_worker(started[i][0])
+                    killed_pids.add(started[i][0])
+
+            poll_sec = 0.1 if test_deadline is not None else None
+            timeouts = [t for t in (remaining, poll_sec) if t is not None]
+            done, _ = wait(
+                futures,
+                timeout=min(timeouts) if timeouts else None,
+                return_when=FIRST_COMPLETED,
             )
+            lost = []
+            for future in done:
+                i = futures.pop(future)
+                try:
+                    record(i, future.result())
+                except BrokenProcessPool:
+                    lost.append(i)
 
-            if actual_output == expected_output:
-                return TestResult(
-                    passed=True,
-                    execution_time=execution_time,
-                    message=message,
-                    expected_output=expected_output,
-                    actual_output=actual_output,
-                )
-            else:
-                return TestResult(
+            if lost:
+                # Every test still queued on the broken pool is lost with it
+                for future, i in futures.items():
+                    if future.done() and future.exception() is None:
+                        record(i, future.result())
+                    else:
+                        lost.append(i)
+                futures.clear()
+                started.update(self._drain_started())
+                dead = self._dead_workers() - killed_pids
+                self.terminate()
+                resubmit = []
+                for i in sorted(lost):
+                    if i in results:
+                        continue
+                    if i in started and started[i][0] in dead:
+                        results[i] = self._crashed_result(i, started[i][1])
+                        continue
+                    # If the dead worker can't be told apart, give up on a test
+                    # that was running the second time its worker died
+                    if i in started and not dead and not killed_pids:
+                        crashes[i] = crashes.get(i, 0) + 1
+                        if crashes[i] >= 2:
+                            results[i] = self._crashed_result(i, started[i][1])
+                            continue
+                    resubmit.append(i)
+                started.clear()
+                killed_pids.clear()
+                submit(resubmit)
+
+            if (
+                self.limits.suite_cpu_time_sec is not None
+                and suite_cpu_time > self.limits.suite_cpu_time_sec
+            ):
+                stop_reason = TestOutcome.CPU_LIMIT
+                break
+
+        if futures:
+            started.update(self._drain_started())
+            for future, test_number in futures.items():
+                if test_number in results:
+                    continue
+                # Started tests were interrupted, the others never ran
+                if test_number in started and stop_reason == TestOutcome.TIMEOUT:
+                    outcome = TestOutcome.TIMEOUT
+                    message = (
+                        f"Test case {test_number} was still running when the suite "
+                        f"budget of {deadline:.1f} seconds ran out"
+                    )
+                else:
+                    outcome = TestOutcome.SKIPPED
+                    message = (
+                        f"Test case {test_number} was skipped because the suite "
+                        f"{'CPU' if stop_reason == TestOutcome.CPU_LIMIT else 'time'}"
+                        " budget was exhausted"
+                    )
+                results[test_number] = TestResult(
                     passed=False,
-                    execution_time=execution_time,
+                    execution_time=time.time() - suite_start,
                     message=message,
-                    expected_output=expected_output,
-                    actual_output=actual_output,
+                    outcome=outcome,
                 )
+            self.terminate()
 
-        except Exception as e:
-            execution_time = time.time() - start_time
-            message = (
-                f"Test case {test_number} failed with error:\n"
-                f"Inputs:\n"
-                + "\n".join(f"  {k} = {v}" for k, v in input_dict.items())
-                + f"\n\nError: {str(e)}\n{traceback.format_exc()}"
-            )
-            return TestResult(
-                passed=False,
-                execution_time=execution_time,
-                message=message,
-            )
+        return [results[i] for i in range(1, len(self.unit_tests) + 1)]
+
+    def run_single_test(self, test_case: UnitTest, test_number: int) -> TestResult:
+        """Run a single test case and return the result."""
+        return execute_test(self.solution_func, test_case, test_number)
+
+    def profile_complexity(self, **kwargs: Any) -> "ComplexityProfile":
+        """Estimate time and space complexity, see utils.complexity_profiler"""
+        from utils.complexity_profiler import profile_complexity
+
+        return profile_complexity(self, **kwargs)
+
+    def run_stress_tests(self, **kwargs: Any) -> List["StressTestResult"]:
+        """Run the solution at the maximum constraints, see utils.stress_tester"""
+        from utils.stress_tester import run_stress_tests
+
+        return run_stress_tests(self, **kwargs)
 
     def print_results(self) -> None:
         """Print the results of all test cases."""
@@ -159,6 +839,7 @@ class SolutionTester:
         for i, result in enumerate(self.results, 1):
             print(f"\nTest Case {i}:")
             print(f"Status: {'✅ PASSED' if result.passed else '❌ FAILED'}")
+            print(f"Outcome: {result.outcome.value}")
             print(f"Execution Time: {result.execution_time:.4f} seconds")
             print("Details:")
             print(f"  {result.message}")
@@ -0,0 +1,317 @@
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.db_utils import (
+    check_version,
+    decode_cursor,
+    encode_cursor,
+    iter_json_questions,
+    parse_sort,
+    projected_fields,
+)
+from utils.dedup import index_saved_question
+
+# Record fields kept in their own columns, the rest is stored as JSON in data
+_COLUMNS = ("id", "status", "created_at", "last_updated")
+
+
+class SQLiteDB:
+    """
+    Question store backed by a local SQLite file.
+
+    Drop-in replacement for JsonDB: each save upserts a single row instead of
+    rewriting the whole corpus, and lookups by id, status and last_updated are
+    indexed. The database runs in WAL mode so readers don't block the writer.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/questions.sqlite3",
+        import_from: Optional[str] = "data/questions.json",
+    ):
+        """
+        Args:
+            db_path: Path of the SQLite database file
+            import_from: JsonDB file whose questions are imported when the
+                database is created
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.db_path.exists()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id TEXT PRIMARY KEY,
+                    status TEXT,
+                    created_at TEXT NOT NULL,
+                    last_updated TEXT NOT NULL,
+                    data TEXT NOT NULL
+                )
+                """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_questions_status "
+                "ON questions (status)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_questions_last_updated "
+                "ON questions (last_updated)"
+            )
+            # Keyset pagination in list_questions walks (sort field, id)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_questions_last_updated_id "
+                "ON questions (last_updated, id)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_questions_status_last_updated "
+                "ON questions (status, last_updated, id)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_questions_created_at "
+                "ON questions (created_at, id)"
+            )
+
+        if is_new and import_from and Path(import_from).exists():
+            self.import_json(import_from)
+
+    @staticmethod
+    def _to_record(row) -> Dict:
+        question_id, status, created_at, last_updated, data = row
+        record = json.loads(data)
+        record.update(
+            id=question_id,
+            status=status,
+            created_at=created_at,
+            last_updated=last_updated,
+        )
+        return record
+
+    def _upsert(self, question_data: Dict):
+        data = {k: v for k, v in question_data.items() if k not in _COLUMNS}
+        # created_at is only written on insert so it survives later saves
+        self._conn.execute(
+            """
+            INSERT INTO questions (id, status, created_at, last_updated, data)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                status = excluded.status,
+                last_updated = excluded.last_updated,
+                data = excluded.data
+            """,
+            (
+                question_data["id"],
+                question_data.get("status"),
+                question_data.get("created_at") or question_data["last_updated"],
+                question_data["last_updated"],
+                json.dumps(data, default=str),
+            ),
+        )
+
+    def _get_row(self, question_id: str):
+        return self._conn.execute(
+            "SELECT id, status, created_at, last_updated, data "
+            "FROM questions WHERE id = ?",
+            (question_id,),
+        ).fetchone()
+
+    def save_question(self, question_data: Dict) -> str:
+        """
+        Save or update a question in the database.
+
+        Versioned like JsonDB.save_question: a stale "version" raises
+        VersionConflictError.
+        """
+        # Generate unique ID if not exists
+        question_id = question_data.get("id", str(uuid.uuid4()))
+        question_data["id"] = question_id
+
+        with self._lock, self._conn:
+            # Take the write lock before reading so the version check and the
+            # write are atomic across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._get_row(question_id)
+            stored = self._to_record(row) if row else None
+            question_data["version"] = check_version(
+                question_id, question_data.get("version"), stored
+            )
+            question_data["last_updated"] = datetime.now().isoformat()
+            self._upsert(question_data)
+        index_saved_question(question_id, question_data)
+        return question_id
+
+    def update_question(self, question_id: str, fields: Dict) -> str:
+        """
+        Update only the given fields of a question, creating it if needed.
+
+        Versioned like JsonDB.update_question. The fields are patched into the
+        stored JSON with json_set, so the rest of the record is neither sent
+        nor re-serialized.
+        """
+        data_fields = {k: v for k, v in fields.items() if k not in _COLUMNS}
+        if any('"' in f for f in data_fields):
+            raise ValueError("Field names cannot contain quotes")
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT json_extract(data, '$.version') FROM questions WHERE id = ?",
+                (question_id,),
+            ).fetchone()
+            stored = {"version": row[0]} if row else None
+            fields["version"] = check_version(
+                question_id, fields.get("version"), stored
+            )
+            fields["last_updated"] = datetime.now().isoformat()
+
+            if row is None:
+                self._upsert({**fields, "id": question_id})
+            else:
+                data_fields["version"] = fields["version"]
+                assignments = ["last_updated = ?"]
+                params = [fields["last_updated"]]
+                if "status" in fields:
+                    assignments.append("status = ?")
+                    params.append(fields["status"])
+                assignments.append(
+                    "data = json_set(data, "
+                    + ", ".join("?, json(?)" for _ in data_fields)
+                    + ")"
+                )
+                for field, value in data_fields.items():
+                    params.extend([f'$."{field}"', json.dumps(value, default=str)])
+                params.append(question_id)
+                self._conn.execute(
+                    f"UPDATE questions SET {', '.join(assignments)} WHERE id = ?",
+                    params,
+                )
+        index_saved_question(question_id, fields)
+        return question_id
+
+    def get_question(self, question_id: str) -> Optional[Dict]:
+        """Get a specific question by ID"""
+        with self._lock:
+            row = self._get_row(question_id)
+        return self._to_record(row) if row else None
+
+    def get_all_questions(self) -> List[Dict]:
+        """Get all questions"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, created_at, last_updated, data "
+                "FROM questions ORDER BY created_at"
+            ).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def list_questions(
+        self,
+        fields: Optional[List[str]] = None,
+        sort: str = "-last_updated",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List one page of questions with only the requested fields.
+
+        Same contract as JsonDB.list_questions. Fields outside the indexed
+        columns are pulled out of the JSON data in SQLite, so large text
+        fields that weren't asked for never leave the database.
+        """
+        field, descending = parse_sort(sort)
+        fields = projected_fields(fields, field)
+        extra_fields = [f for f in fields if f not in _COLUMNS]
+        if any("'" in f or '"' in f for f in extra_fields):
+            raise ValueError("Field names cannot contain quotes")
+        # json_object keeps nested lists and dicts as JSON
+        extracted = (
+            "json_object("
+            + ", ".join(f"'{f}', json_extract(data, '$.\"{f}\"')" for f in extra_fields)
+            + ")"
+            if extra_fields
+            else "'{}'"
+        )
+
+        where, params = [], []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if category is not None:
+            where.append(
+                "EXISTS (SELECT 1 FROM json_each(data, '$.selected_categories') "
+                "WHERE value = ?)"
+            )
+            params.append(category)
+        if cursor:
+            value, question_id = decode_cursor(cursor)
+            op = "<" if descending else ">"
+            where.append(f"({field}, id) {op} (?, ?)")
+            params.extend([value, question_id])
+        direction = "DESC" if descending else "ASC"
+        query = (
+            f"SELECT id, status, created_at, last_updated, {extracted} "
+            "FROM questions"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + f" ORDER BY {field} {direction}, id {direction} LIMIT ?"
+        )
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        page = []
+        for row in rows[:limit]:
+            record = self._to_record(row)
+            page.append({f: record.get(f) for f in fields})
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(last[field], last["id"])
+        return page, next_cursor
+
+    def update_question_status(self, question_id: str, status: str):
+        """Update the status of a question"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._get_row(question_id)
+            if row is None:
+                return
+            data = json.loads(row[4])
+            data["version"] = (data.get("version") or 0) + 1
+            self._conn.execute(
+                "UPDATE questions SET status = ?, last_updated = ?, data = ? "
+                "WHERE id = ?",
+                (status, datetime.now().isoformat(), json.dumps(data), question_id),
+            )
+
+    def import_json(self, json_path: str) -> int:
+        """Import the questions of a JsonDB file, keeping their timestamps"""
+        return self.import_questions(iter_json_questions(json_path))
+
+    def import_questions(self, questions: Iterable[Dict]) -> int:
+        """Upsert questions as they are, keeping their timestamps and versions"""
+        now = datetime.now().isoformat()
+        count = 0
+        with self._lock, self._conn:
+            for question in questions:
+                question = dict(question)
+                question.setdefault("id", str(uuid.uuid4()))
+                question.setdefault("last_updated", now)
+                self._upsert(question)
+                count += 1
+        return count
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
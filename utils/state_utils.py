@@ -1,8 +1,10 @@
 from typing import Optional, Dict, Any
 import streamlit as st
-from utils.db_utils import JsonDB
+from utils.db_utils import VersionConflictError, create_db, status_from_flags
 import uuid
+import copy
 from utils.leetcode_utils import find_similar_leetcode_problems
+from utils.write_behind import get_write_queue
 import os
 
 
@@ -29,14 +31,7 @@ def initialize_session_state():
     if "current_question_id" not in st.session_state:
         st.session_state.current_question_id = None
     if "db" not in st.session_state:
-        use_mongo = os.getenv("USE_MONGODB", "false").lower() == "true"
-        if use_mongo:
-            from utils.mongo_utils import MongoDB
-
-            mongo_uri = os.getenv("MONGODB_URI")
-            st.session_state.db = MongoDB(mongo_uri)
-        else:
-            st.session_state.db = JsonDB()
+        st.session_state.db = create_db()
     if "debug_response" not in st.session_state:
         st.session_state.debug_response = None
     if "generate_completed" not in st.session_state:
@@ -69,18 +64,15 @@ def set_state_value(key: str, value: Any):
     st.session_state[key] = value
 
 
-def save_progress():
-    """Save current progress to database"""
-    if not st.session_state.get("current_question_id"):
-        # Generate a new question ID if one doesn't exist
-        st.session_state.current_question_id = str(uuid.uuid4())
-
-    db = st.session_state.db
-    current_state = {
-        "id": st.session_state.current_question_id,
+def progress_fields() -> Dict[str, Any]:
+    """The fields of the current question that save_progress persists"""
+    return {
         "selected_category": st.session_state.get(
             "selected_category"
         ),  # Changed from selected_categories
+        "selected_categories": st.session_state.get(
+            "selected_categories"
+        ),  # Used by the history's category filter
         "selected_theme": st.session_state.get(
             "selected_theme"
         ),  # Add theme to saved state
@@ -89,6 +81,7 @@ def save_progress():
             "generated_question"
         ),  # generate step
         "test_validation": st.session_state.get("test_validation"),  # generate step
+        "dedup": st.session_state.get("dedup"),  # generate step
         "solution_text": st.session_state.get("solution_text"),  # solve step
         "solution": st.session_state.get("solution"),  # solve step
         "formatted_text": st.session_state.get("formatted_text"),  # format step
@@ -105,23 +98,127 @@ def save_progress():
         "status": get_current_status(),
     }
 
-    db.save_question(current_state)
+
+def show_save_conflict():
+    st.error(
+        "This question was changed in another session since you opened it, "
+        "so your changes were not saved. Reload it from the History tab to "
+        "continue."
+    )
+
+
+def show_save_error(error: Exception):
+    st.error(
+        f"Your latest changes could not be saved ({error}). They will be saved "
+        "again with your next change."
+    )
+
+
+def save_progress():
+    """
+    Save current progress to database.
+
+    Only the fields that changed since the last save (or since the question
+    was resumed) are sent, through db.update_question. The first save of a
+    new question writes the whole record.
+
+    With the write-behind queue enabled (WRITE_BEHIND, see get_write_queue)
+    the save is queued and written in the background, so call flush_progress
+    where it has to be durable, e.g. before st.switch_page.
+    """
+    if not st.session_state.get("current_question_id"):
+        # Generate a new question ID if one doesn't exist
+        st.session_state.current_question_id = str(uuid.uuid4())
+
+    db = st.session_state.db
+    question_id = st.session_state.current_question_id
+    current_state = progress_fields()
+    # (question id, fields as last persisted)
+    saved_id, saved_state = st.session_state.get("saved_fields") or (None, None)
+
+    full = saved_id != question_id
+    if full:
+        fields = {"id": question_id, **current_state}
+    else:
+        fields = {
+            key: value
+            for key, value in current_state.items()
+            if key not in saved_state or saved_state[key] != value
+        }
+        if not fields:
+            return
+
+    queue = get_write_queue()
+    if queue:
+        # A background write of this question failed since the last save
+        error = queue.error(db, question_id)
+        if isinstance(error, VersionConflictError):
+            show_save_conflict()
+            return
+        if error:
+            show_save_error(error)
+            # Send everything, including what the failed write lost
+            full = True
+            fields = {"id": question_id, **current_state}
+        # Catch up with the version our queued writes produced, for the
+        # direct saves made if the queue is turned off
+        written = queue.version(db, question_id)
+        if written is not None:
+            st.session_state.version = written
+        queue.submit(
+            db,
+            question_id,
+            fields,
+            full=full,
+            version=st.session_state.get("version"),
+        )
+    else:
+        fields["version"] = st.session_state.get("version")
+        try:
+            if full:
+                db.save_question(fields)
+            else:
+                db.update_question(question_id, fields)
+        except VersionConflictError:
+            show_save_conflict()
+            return
+        st.session_state.version = fields["version"]
+
+    # Copied so in-place edits of lists show up as changes next time
+    st.session_state.saved_fields = (question_id, copy.deepcopy(current_state))
+
+
+def flush_progress() -> bool:
+    """
+    Wait until the queued saves of the current question are written.
+
+    Returns:
+        False (after showing an error) if they could not be saved
+    """
+    queue = get_write_queue()
+    question_id = st.session_state.get("current_question_id")
+    if not queue or not question_id:
+        return True
+    db = st.session_state.db
+    queue.wait_for_durability(db, question_id)
+    error = queue.error(db, question_id)
+    if isinstance(error, VersionConflictError):
+        show_save_conflict()
+        return False
+    if error:
+        show_save_error(error)
+        # The next save_progress sends the whole question again
+        st.session_state.saved_fields = None
+        return False
+    written = queue.version(db, question_id)
+    if written is not None:
+        st.session_state.version = written
+    return True
 
 
 def get_current_status() -> str:
     """Determine current progress status based on completion flags"""
-    if st.session_state.get("review_completed"):
-        return "completed"
-    elif st.session_state.get("debug_completed"):
-        return "reviewing"
-    elif st.session_state.get("format_completed"):
-        return "debugging"
-    elif st.session_state.get("solve_completed"):
-        return "formatting"
-    elif st.session_state.get("generate_completed"):
-        return "solving"
-    else:
-        return "started"
+    return status_from_flags(st.session_state)
 
 
 def resume_question(question_id: str) -> bool:
@@ -129,6 +226,12 @@ def resume_question(question_id: str) -> bool:
     if "db" not in st.session_state:
         return False
 
+    # Read our own queued saves of the question back
+    queue = get_write_queue()
+    if queue:
+        queue.wait_for_durability(st.session_state.db, question_id)
+        queue.forget(st.session_state.db, question_id)
+
     question = st.session_state.db.get_question(question_id)
     if not question:
         return False
@@ -141,6 +244,11 @@ def resume_question(question_id: str) -> bool:
         if key != "id":
             st.session_state[key] = value
     st.session_state.current_question_id = question_id
+    # Later saves only send what changes from here
+    st.session_state.saved_fields = (
+        question_id,
+        {key: question.get(key) for key in progress_fields()},
+    )
 
     # Set completion flags based on status
     if question.get("status") == "completed":
@@ -175,7 +283,10 @@ def clear_session_state():
         "review_completed",
         "similar_problems",
         "similarity_analysis",
+        "dedup",
         "validate_clicked",
+        "version",
+        "saved_fields",
     ]
     for key in keys_to_clear:
         if key in st.session_state:
@@ -0,0 +1,230 @@
+import time
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from questions_py.types import StressTest
+from utils.input_generator import SHAPES, InputGenerator
+from utils.solution_tester import (
+    CPUTimeExceeded,
+    SolutionTester,
+    TestOutcome,
+    TimeoutException,
+    cpu_limit,
+    get_worker_context,
+    memory_limit,
+    timeout,
+)
+
+
+@dataclass
+class StressTestResult:
+    passed: bool
+    shape: str
+    input_sizes: Dict[str, int]
+    execution_time: float
+    message: str
+    outcome: TestOutcome = TestOutcome.FAILED
+    throughput: Optional[float] = None  # Input elements processed per second
+    peak_memory_mb: Optional[float] = None
+    time_limit_sec: float = 0.0
+
+
+def _read_status_kb(field_name: str) -> Optional[int]:
+    """Read a memory field such as VmRSS from /proc/self/status (Linux only)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field_name + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the VmHWM high-water mark of the current process (Linux 4.0+)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# Input generator built lazily once per worker process
+_worker_generator: Optional[InputGenerator] = None
+
+
+def _stress_in_worker(stress_test: StressTest, seed: int) -> StressTestResult:
+    """Run the solution once on worst-case inputs at the maximum constraints"""
+    global _worker_generator
+    solution_func, metadata, limits = get_worker_context()
+    result = StressTestResult(
+        passed=False,
+        shape=stress_test.shape,
+        input_sizes=stress_test.sizes,
+        execution_time=0.0,
+        message="",
+        time_limit_sec=stress_test.time_limit_sec,
+    )
+
+    # The memory budget is measured from what the worker holds right now
+    with memory_limit(limits.memory_mb):
+        # Inputs at the maximum constraints can be too large for the memory
+        # budget or impossible to build, an outcome of the test like any other
+        try:
+            if _worker_generator is None:
+                _worker_generator = InputGenerator(metadata)
+            inputs = _worker_generator.generate(
+                _worker_generator.max_size,
+                seed=seed,
+                shape=stress_test.shape,
+                overrides=stress_test.sizes,
+            )
+        except MemoryError:
+            result.outcome = TestOutcome.MEMORY_LIMIT
+            result.message = (
+                "Building the inputs exceeded the memory budget of "
+                f"{limits.memory_mb} MB"
+            )
+            return result
+        except Exception as e:
+            result.outcome = TestOutcome.ERROR
+            result.message = f"Failed to build the inputs: {e}"
+            return result
+        result.input_sizes = {
+            name: len(value)
+            for name, value in inputs.items()
+            if hasattr(value, "__len__")
+        }
+
+        # Memory is read from the kernel's RSS high-water mark rather than
+        # tracemalloc, which would slow the solution down at these sizes
+        can_track_memory = _reset_peak_rss()
+        baseline_kb = _read_status_kb("VmRSS")
+        start = time.perf_counter()
+        try:
+            with timeout(stress_test.time_limit_sec), cpu_limit(limits.cpu_time_sec):
+                solution_func(**inputs)
+            result.outcome = TestOutcome.PASSED
+            result.message = "Completed within the time limit"
+        except TimeoutException:
+            result.outcome = TestOutcome.TIMEOUT
+            result.message = f"Timed out after {stress_test.time_limit_sec} seconds"
+        except CPUTimeExceeded:
+            result.outcome = TestOutcome.CPU_LIMIT
+            result.message = f"Exceeded the CPU budget of {limits.cpu_time_sec} seconds"
+        except MemoryError:
+            result.outcome = TestOutcome.MEMORY_LIMIT
+            result.message = f"Exceeded the memory budget of {limits.memory_mb} MB"
+        except Exception as e:
+            result.outcome = TestOutcome.ERROR
+            result.message = f"Failed with error: {e}"
+        result.execution_time = time.perf_counter() - start
+
+        result.passed = result.outcome == TestOutcome.PASSED
+        if result.passed and result.execution_time > 0:
+            result.throughput = sum(result.input_sizes.values()) / result.execution_time
+        peak_kb = _read_status_kb("VmHWM")
+        if can_track_memory and peak_kb is not None and baseline_kb is not None:
+            result.peak_memory_mb = max(peak_kb - baseline_kb, 0) / 1024
+        return result
+
+
+def default_stress_tests(time_limit_sec: float = 2.0) -> List[StressTest]:
+    """One stress test per input shape"""
+    return [StressTest(shape=shape, time_limit_sec=time_limit_sec) for shape in SHAPES]
+
+
+def run_stress_tests(
+    tester: SolutionTester,
+    stress_tests: Optional[List[StressTest]] = None,
+    time_limit_sec: float = 2.0,
+    generation_allowance_sec: float = 60.0,
+) -> List[StressTestResult]:
+    """
+    Run the solution against synthesized inputs at the upper constraint bounds.
+
+    Inputs are built by InputGenerator from the challenge metadata, so every
+    argument is grown to the maximum length its Input.constraints allow.
+    Stress tests run in parallel on the tester's worker pool and are subject
+    to its CPU and memory limits.
+
+    Args:
+        tester: Tester whose solution should be stress tested (needs metadata)
+        stress_tests: Tests to run, defaulting to metadata.stress_tests or one
+            test per input shape
+        time_limit_sec: Time limit of the default stress tests
+        generation_allowance_sec: Extra time allowed for building the inputs
+            before a stuck worker is killed
+
+    Returns:
+        One StressTestResult per stress test, in order
+    """
+    if tester.metadata is None:
+        raise ValueError("Challenge metadata is required to synthesize inputs")
+    InputGenerator(tester.metadata)  # Fail fast on metadata we can't grow
+
+    stress_tests = (
+        stress_tests
+        or tester.metadata.stress_tests
+        or default_stress_tests(time_limit_sec)
+    )
+    futures = [
+        tester.submit(_stress_in_worker, stress_test, seed)
+        for seed, stress_test in enumerate(stress_tests)
+    ]
+    # Signals can't interrupt native code, so bound the whole run from here too
+    deadline = sum(t.time_limit_sec for t in stress_tests) + generation_allowance_sec
+    _, pending = wait(futures, timeout=deadline)
+    if pending:
+        tester.terminate()
+
+    results = []
+    for stress_test, future in zip(stress_tests, futures):
+        if future in pending:
+            results.append(
+                StressTestResult(
+                    passed=False,
+                    shape=stress_test.shape,
+                    input_sizes=stress_test.sizes,
+                    execution_time=deadline,
+                    message=f"Did not finish within {deadline:.0f} seconds",
+                    outcome=TestOutcome.TIMEOUT,
+                    time_limit_sec=stress_test.time_limit_sec,
+                )
+            )
+            continue
+        try:
+            results.append(future.result())
+        except BrokenProcessPool:
+            results.append(
+                StressTestResult(
+                    passed=False,
+                    shape=stress_test.shape,
+                    input_sizes=stress_test.sizes,
+                    execution_time=0.0,
+                    message=(
+                        "The worker process died (killed by a resource limit "
+                        "or crashed)"
+                    ),
+                    outcome=TestOutcome.CRASHED,
+                    time_limit_sec=stress_test.time_limit_sec,
+                )
+            )
+            tester.close()
+        except Exception as e:
+            results.append(
+                StressTestResult(
+                    passed=False,
+                    shape=stress_test.shape,
+                    input_sizes=stress_test.sizes,
+                    execution_time=0.0,
+                    message=f"Failed with error: {e}",
+                    outcome=TestOutcome.ERROR,
+                    time_limit_sec=stress_test.time_limit_sec,
+                )
+            )
+    return results
@@ -0,0 +1,199 @@
+import codecs
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+T = TypeVar("T")
+
+# Realistic browser headers, some sites refuse requests without them
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1",
+    "Cache-Control": "max-age=0",
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session(per_host: int = 4) -> requests.Session:
+    """
+    Return the process-wide keep-alive session used to fetch web pages.
+
+    Connections are pooled per host (at most per_host kept open), so repeated
+    fetches from the same site skip the TCP and TLS handshakes.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(BROWSER_HEADERS)
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=per_host)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def fetch_pages(
+    urls: Sequence[str],
+    handler: Callable[[str, requests.Response], T],
+    session: Optional[requests.Session] = None,
+    headers: Optional[Callable[[str], Dict[str, str]]] = None,
+    max_workers: int = 8,
+    per_host: int = 2,
+    timeout: float = 10,
+    deadline: float = 15,
+) -> List[Optional[T]]:
+    """
+    Fetch pages concurrently and run handler(url, response) on each response.
+
+    Requests are streamed, so handler decides how much of the body to read.
+    At most per_host requests go to the same host at once. Whatever has not
+    finished deadline seconds after the call is given up on, so a few slow
+    sites can't hold up the caller.
+
+    Args:
+        urls: Pages to fetch
+        handler: Called with each response, in a worker thread
+        session: Session to use (defaults to get_http_session())
+        headers: Returns extra request headers for a url
+        max_workers: Maximum number of requests in flight
+        per_host: Maximum number of requests in flight per host
+        timeout: Connect and read timeout of each request
+        deadline: Seconds after which to return whatever has finished
+
+    Returns:
+        handler's result for each url, in order, or None where the request
+        failed or didn't finish in time
+    """
+    session = session or get_http_session()
+    end = time.monotonic() + deadline
+    host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    for url in urls:
+        host_slots.setdefault(
+            urlsplit(url).netloc, threading.BoundedSemaphore(per_host)
+        )
+    results: List[Optional[T]] = [None] * len(urls)
+
+    def fetch(url: str) -> T:
+        slot = host_slots[urlsplit(url).netloc]
+        if not slot.acquire(timeout=max(end - time.monotonic(), 0)):
+            raise TimeoutError(f"Deadline passed waiting for a connection to {url}")
+        try:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Deadline passed before fetching {url}")
+            with session.get(
+                url,
+                headers=headers(url) if headers else None,
+                timeout=min(timeout, remaining),
+                stream=True,
+            ) as response:
+                return handler(url, response)
+        finally:
+            slot.release()
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(urls))),
+        thread_name_prefix="fetch",
+    )
+    futures = {executor.submit(fetch, url): i for i, url in enumerate(urls)}
+    try:
+        for future in as_completed(futures, timeout=max(end - time.monotonic(), 0)):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                print(f"Error fetching {urls[futures[future]]}: {e}")
+    except TimeoutError:
+        unfinished = sum(not future.done() for future in futures)
+        print(f"Fetch deadline passed, skipping {unfinished} unfinished pages")
+    finally:
+        # Running requests end on their own timeout, queued ones are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+class _TitleParser(HTMLParser):
+    """Collects the <title> and og:title of a page, ignoring everything else"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.og_title: Optional[str] = None
+        self.done = False  # Nothing more to find
+        self._title_parts: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag == "meta":
+            attrs = dict(attrs)
+            if attrs.get("property") == "og:title" and attrs.get("content"):
+                self.og_title = attrs["content"]
+                self.done = True
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title_parts is not None:
+            self.title = "".join(self._title_parts)
+            self._title_parts = None
+            self.done = True
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+    def result(self) -> Optional[str]:
+        title = self.title
+        if title is None and self._title_parts:
+            title = "".join(self._title_parts)  # Cut off by the byte limit
+        title = " ".join((title or "").split())
+        return title or self.og_title
+
+
+def read_title(
+    response: requests.Response, max_bytes: int = 64 * 1024, chunk_size: int = 8192
+) -> Optional[str]:
+    """
+    Title of an HTML page (its <title>, else its og:title meta tag).
+
+    Only reads the streamed response up to the title, the end of the head or
+    max_bytes, whichever comes first, and scans it with an event parser, so
+    the rest of the page is neither downloaded nor parsed into a tree.
+    """
+    # requests falls back to ISO-8859-1 when the charset isn't declared, but
+    # pages without one are nearly always UTF-8
+    encoding = "utf-8"
+    if "charset" in response.headers.get("Content-Type", "").lower():
+        encoding = response.encoding or encoding
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    parser = _TitleParser()
+    read = 0
+    for chunk in response.iter_content(chunk_size):
+        read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or read >= max_bytes:
+            break
+    return parser.result()
@@ -0,0 +1,278 @@
+import atexit
+import itertools
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.db_utils import VersionConflictError
+
+
+class _PendingWrite:
+    """The coalesced, not yet written saves of one question"""
+
+    def __init__(self, db, question_id: str, fields: Dict, full: bool, version):
+        self.db = db
+        self.question_id = question_id
+        self.fields = fields
+        self.full = full  # save_question instead of update_question
+        self.version = version
+        self.chained = False  # Based on the version our previous write produced
+        self.due = 0.0
+        self.deadline = 0.0
+        self.failures = 0  # Failed attempts to write these fields so far
+        self.retry_at = 0.0  # Not written before this, even when flushed
+
+
+class WriteBehindQueue:
+    """
+    Background writer for question saves.
+
+    Saves are queued per (db, question id) and written by a single thread once
+    no new save for the question arrived for delay seconds, or max_delay after
+    the first queued one. Saves queued in the meantime are merged, so a burst
+    of saves costs one database round trip. Writes to one question happen in
+    order, each based on the version the previous one produced.
+
+    A write that fails with VersionConflictError is kept as the question's
+    error and every later save of it is dropped until forget() is called.
+    Other failures (e.g. the database being unreachable) are retried up to
+    retries times with exponential backoff; if the last retry fails too, the
+    error is kept until error() reports it once, and the unsaved fields are
+    lost unless the caller saves them again.
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.5,
+        max_delay: float = 2.0,
+        retries: int = 3,
+        max_tracked: int = 4096,
+    ):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.retries = retries
+        self.max_tracked = max_tracked
+        self._cond = threading.Condition()
+        self._pending: Dict[Tuple[int, str], _PendingWrite] = {}
+        self._in_flight: Optional[Tuple[int, str]] = None
+        # Version our last write of each question produced, the most recently
+        # written max_tracked questions only
+        self._versions: "OrderedDict[Tuple[int, str], int]" = OrderedDict()
+        self._conflicts: Dict[Tuple[int, str], VersionConflictError] = {}
+        # Failures not reported by error() yet
+        self._errors: Dict[Tuple[int, str], Exception] = {}
+        self._thread: Optional[threading.Thread] = None
+        # Number of each backend, never reused unlike id(), so the state of a
+        # garbage collected backend can't be mistaken for a new one's
+        self._db_numbers: "weakref.WeakKeyDictionary[Any, int]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._next_db_number = itertools.count()
+
+    def _db_number(self, db) -> int:
+        with self._cond:
+            if db not in self._db_numbers:
+                self._db_numbers[db] = next(self._next_db_number)
+            return self._db_numbers[db]
+
+    def _key(self, db, question_id: str) -> Tuple[int, str]:
+        return (self._db_number(db), question_id)
+
+    def submit(
+        self, db, question_id: str, fields: Dict, full: bool = False, version=None
+    ):
+        """
+        Queue a save.
+
+        Args:
+            db: Backend to write to
+            question_id: Question to save
+            fields: Whole record (full=True) or the changed fields
+            full: Write with save_question instead of update_question
+            version: Version the caller's copy of the question is based on,
+                only used when no earlier write of the question is known
+        """
+        key = self._key(db, question_id)
+        now = time.monotonic()
+        with self._cond:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = _PendingWrite(db, question_id, dict(fields), full, version)
+                entry.chained = key in self._versions or key == self._in_flight
+                entry.deadline = now + self.max_delay
+                self._pending[key] = entry
+            elif full:
+                entry.fields = dict(fields)
+                entry.full = True
+            else:
+                entry.fields.update(fields)
+            entry.due = max(min(now + self.delay, entry.deadline), entry.retry_at)
+            self._start()
+            self._cond.notify_all()
+
+    def error(self, db, question_id: str) -> Optional[Exception]:
+        """
+        The exception a write of the question failed with, if any.
+
+        A VersionConflictError is returned until forget() is called, other
+        errors are returned only once.
+        """
+        key = self._key(db, question_id)
+        with self._cond:
+            return self._conflicts.get(key) or self._errors.pop(key, None)
+
+    def version(self, db, question_id: str) -> Optional[int]:
+        """Version our last write of the question produced, if known"""
+        key = self._key(db, question_id)
+        with self._cond:
+            return self._versions.get(key)
+
+    def forget(self, db, question_id: str):
+        """
+        Drop what is known about the question's past writes, so the next save
+        is based on the version passed to submit again (e.g. after reloading
+        the question).
+        """
+        key = self._key(db, question_id)
+        with self._cond:
+            self._versions.pop(key, None)
+            self._conflicts.pop(key, None)
+            self._errors.pop(key, None)
+
+    def wait_for_durability(
+        self,
+        db=None,
+        question_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Write the matching queued saves now and wait until they are done.
+
+        Saves being retried keep their backoff, so this can take until their
+        last retry.
+
+        Args:
+            db: Only wait for saves to this backend (default: all)
+            question_id: Only wait for saves of this question (default: all)
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            False if the timeout expired first
+        """
+
+        db_number = None if db is None else self._db_number(db)
+
+        def matches(key) -> bool:
+            return (db_number is None or key[0] == db_number) and (
+                question_id is None or key[1] == question_id
+            )
+
+        with self._cond:
+            for key, entry in self._pending.items():
+                if matches(key):
+                    entry.due = entry.retry_at
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not any(matches(key) for key in self._pending)
+                and not (self._in_flight and matches(self._in_flight)),
+                timeout,
+            )
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = [k for k, e in self._pending.items() if e.due <= now]
+                    if due:
+                        break
+                    wait = min((e.due for e in self._pending.values()), default=None)
+                    self._cond.wait(None if wait is None else wait - now)
+                key = min(due, key=lambda k: self._pending[k].due)
+                entry = self._pending.pop(key)
+                self._in_flight = key
+                previous = self._versions.get(key)
+                conflict = self._conflicts.get(key)
+
+            # Saves after a conflict are dropped until forget()
+            result = conflict or self._write(entry, previous)
+
+            with self._cond:
+                if isinstance(result, VersionConflictError):
+                    self._conflicts[key] = result
+                elif isinstance(result, Exception):
+                    self._retry_or_fail(key, entry, result)
+                else:
+                    self._versions[key] = result
+                    self._versions.move_to_end(key)
+                    while len(self._versions) > self.max_tracked:
+                        self._versions.popitem(last=False)
+                self._in_flight = None
+                self._cond.notify_all()
+
+    def _retry_or_fail(self, key: Tuple[int, str], entry: _PendingWrite, error):
+        """Queue a failed write again, merged with saves queued since"""
+        entry.failures += 1
+        if entry.failures > self.retries:
+            self._errors[key] = error
+            return
+        # Saves queued since were based on the failed write, it wasn't
+        entry.fields.pop("version", None)
+        newer = self._pending.get(key)
+        if newer is not None and newer.full:
+            entry.fields, entry.full = newer.fields, True
+        elif newer is not None:
+            entry.fields.update(newer.fields)
+        entry.retry_at = time.monotonic() + self.delay * 2**entry.failures
+        entry.due = entry.retry_at
+        self._pending[key] = entry
+
+    @staticmethod
+    def _write(entry: _PendingWrite, previous):
+        """Write one entry, returning the new version or the exception"""
+        fields = entry.fields
+        fields["version"] = previous if entry.chained else entry.version
+        try:
+            if entry.full:
+                fields["id"] = entry.question_id
+                entry.db.save_question(fields)
+            else:
+                entry.db.update_question(entry.question_id, fields)
+            return fields["version"]
+        except Exception as e:
+            print(f"Error saving question {entry.question_id}: {e}")
+            return e
+
+
+_queue: Optional[WriteBehindQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> Optional[WriteBehindQueue]:
+    """
+    Return the process-wide write-behind queue, or None when it is disabled.
+
+    Configured with WRITE_BEHIND (default true), WRITE_BEHIND_DELAY_MS and
+    WRITE_BEHIND_MAX_DELAY_MS. Queued saves are flushed at exit.
+    """
+    global _queue
+    if os.getenv("WRITE_BEHIND", "true").lower() != "true":
+        return None
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(
+                delay=int(os.getenv("WRITE_BEHIND_DELAY_MS", "500")) / 1000,
+                max_delay=int(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "2000")) / 1000,
+            )
+            atexit.register(_queue.wait_for_durability, timeout=30)
+        return _queue